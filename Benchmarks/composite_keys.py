@@ -0,0 +1,97 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from Utils.composite_keys import composite_key
+
+# Shape of a full AFL season: 9 matches a round, 24 rounds, 23 players a side, 4 quarters
+SEASON_MATCHES = 216
+PLAYERS_PER_MATCH = 46
+PERIODS = 4
+
+
+# Box score, period and fixture frames of a synthetic season, one set of frames per match
+def season_frames(matches=SEASON_MATCHES, players=PLAYERS_PER_MATCH, periods=PERIODS, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for match_index in range(matches):
+        match_id = 100000000 + match_index
+        box = pd.DataFrame({
+            'playerId': rng.integers(1000, 99999, players),
+            'squadId': np.repeat([801, 806], players // 2 + 1)[:players],
+            'goals': rng.integers(0, 6, players),
+            'firstname': [f"First{index}" for index in range(players)],
+        })
+        box.loc[0, 'playerId'] = np.nan  # Payloads regularly carry a row without a playerId
+        box['matchId'] = match_id
+        # Period stats are merged with the player info, so rows are mixed-type as in PeriodData
+        period = box.loc[box.index.repeat(periods), ['playerId', 'squadId', 'goals', 'firstname']].reset_index(drop=True)
+        period['period'] = np.tile(np.arange(1, periods + 1), players)
+        frames.append((box, period))
+
+    fixture = pd.DataFrame({
+        'matchId': 100000000 + np.arange(matches),
+        'homeSquadId': 801, 'homeSquadName': 'Carlton',
+        'awaySquadId': 806, 'awaySquadName': 'Collingwood',
+    })
+    return frames, fixture
+
+
+# Key generation as the parsers did it before, one Python call per row
+def legacy_keys(frames, fixture, fixture_id):
+    for box, period in frames:
+        box['uniquePlayerId'] = box.apply(lambda row: f"{row['playerId']}-{row['squadId']}" if pd.notnull(row['playerId']) and pd.notnull(row['squadId']) else 'Unknown', axis=1)
+        box['uniqueMatchId'] = box.apply(lambda row: f"{row['matchId']}-{row['playerId']}" if pd.notnull(row['matchId']) and pd.notnull(row['playerId']) else 'Unknown', axis=1)
+        period['uniquePeriodId'] = period.apply(lambda row: f"{row['period']}-{row['playerId']}" if pd.notnull(row.get('period')) and pd.notnull(row.get('playerId')) else 'Unknown', axis=1)
+    fixture['uniqueFixtureId'] = fixture.apply(lambda row: f"{fixture_id}-{row['matchId']}" if pd.notnull(row['matchId']) else 'Unknown', axis=1).astype(str).replace('nan', 'Unknown')
+    fixture['uniqueHomeSquadId'] = fixture.apply(lambda row: f"{row['homeSquadId']}-{row['homeSquadName']}" if pd.notnull(row['homeSquadId']) and pd.notnull(row['homeSquadName']) else 'Unknown', axis=1).astype(str).replace('nan', 'Unknown')
+    fixture['uniqueAwaySquadId'] = fixture.apply(lambda row: f"{row['awaySquadId']}-{row['awaySquadName']}" if pd.notnull(row['awaySquadId']) and pd.notnull(row['awaySquadName']) else 'Unknown', axis=1).astype(str).replace('nan', 'Unknown')
+
+
+# Key generation with the shared vectorized builder
+def vectorized_keys(frames, fixture, fixture_id):
+    for box, period in frames:
+        box['uniquePlayerId'] = composite_key(box['playerId'], box['squadId'])
+        box['uniqueMatchId'] = composite_key(box['matchId'], box['playerId'])
+        period['uniquePeriodId'] = composite_key(period.get('period'), period.get('playerId'), index=period.index)
+    fixture['uniqueFixtureId'] = composite_key(fixture_id, fixture['matchId'])
+    fixture['uniqueHomeSquadId'] = composite_key(fixture['homeSquadId'], fixture['homeSquadName'])
+    fixture['uniqueAwaySquadId'] = composite_key(fixture['awaySquadId'], fixture['awaySquadName'])
+
+
+# Best wall time of a key builder over a number of runs on fresh copies of the frames
+def best_time(builder, frames, fixture, repeat):
+    timings = []
+    for _ in range(repeat):
+        copies = [(box.copy(), period.copy()) for box, period in frames]
+        fixture_copy = fixture.copy()
+        start = time.perf_counter()
+        builder(copies, fixture_copy, 12438)
+        timings.append(time.perf_counter() - start)
+    return min(timings), copies, fixture_copy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark composite key generation on a synthetic full season.")
+    parser.add_argument('--matches', type=int, default=SEASON_MATCHES)
+    parser.add_argument('--players', type=int, default=PLAYERS_PER_MATCH)
+    parser.add_argument('--periods', type=int, default=PERIODS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames, fixture = season_frames(args.matches, args.players, args.periods)
+    legacy, legacy_frames, legacy_fixture = best_time(legacy_keys, frames, fixture, args.repeat)
+    vectorized, vectorized_frames, vectorized_fixture = best_time(vectorized_keys, frames, fixture, args.repeat)
+
+    # Both builders must produce exactly the same keys
+    for (legacy_box, legacy_period), (box, period) in zip(legacy_frames, vectorized_frames):
+        assert legacy_box['uniquePlayerId'].tolist() == box['uniquePlayerId'].tolist()
+        assert legacy_box['uniqueMatchId'].tolist() == box['uniqueMatchId'].tolist()
+        assert legacy_period['uniquePeriodId'].tolist() == period['uniquePeriodId'].tolist()
+    for column in ('uniqueFixtureId', 'uniqueHomeSquadId', 'uniqueAwaySquadId'):
+        assert legacy_fixture[column].tolist() == vectorized_fixture[column].tolist()
+
+    rows = sum(len(box) * 2 + len(period) for box, period in frames) + len(fixture) * 3
+    print(f"{args.matches} matches, {rows} keys")
+    print(f"apply(axis=1): {legacy:.3f}s")
+    print(f"composite_key: {vectorized:.3f}s ({legacy / vectorized:.1f}x faster)")
@@ -0,0 +1,81 @@
+import argparse
+import contextlib
+import io
+import logging
+import random
+from unittest.mock import patch
+import pandas as pd
+from Benchmarks.match_records import synthetic_payload
+from Core.MatchDetails import Match
+from Core.MatchPayload import MatchPayload
+from Core.PeriodData import PeriodData
+from Core.ScoreFlowData import ScoreFlow
+from Utils.dtype_policy import default_policy
+
+# Matches of a full AFL season and the clubs playing it
+SEASON_MATCHES = 216
+SQUADS = ['Adelaide', 'Brisbane', 'Carlton', 'Collingwood', 'Essendon', 'Fremantle', 'Geelong', 'Gold Coast', 'GWS',
+          'Hawthorn', 'Melbourne', 'North Melbourne', 'Port Adelaide', 'Richmond', 'St Kilda', 'Sydney', 'West Coast', 'Bulldogs']
+POSITIONS = ['Full Forward', 'Half Forward', 'Centre', 'Wing', 'Ruck', 'Rover', 'Half Back', 'Full Back', 'Interchange']
+
+
+# Fixture frame of a season, as Fixture builds it from the fixture feed
+def season_fixture(matches, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(matches):
+        home, away = rng.sample(range(len(SQUADS)), 2)
+        rows.append({
+            'matchId': 100000000 + index, 'roundNumber': index // 9 + 1, 'matchStatus': 'complete', 'matchType': 'H',
+            'homeSquadId': 800 + home, 'homeSquadName': SQUADS[home], 'homeSquadCode': SQUADS[home][:3].upper(),
+            'awaySquadId': 800 + away, 'awaySquadName': SQUADS[away], 'awaySquadCode': SQUADS[away][:3].upper(),
+            'venueId': home, 'venueName': f"{SQUADS[home]} Oval", 'venueCode': f"V{home}",
+            'localStartTime': f"2024-{3 + index // 30:02d}-{index % 28 + 1:02d} 19:40:00", 'finalCode': '', 'finalShortCode': '',
+        })
+    return pd.DataFrame(rows)
+
+
+# Match, period and score flow frames of one match, as the parsers build them
+def match_frames(match_id, seed=0):
+    data = synthetic_payload(match_id, seed=seed)
+    rng = random.Random(match_id)
+    for player in data['matchStats']['playerStats']['player'] + data['matchStats']['playerPeriodStats']['player']:
+        player['positionName'] = rng.choice(POSITIONS)
+    payload = MatchPayload(1, match_id).load(data)
+    match = Match(1, match_id, 1, 3, 2024, payload=payload)
+    period = PeriodData(1, match_id, payload=payload)
+    score_flow = ScoreFlow(1, match_id, payload=payload)
+    for parser in (match, period, score_flow):
+        parser.fetch_data()
+    return match.data, period.data, score_flow.data
+
+
+# Deep memory of a list of frames
+def frames_bytes(frames):
+    return sum(frame.memory_usage(deep=True).sum() for frame in frames)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory of the parsed DataFrames of a league, before and after the dtype policy.")
+    parser.add_argument('--matches', type=int, default=SEASON_MATCHES)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    policy = default_policy()
+
+    # Build the frames without the policy, then apply it
+    identity = lambda df: df
+    with patch('Core.MatchDetails.apply_dtype_policy', identity), patch('Core.PeriodData.apply_dtype_policy', identity), \
+            patch('Core.ScoreFlowData.apply_dtype_policy', identity), contextlib.redirect_stdout(io.StringIO()):
+        frames = [match_frames(100000000 + index) for index in range(args.matches)]
+    fixture = season_fixture(args.matches)
+
+    print(f"{args.matches} matches")
+    totals = [0, 0]
+    for name, kind_frames in (('fixture', [fixture]), ('match', [frame[0] for frame in frames]),
+                              ('period', [frame[1] for frame in frames]), ('score flow', [frame[2] for frame in frames])):
+        before = frames_bytes(kind_frames)
+        after = frames_bytes([policy.apply(frame) for frame in kind_frames])
+        totals[0] += before
+        totals[1] += after
+        print(f"{name:>10}: {before / 2 ** 20:.2f} MiB -> {after / 2 ** 20:.2f} MiB ({1 - after / before:.0%} less)")
+    print(f"{'league':>10}: {totals[0] / 2 ** 20:.2f} MiB -> {totals[1] / 2 ** 20:.2f} MiB ({1 - totals[1] / totals[0]:.0%} less)")
@@ -0,0 +1,103 @@
+import argparse
+import contextlib
+import io
+import logging
+import random
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+from Core.MatchDetails import Match
+from Core.MatchPayload import MatchPayload
+from Core.MatchRecords import MatchRecordParser
+from Core.MatchTransform import MatchTransform
+from Core.PeriodData import PeriodData
+from Core.ScoreFlowData import ScoreFlow
+from Utils.JsonLoader import load_json_fields
+
+# Shape of an AFL match: 23 players a side, 4 quarters, about 50 scoring shots
+PLAYERS_PER_MATCH = 46
+PERIODS = 4
+SCORES = 50
+STATS = ['kicks', 'handballs', 'disposals', 'marks', 'tackles', 'goals', 'behinds', 'hitouts', 'inside50s', 'clearances',
+         'contestedPossessions', 'uncontestedPossessions', 'freesFor', 'freesAgainst', 'metresGained', 'timeOnGroundPercentage']
+
+
+# Decoded match JSON with the sections the parsers read
+def synthetic_payload(match_id, players=PLAYERS_PER_MATCH, periods=PERIODS, scores=SCORES, seed=0):
+    rng = random.Random(seed + match_id)
+    player_ids = rng.sample(range(1000, 999999), players)
+    squads = [801 if index % 2 else 806 for index in range(players)]
+    stats = [dict({stat: rng.randrange(30) for stat in STATS}, playerId=player_id, squadId=squad_id, squadCode='X')
+             for player_id, squad_id in zip(player_ids, squads)]
+    return {'matchStats': {
+        'matchInfo': {'homeSquadId': 801, 'awaySquadId': 806, 'roundNumber': 1},
+        'teamInfo': {'team': [{'squadId': 801, 'squadName': 'Carlton'}, {'squadId': 806, 'squadName': 'Collingwood'}]},
+        'playerInfo': {'player': [{'playerId': player_id, 'firstname': f'First{index}', 'surname': f'Last{index}',
+                                   'displayName': f'F.Last{index}', 'shortDisplayName': f'Last{index}'}
+                                  for index, player_id in enumerate(player_ids)]},
+        'playerStats': {'player': stats},
+        'playerPeriodStats': {'player': [dict(stat, period=period) for stat in stats for period in range(1, periods + 1)]},
+        'scoreFlow': {'score': [{'playerId': rng.choice(player_ids), 'squadId': rng.choice((801, 806)), 'period': rng.randint(1, periods),
+                                 'periodSeconds': rng.randrange(1200), 'scorepoints': 6, 'scoreName': 'goal'} for _ in range(scores)]},
+    }}
+
+
+# Rows of a match the way Scraper.match_rows builds them with DataFrames
+def dataframe_rows(match_id, payload, json_fields):
+    transform = MatchTransform(match_id, 1, 3, '3-1', lambda names: {}, MagicMock())
+    match = Match(1, match_id, 1, 3, 2024, payload=payload)
+    match.fetch_data()
+    period = PeriodData(1, match_id, payload=payload)
+    period.fetch_data()
+    score_flow = ScoreFlow(1, match_id, payload=payload)
+    score_flow.fetch_data()
+    match_rows, player_rows = transform.match_records(match.data)
+    return {'match': match_rows, 'player': player_rows, 'period': transform.period_records(period.data),
+            'score_flow': transform.score_flow_records(score_flow.data)}
+
+
+# Records of a match built without pandas
+def record_rows(match_id, payload, json_fields):
+    return MatchRecordParser(1, match_id, 1, 3, 2024, '3-1', lambda names: {}, json_fields, MagicMock(), payload=payload).parse()
+
+
+# Mean seconds per match and peak traced memory per match of a parse path
+def measure(parse, payloads, json_fields):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for match_id, data in payloads:
+            parse(match_id, MatchPayload(1, match_id).load(data), json_fields)
+        elapsed = (time.perf_counter() - start) / len(payloads)
+
+        peaks = []
+        retained = []
+        for match_id, data in payloads[:10]:
+            payload = MatchPayload(1, match_id).load(data)
+            tracemalloc.start()
+            rows = parse(match_id, payload, json_fields)
+            retained.append(tracemalloc.get_traced_memory()[0])
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del rows
+    return elapsed, max(peaks), sum(retained) / len(retained)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DataFrame and record match parsers per match.")
+    parser.add_argument('--matches', type=int, default=50)
+    parser.add_argument('--players', type=int, default=PLAYERS_PER_MATCH)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    fields = load_json_fields()
+    json_fields = {'match': fields['match_fields'], 'player': fields['player_fields'],
+                   'period': fields['period_fields'], 'score_flow': fields['score_flow_fields']}
+    payloads = [(100000000 + index, synthetic_payload(100000000 + index, args.players)) for index in range(args.matches)]
+
+    results = {name: measure(parse, payloads, json_fields) for name, parse in (('DataFrame', dataframe_rows), ('records', record_rows))}
+    print(f"{args.matches} matches, {args.players} players, {PERIODS} periods, {SCORES} scores per match")
+    for name, (elapsed, peak, retained) in results.items():
+        print(f"{name:>9}: {elapsed * 1000:.2f} ms/match, peak {peak / 1024:.0f} KiB, rows {retained / 1024:.0f} KiB")
+    (frame_time, frame_peak, frame_rows), (record_time, record_peak, record_rows_size) = results.values()
+    print(f"records: {frame_time / record_time:.1f}x faster, {frame_peak / record_peak:.1f}x lower peak, "
+          f"{frame_rows / record_rows_size:.1f}x smaller rows")
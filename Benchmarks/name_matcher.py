@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+from Utils.name_matcher import NameMatcher, load_player_records, similarity, first_name_similarity, fold_name, SURNAME_WEIGHT
+
+
+# Names of random players from the export with one letter dropped, doubled or swapped, as typed in payloads
+def misspelled_names(records, count, seed=0):
+    rng = random.Random(seed)
+    names = []
+    for record in rng.sample(records, count):
+        surname = record['surname']
+        position = rng.randrange(len(surname))
+        edit = rng.choice(('drop', 'double', 'swap'))
+        if edit == 'drop' and len(surname) > 3:
+            surname = surname[:position] + surname[position + 1:]
+        elif edit == 'swap' and position < len(surname) - 1:
+            surname = surname[:position] + surname[position + 1] + surname[position] + surname[position + 2:]
+        else:
+            surname = surname[:position] + surname[position] + surname[position:]
+        names.append((record['firstname'], surname, None))
+    return names
+
+
+# Best scoring playerId of a name by scoring every candidate, without the trigram index
+def linear_match(matcher, firstname, surname):
+    first, last = fold_name(firstname), fold_name(surname)
+    best_player_id, best_score = None, 0.0
+    for player_id, candidate_first, candidate_last, _ in matcher.candidates:
+        score = SURNAME_WEIGHT * similarity(last, candidate_last) + (1 - SURNAME_WEIGHT) * first_name_similarity(first, candidate_first)
+        if score > best_score:
+            best_player_id, best_score = player_id, score
+    return best_player_id, best_score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy player name matching against a full scan.")
+    parser.add_argument('--names', type=int, default=50)
+    args = parser.parse_args()
+
+    records = load_player_records()
+    start = time.perf_counter()
+    matcher = NameMatcher().add_records(records)
+    build = time.perf_counter() - start
+    names = misspelled_names(records, args.names)
+
+    start = time.perf_counter()
+    indexed = matcher.match_many(names)
+    indexed_time = time.perf_counter() - start
+    start = time.perf_counter()
+    linear = {name: linear_match(matcher, name[0], name[1]) for name in set(names)}
+    linear_time = time.perf_counter() - start
+
+    # Every name the index accepts must be the best scoring player of the full scan
+    for name, (player_id, score) in indexed.items():
+        if player_id is not None:
+            assert abs(linear[name][1] - score) < 1e-9, name
+
+    print(f"{len(matcher.candidates)} name variants indexed in {build:.3f}s")
+    print(f"{len(indexed)} misspelled names, {sum(player_id is not None for player_id, _ in indexed.values())} matched")
+    print(f"full scan: {linear_time:.3f}s")
+    print(f"trigram index: {indexed_time:.3f}s ({linear_time / indexed_time:.1f}x faster)")
@@ -0,0 +1,61 @@
+import argparse
+import contextlib
+import gc
+import io
+import logging
+import sys
+import time
+import tracemalloc
+from Benchmarks.match_records import synthetic_payload, dataframe_rows, record_rows
+from Core.MatchPayload import MatchPayload
+from Utils.JsonLoader import load_json_fields
+from Utils.table_batches import TableBatches, HAS_ARROW
+
+# Matches of a full AFL season
+SEASON_MATCHES = 216
+TABLES = ('match', 'player', 'period', 'score_flow')
+
+
+# Parsed rows of every match of a season, one dict of row lists per match
+def season_rows(parse, matches, json_fields):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(matches):
+            match_id = 100000000 + index
+            yield parse(match_id, MatchPayload(1, match_id).load(synthetic_payload(match_id)), json_fields)
+
+
+# Bytes held for the season's rows and seconds to collect them, as lists or as Arrow batches
+def collect(parse, matches, json_fields, use_arrow):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tables = {table: TableBatches(table, use_arrow) for table in TABLES}
+    for rows in season_rows(parse, matches, json_fields):
+        for table in TABLES:
+            tables[table].append(rows[table])
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    arrow_bytes = sum(batches.nbytes() for batches in tables.values()) if use_arrow else 0
+    return python_bytes + arrow_bytes, elapsed, sum(len(batches) for batches in tables.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory held between the parse and insert stages for one league.")
+    parser.add_argument('--matches', type=int, default=SEASON_MATCHES)
+    parser.add_argument('--pipeline', choices=('pandas', 'records'), default='pandas')
+    args = parser.parse_args()
+    if not HAS_ARROW:
+        sys.exit("pyarrow is not installed.")
+    logging.disable(logging.CRITICAL)
+
+    fields = load_json_fields()
+    json_fields = {'match': fields['match_fields'], 'player': fields['player_fields'],
+                   'period': fields['period_fields'], 'score_flow': fields['score_flow_fields']}
+    parse = record_rows if args.pipeline == 'records' else dataframe_rows
+    lists, lists_time, rows = collect(parse, args.matches, json_fields, use_arrow=False)
+    batches, batches_time, _ = collect(parse, args.matches, json_fields, use_arrow=True)
+    print(f"{args.matches} matches, {rows} rows ({args.pipeline} parser)")
+    print(f"   lists: {lists / 2 ** 20:.1f} MiB held, {lists_time:.2f}s")
+    print(f"   arrow: {batches / 2 ** 20:.1f} MiB held, {batches_time:.2f}s ({lists / batches:.1f}x less memory)")
@@ -1,18 +1,27 @@
-import requests
 import os
+import hashlib
 import pandas as pd
 import logging
-import re
-from Utils.sport_category import determine_sport_category
+from Utils import http_session
+from Utils.sport_category import classify_league, SPORT_IDS, LEAGUE_FILTERS_FINGERPRINT
 from Utils.sanitize_filename import sanitize_filename
+from Utils.composite_keys import composite_key
+from Utils.dtype_policy import apply_dtype_policy
 from Core.LeaguesList import League
 
+# Fixture feed of a league
+FIXTURE_URL = 'http://mc.championdata.com/data/{league_id}/fixture.json?/'
+# Version of the parsed fixture cached with the response, bump it when the parse, keys or dtype policy change
+FIXTURE_PARSE_VERSION = 1
+
 class Fixture:
     def __init__(self, league_id, fixture_id, regulation_periods, info_logger, error_logger):
         self.league_id = league_id
         self.fixture_id = fixture_id
         self.regulation_periods = regulation_periods
         self.data = pd.DataFrame()
+        self.pending = pd.DataFrame()  # Scheduled and incomplete matches, kept for the scheduler
+        self.sport = None  # SportClassification of the league, set with the completed matches
         self.info_logger = info_logger
         self.error_logger = error_logger
 
@@ -31,13 +40,28 @@ class Fixture:
         # Sanitize the league name and season
         sanitized_league_name = sanitize_filename(league_name_and_season)
         
-        url = f'http://mc.championdata.com/data/{self.league_id}/fixture.json?/'
+        url = FIXTURE_URL.format(league_id=self.league_id)
         self.info_logger.info(f"Requesting fixture data from URL: {url}")
 
-        response = requests.get(url)
+        response = http_session.get(url)
         if response.status_code != 200:
             self.error_logger.error(f"Failed to retrieve fixture data for league {self.league_id}: {response.status_code}")
             return
+
+        # Reuse the DataFrame parsed from this exact body when the feed is unchanged (cached or 304 Not Modified),
+        # by the same parse version and with the same classification inputs (league name and filtering rules)
+        classification_key = hashlib.sha1(
+            f"{league_name_and_season}|{LEAGUE_FILTERS_FINGERPRINT}".encode('utf-8')).hexdigest()[:12]
+        parsed_name = (f"fixture-{self.fixture_id}-{self.regulation_periods}"
+                       f"-v{FIXTURE_PARSE_VERSION}-{classification_key}")
+        if getattr(response, 'from_cache', False):
+            parsed = http_session.load_parsed(url, parsed_name)
+            if parsed is not None:
+                self.info_logger.info(f"Fixture data for league {self.league_id} is unchanged, reusing the parsed fixture.")
+                self.data = parsed['data']
+                self.pending = parsed['pending']
+                self.sport = parsed.get('sport')
+                return
         
         data = response.json()
         
@@ -50,81 +74,36 @@ class Fixture:
             # Filter out incomplete and scheduled matches
             if matches:
                 matches_df = pd.DataFrame(matches)
-                matches_df = matches_df[~matches_df['matchStatus'].isin(['incomplete', 'scheduled'])]  # Remove incomplete and scheduled matches
+                pending_mask = matches_df['matchStatus'].isin(['incomplete', 'scheduled'])
+                self.pending = matches_df[pending_mask].reset_index(drop=True)
+                matches_df = matches_df[~pending_mask]  # Remove incomplete and scheduled matches
     
-                # Determine sport category and ID
+                # Classify the league once; later stages reuse self.sport
                 squad_ids = pd.unique(
                     matches_df[['homeSquadId', 'awaySquadId']].values.ravel()
                 ).tolist()
-                sport_category, sport_id = determine_sport_category(
-                    self.regulation_periods, 
-                    squad_ids, 
-                    league_name_and_season,
-                    self.league_id
-                )
-                
-                # Normalize sport category
-                sport_category = sport_category.strip()
-                sport_category = re.sub(r'\s+', ' ', sport_category)
-                sport_category_lower = sport_category.lower()
-                
-                # Use the same sport_id_map as in Scraper.py
-                sport_id_map = {
-                    'afl mens': 1, 
-                    'afl womens': 2, 
-                    'nrl mens': 3, 
-                    'nrl womens': 4,
-                    'fast5 mens': 5, 
-                    'fast5 womens': 6, 
-                    'netball mens': 7,
-                    'netball womens nz': 8,
-                    'netball womens australia': 9,
-                    'netball womens international': 10,
-                    'netball unknown': 11,
-                    'nrl unknown': 12
-                }
-                
-                # Convert the sport_id_map keys to lowercase
-                sport_id_map_lower = {k.lower(): v for k, v in sport_id_map.items()}
-                
-                # Check if the sport category exists in the map
-                if sport_category_lower in sport_id_map_lower:
-                    sport_id = sport_id_map_lower[sport_category_lower]
-                    self.info_logger.info(f"Sport ID found: {sport_id} for category: '{sport_category}'")
+                self.sport = classify_league(self.league_id, self.regulation_periods, squad_ids, league_name_and_season)
+                sport_id = self.sport.sport_id
+                if sport_id is not None:
+                    self.info_logger.info(f"Sport ID found: {sport_id} for category: '{self.sport.category}'")
                 else:
-                    self.error_logger.error(f"Sport category '{sport_category}' not found in sport_id_map for league {self.league_id}.")
-                    self.error_logger.error(f"Available sport categories: {list(sport_id_map.keys())}")
-                    sport_id = None  # If the category is not in the map, log and skip to avoid failures
-                
+                    self.error_logger.error(f"Sport category '{self.sport.category}' not found in sport_id_map for league {self.league_id}.")
+                    self.error_logger.error(f"Available sport categories: {list(SPORT_IDS)}")
+
                 # Assign the sport ID to the matches_df
                 matches_df['sportId'] = sport_id
                 matches_df['fixtureId'] = self.fixture_id
 
                 # Generate uniqueFixtureId (composite of fixtureId and matchId)
-                matches_df['uniqueFixtureId'] = matches_df.apply(
-                    lambda row: f"{self.fixture_id}-{row['matchId']}" if pd.notnull(row['matchId']) else 'Unknown', axis=1
-                )
-
-                # Ensure 'uniqueFixtureId' is of string type
-                matches_df['uniqueFixtureId'] = matches_df['uniqueFixtureId'].astype(str)
-                # Replace any 'nan' strings with 'Unknown'
-                matches_df['uniqueFixtureId'] = matches_df['uniqueFixtureId'].replace('nan', 'Unknown')
+                matches_df['uniqueFixtureId'] = composite_key(self.fixture_id, matches_df['matchId'])
 
                 # Log missing match IDs
                 if matches_df['uniqueFixtureId'].str.contains('Unknown').any():
                     self.error_logger.warning(f"Some matches in league {self.league_id} are missing matchId, setting 'uniqueFixtureId' to 'Unknown'.")
 
                 # Generate unique squad IDs for home and away squads
-                matches_df['uniqueHomeSquadId'] = matches_df.apply(
-                    lambda row: f"{row['homeSquadId']}-{row['homeSquadName']}" if pd.notnull(row['homeSquadId']) and pd.notnull(row['homeSquadName']) else 'Unknown', axis=1
-                )
-                matches_df['uniqueAwaySquadId'] = matches_df.apply(
-                    lambda row: f"{row['awaySquadId']}-{row['awaySquadName']}" if pd.notnull(row['awaySquadId']) and pd.notnull(row['awaySquadName']) else 'Unknown', axis=1
-                )
-
-                # Ensure 'uniqueHomeSquadId' and 'uniqueAwaySquadId' are of string type
-                matches_df['uniqueHomeSquadId'] = matches_df['uniqueHomeSquadId'].astype(str).replace('nan', 'Unknown')
-                matches_df['uniqueAwaySquadId'] = matches_df['uniqueAwaySquadId'].astype(str).replace('nan', 'Unknown')
+                matches_df['uniqueHomeSquadId'] = composite_key(matches_df['homeSquadId'], matches_df['homeSquadName'])
+                matches_df['uniqueAwaySquadId'] = composite_key(matches_df['awaySquadId'], matches_df['awaySquadName'])
 
                 # Log missing squad IDs
                 if matches_df['uniqueHomeSquadId'].str.contains('Unknown').any():
@@ -132,8 +111,11 @@ class Fixture:
                 if matches_df['uniqueAwaySquadId'].str.contains('Unknown').any():
                     self.error_logger.warning(f"Some matches in league {self.league_id} are missing awaySquadId or awaySquadName.")
 
-                # Assign the processed data to self.data
+                # Assign the processed data to self.data, with compact dtypes for the repeated names and codes
+                matches_df = apply_dtype_policy(matches_df)
+                self.pending = apply_dtype_policy(self.pending)
                 self.data = matches_df
+                http_session.save_parsed(url, parsed_name, {'data': matches_df, 'pending': self.pending, 'sport': self.sport})
             else:
                 self.error_logger.error(f"No match data found for league {self.league_id}.")
         else:
@@ -1,10 +1,14 @@
 import re
 import os
 import pandas as pd
-import requests
 import logging
+from Utils import http_session
 from Utils.sanitize_filename import sanitize_filename  
 
+# Version of the parsed leagues cached with the response, bump it when their parse changes
+LEAGUES_PARSE_VERSION = 1
+PARSED_NAME = f"leagues-v{LEAGUES_PARSE_VERSION}"
+
 class League:
     league_info = {}
     
@@ -13,11 +17,19 @@ class League:
     def fetch_leagues(cls):
         url = 'http://mc.championdata.com/data/competitions.json'
         logging.info(f"Fetching leagues from {url}")
-        response = requests.get(url)
+        response = http_session.get(url)
     
         if response.status_code != 200:
             logging.error(f"Failed to retrieve data: {response.status_code}")
             return pd.DataFrame(), pd.DataFrame()
+
+        # Reuse the leagues parsed from this exact body when the list is unchanged (cached or 304 Not Modified)
+        if getattr(response, 'from_cache', False):
+            leagues_df = http_session.load_parsed(url, PARSED_NAME)
+            if leagues_df is not None:
+                logging.info("Competitions list is unchanged, reusing the parsed leagues.")
+                cls.league_info = leagues_df.set_index('id')['league_season'].to_dict()
+                return leagues_df, leagues_df[['id', 'league_season', 'season']].drop_duplicates()
         
         # Parse the JSON response
         try:
@@ -43,6 +55,7 @@ class League:
         # Store the league info in a class-level dictionary
         logging.info("Storing league info in class-level dictionary.")
         cls.league_info = leagues_df.set_index('id')['league_season'].to_dict()
+        http_session.save_parsed(url, PARSED_NAME, leagues_df)
     
         # Return the full DataFrame and a simplified one with only relevant columns
         return leagues_df, leagues_df[['id', 'league_season', 'season']].drop_duplicates()
@@ -0,0 +1,240 @@
+import logging
+import threading
+import traceback
+import pandas as pd
+from mysql.connector import Error as mysql_error
+from Core.FixtureDetails import Fixture, FIXTURE_URL
+from Core.MatchPayload import MatchPayload
+from Utils import http_session
+from Utils.scrape_ledger import fingerprint_row
+
+# Seconds between two polls of the in-progress matches
+LIVE_POLL_INTERVAL = 30
+
+# Fields identifying a row of each kind across polls
+ROW_KEYS = {
+    'sport': ('uniqueSportId',),
+    'squad': ('uniqueSquadId',),
+    'player': ('uniquePlayerId',),
+    'fixture': ('uniqueFixtureId',),
+    'match': ('uniqueMatchId',),
+    'period': ('uniquePeriodId', 'uniquePlayerId'),
+    'score_flow': ('scoreFlowId',),
+}
+
+
+# Key of a row across polls
+def row_key(row, key_fields):
+    return tuple(str(row.get(field)) for field in key_fields)
+
+
+# Rows that are new or changed since the previous poll
+def changed_rows(rows, previous, key_fields):
+    """
+    Returns the rows whose key is not in `previous` or whose fingerprint differs,
+    plus the fingerprints of those rows to merge into `previous` once they are stored.
+    """
+    changed = []
+    fingerprints = {}
+    for row in rows:
+        key = row_key(row, key_fields)
+        fingerprint = fingerprint_row(row)
+        if previous.get(key) != fingerprint and fingerprints.get(key) != fingerprint:
+            changed.append(row)
+            fingerprints[key] = fingerprint
+    return changed, fingerprints
+
+
+class LivePoller:
+    """
+    Polls the in-progress matches of a set of leagues and upserts only the rows that changed since the previous poll.
+    Matches are followed until the fixture reports them complete; the final state is written and the match is dropped.
+    """
+    def __init__(self, scraper, leagues, poll_interval=LIVE_POLL_INTERVAL):
+        self.scraper = scraper
+        self.leagues = [league for _, league in leagues.iterrows()] if isinstance(leagues, pd.DataFrame) else list(leagues)
+        self.poll_interval = poll_interval
+
+        self.snapshots = {kind: {} for kind in ROW_KEYS}
+        self.match_snapshot_keys = {}  # (league ID, matchId) -> (kind, key) of its rows in the snapshots
+        self.payload_fingerprints = {}
+        self.live_matches = set()
+        self.sports = {}
+        self._stop = threading.Event()
+
+    # Poll every league once; returns the number of rows upserted
+    def poll(self):
+        upserted = 0
+        for league in self.leagues:
+            try:
+                upserted += self.poll_league(league)
+            except Exception as e:
+                # A network error that outlasted the HTTP retries: the league is polled again next time
+                logging.error(f"Error polling league {league['id']}, retrying next poll: {e}")
+        return upserted
+
+    # Poll the in-progress matches of a league and upsert what changed
+    def poll_league(self, league):
+        league_id = league['id']
+        fixture_id = league['id']
+
+        # The cached fixture would hide status changes for up to FIXTURE_TTL, so always revalidate it
+        http_session.expire(FIXTURE_URL.format(league_id=league_id))
+        fixture = Fixture(league_id, fixture_id, league['regulationPeriods'],
+                          self.scraper.info_logger, self.scraper.error_logger)
+        fixture.fetch_data()
+
+        # In-progress matches, plus the ones that finished since the last poll for a final update
+        match_rows = []
+        if not fixture.pending.empty:
+            match_rows.extend(row for _, row in fixture.pending[fixture.pending['matchStatus'] == 'incomplete'].iterrows())
+        if not fixture.data.empty:
+            match_rows.extend(row for _, row in fixture.data.iterrows() if (league_id, row['matchId']) in self.live_matches)
+        if not match_rows:
+            return 0
+
+        # Classify the league once, from the completed matches when there are any
+        if league_id not in self.sports:
+            classified_rows = fixture.data if not fixture.data.empty else pd.DataFrame(match_rows)
+            self.sports[league_id] = self.scraper.resolve_sport(league, classified_rows)
+        sport_category, sport_id, fixture_year = self.sports[league_id]
+        sport_info_data = self.scraper.sport_info_row(
+            sport_id, sport_category, fixture_id, league['league_season'], fixture_year)
+
+        rows = {kind: [] for kind in ROW_KEYS}
+        rows['sport'].append(sport_info_data)
+        payload_fingerprints = {}
+        finished = []
+        for match_row in match_rows:
+            match_id = match_row['matchId']
+            fixture_data, squad_rows = self.scraper.fixture_rows(
+                match_row, fixture_id, sport_id, sport_info_data, set())
+            rows['fixture'].append(fixture_data)
+            rows['squad'].extend(squad_rows)
+
+            payload = MatchPayload(league_id, match_id)
+            try:
+                fetched = payload.fetch_data()
+            except Exception as e:
+                logging.error(f"Error fetching live match {match_id} in league {league_id}: {e}")
+                fetched = False
+            if not fetched:
+                logging.warning(f"Could not fetch live match {match_id} in league {league_id}, retrying next poll.")
+                continue  # A finished match stays live until its final state is fetched
+            if match_row['matchStatus'] not in ['scheduled', 'incomplete']:
+                finished.append(match_row)
+            if payload.fingerprint is not None and payload.fingerprint == self.payload_fingerprints.get((league_id, match_id)):
+                continue  # Nothing happened since the previous poll
+            payload_fingerprints[(league_id, match_id)] = payload.fingerprint
+
+            match_rows_by_kind = self.scraper.match_rows(
+                league_id, match_id, fixture_id, sport_id, fixture_year, sport_info_data, payload)
+            if match_rows_by_kind is None:
+                continue
+            for kind, kind_rows in match_rows_by_kind.items():
+                rows[kind].extend(kind_rows)
+
+        deltas = {}
+        fingerprints = {}
+        for kind, key_fields in ROW_KEYS.items():
+            deltas[kind], fingerprints[kind] = changed_rows(rows[kind], self.snapshots[kind], key_fields)
+
+        failed = self._upsert(sport_category.lower().replace(' ', '_'), deltas, fixture_id)
+        if failed is None:
+            return 0
+
+        # Rows that could not be written are left out of the snapshots, and the payloads of their matches are
+        # parsed again next poll, so they are retried until they are stored; a failed shared row (sport, squad,
+        # player) holds every match of the poll
+        failed_match_ids = set()
+        shared_rows_failed = False
+        for kind, key_fields in ROW_KEYS.items():
+            for row, _ in failed.get(kind, ()):
+                fingerprints[kind].pop(row_key(row, key_fields), None)
+                if row.get('matchId') is None:
+                    shared_rows_failed = True
+                else:
+                    failed_match_ids.add(str(row.get('matchId')))
+
+        def stored(match_id):
+            return not shared_rows_failed and str(match_id) not in failed_match_ids
+
+        # Only remember what was actually stored, so a failed poll is retried in full
+        for kind, key_fields in ROW_KEYS.items():
+            self.snapshots[kind].update(fingerprints[kind])
+            for row in deltas[kind]:
+                key = row_key(row, key_fields)
+                if row.get('matchId') is not None and key in fingerprints[kind]:
+                    self.match_snapshot_keys.setdefault((league_id, str(row.get('matchId'))), set()).add((kind, key))
+        self.payload_fingerprints.update((key, fingerprint) for key, fingerprint in payload_fingerprints.items()
+                                         if stored(key[1]))
+        for match_row in match_rows:
+            self.live_matches.add((league_id, match_row['matchId']))
+        for match_row in finished:
+            if stored(match_row['matchId']):
+                self._finish(league_id, match_row)
+            else:
+                logging.warning(f"Match {match_row['matchId']} in league {league_id} is {match_row['matchStatus']} "
+                                f"but some of its rows could not be written, polling it again.")
+
+        upserted = sum(len(kind_rows) for kind_rows in deltas.values()) - sum(map(len, failed.values()))
+        logging.info(f"Live poll of league {league_id}: {len(match_rows)} matches, {upserted} rows upserted "
+                     f"({len(deltas['score_flow'])} score flow, {len(deltas['period'])} period).")
+        return upserted
+
+    # Upsert the changed rows of a poll in one transaction, in foreign key order
+    def _upsert(self, table_prefix, deltas, fixture_id):
+        """Returns {kind: (row, error) pairs that could not be written}, or None if the transaction failed."""
+        scraper = self.scraper
+        if not any(deltas.values()):
+            return {}
+        tables = [
+            ('sport', 'sport_info', scraper.sport_fields, 'uniqueSportId'),
+            ('squad', 'squad_info', scraper.squad_fields, 'squadId'),
+            ('player', 'player_info', scraper.player_fields, 'playerId'),
+            ('fixture', f"{table_prefix}_fixture", scraper.fixture_fields, 'uniqueFixtureId'),
+            ('match', f"{table_prefix}_match", scraper.match_fields, 'uniqueMatchId'),
+            ('period', f"{table_prefix}_period", scraper.period_fields, 'uniquePeriodId'),
+            ('score_flow', f"{table_prefix}_score_flow", scraper.score_flow_fields, 'scoreFlowId'),
+        ]
+        try:
+            scraper.connection.start_transaction()
+            failed = {}
+            for kind, table_name, json_fields, id_field in tables:
+                failed[kind] = scraper.insert_rows(table_name, deltas[kind], json_fields, id_field)
+            scraper.connection.commit()
+            return failed
+        except mysql_error as err:
+            scraper.error_logger.error(f"MySQL error during live upsert for fixtureId: {fixture_id}. Error: {err}")
+            scraper.connection.rollback()
+            return None
+        except Exception as e:
+            scraper.error_logger.error(f"Unexpected error during live upsert for fixtureId: {fixture_id}. Error: {e}")
+            scraper.error_logger.error(f"Traceback: {traceback.format_exc()}")
+            scraper.connection.rollback()
+            return None
+
+    # Stop following a match once its final state is stored
+    def _finish(self, league_id, match_row):
+        match_id = match_row['matchId']
+        self.live_matches.discard((league_id, match_id))
+        fingerprint = self.payload_fingerprints.pop((league_id, match_id), None)
+        # Its rows are not polled again, so their snapshots are dropped (the shared squad, player and sport rows are kept)
+        for kind, key in self.match_snapshot_keys.pop((league_id, str(match_id)), ()):
+            self.snapshots[kind].pop(key, None)
+        if self.scraper.ledger is not None:
+            self.scraper.ledger.record(league_id, match_id, match_row['matchStatus'], fingerprint_row(match_row),
+                                       fingerprint)
+            self.scraper.ledger.save()
+        logging.info(f"Match {match_id} in league {league_id} is {match_row['matchStatus']}, no longer polling it.")
+
+    def stop(self):
+        self._stop.set()
+
+    # Poll until stop() is called, or until no match is live when stop_when_idle is set
+    def run(self, stop_when_idle=False):
+        while not self._stop.is_set():
+            self.poll()
+            if stop_when_idle and not self.live_matches:
+                break
+            self._stop.wait(self.poll_interval)
@@ -1,51 +1,49 @@
-import requests
 import pandas as pd
 import numpy as np
 import logging
 from Utils.sanitize_filename import sanitize_filename
 from Core.LeaguesList import League
+from Core.MatchPayload import MatchPayload
+from Utils.composite_keys import composite_key
+from Utils.dtype_policy import apply_dtype_policy
 
 class Match:
-    def __init__(self, league_id, match_id, fixture_id, sport_id, fixture_year):
+    def __init__(self, league_id, match_id, fixture_id, sport_id, fixture_year, payload=None):
         self.league_id = league_id
         self.match_id = match_id
         self.fixture_id = fixture_id
         self.sport_id = sport_id
         self.data = pd.DataFrame()
         self.fixture_year = fixture_year
+        self.payload = payload or MatchPayload(league_id, match_id)
 
     def fetch_data(self):
         league_name_and_season = League.get_league_name_and_season(self.league_id)
         league_name_and_season = sanitize_filename(league_name_and_season)
-    
-        url = f'https://mc.championdata.com/data/{self.league_id}/{self.match_id}.json'
-        response = requests.get(url)
-        
-        if response.status_code != 200:
-            logging.error(f"Failed to retrieve data for match {self.match_id} in league {self.league_id}: {response.status_code}")
-            print(f"Failed to retrieve data for match {self.match_id} in league {self.league_id}: {response.status_code}")
+
+        # Fetch the shared match payload (no-op if another parser already fetched it)
+        if not self.payload.ensure_fetched():
             return
     
-        data = response.json()
+        match_stats = self.payload.match_stats
         
         # Check if the data contains player stats
-        if ('matchStats' in data and isinstance(data['matchStats'], dict) and
-            'playerStats' in data['matchStats'] and isinstance(data['matchStats']['playerStats'], dict) and
-            'player' in data['matchStats']['playerStats']):
+        if self.payload.player_stats is not None:
             
-            # Create DataFrames for player stats, team info, and player info
-            box = pd.DataFrame(data['matchStats']['playerStats']['player'])
-            teams = pd.DataFrame(data['matchStats']['teamInfo']['team'])
-            players = pd.DataFrame(data['matchStats']['playerInfo']['player'])
+            # Create DataFrames for player stats and team info, and reuse the shared player info
+            box = pd.DataFrame(self.payload.player_stats)
+            teams = pd.DataFrame(match_stats['teamInfo']['team'])
+            players = self.payload.player_info
     
             # Merge player stats with player info based on 'playerId' to include 'firstname' and 'surname'
-            box = pd.merge(box, players[['playerId', 'firstname', 'surname', 'displayName', 'shortDisplayName']], how='left', on='playerId')
+            if not players.empty:
+                box = pd.merge(box, players, how='left', on='playerId')
             # Merge with team info based on 'squadId'
             box = pd.merge(box, teams[['squadId', 'squadName']], how='left', on='squadId')
     
             # Extract home and away team information
-            home_id = data['matchStats']['matchInfo']['homeSquadId']
-            away_id = data['matchStats']['matchInfo']['awaySquadId']
+            home_id = match_stats['matchInfo']['homeSquadId']
+            away_id = match_stats['matchInfo']['awaySquadId']
             home = teams.loc[teams['squadId'] == home_id, 'squadName'].iloc[0] if not teams.empty else "Unknown Home Team"
             away = teams.loc[teams['squadId'] == away_id, 'squadName'].iloc[0] if not teams.empty else "Unknown Away Team"
     
@@ -53,7 +51,7 @@ class Match:
             box['homeId'] = home_id
             box['awayId'] = away_id
             box['opponent'] = np.where(box['squadId'] == home_id, away, home)
-            box['round'] = data['matchStats']['matchInfo']['roundNumber']
+            box['round'] = match_stats['matchInfo']['roundNumber']
             box['fixtureId'] = self.fixture_id
             box['sportId'] = self.sport_id
             box['matchId'] = self.match_id
@@ -65,10 +63,10 @@ class Match:
                 print(f"Missing playerId for some rows in match {self.match_id}. Continuing anyway.")
 
             # Generate Unique Player ID
-            box['uniquePlayerId'] = box.apply(lambda row: f"{row['playerId']}-{row['squadId']}" if pd.notnull(row['playerId']) and pd.notnull(row['squadId']) else 'Unknown', axis=1)
+            box['uniquePlayerId'] = composite_key(box['playerId'], box['squadId'])
 
             # Generate Unique Match ID (Composite Key)
-            box['uniqueMatchId'] = box.apply(lambda row: f"{row['matchId']}-{row['playerId']}" if pd.notnull(row['matchId']) and pd.notnull(row['playerId']) else 'Unknown', axis=1)
+            box['uniqueMatchId'] = composite_key(box['matchId'], box['playerId'])
             
             # Remove unwanted columns if necessary
             box = box.drop(columns=['squadNickname', 'squadCode'], errors='ignore')
@@ -81,8 +79,8 @@ class Match:
     
             print(f"Match data inserted for ID:  {self.match_id}")
     
-            # Store processed data
-            self.data = box
+            # Store processed data, with compact dtypes for the repeated names and stats
+            self.data = apply_dtype_policy(box)
         else:
             logging.error(f"Player stats not found or incomplete for match {self.match_id} in league {self.league_id}.")
             print(f"Player stats not found or incomplete for match {self.match_id} in league {self.league_id}. Skipping this match.")
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from Core.MatchPayload import MatchPayload
+
+# Default number of match payloads downloaded at the same time
+DEFAULT_CONCURRENCY = 8
+
+class MatchFetcher:
+    """
+    Asyncio fetch engine for match payloads.
+    Downloads many matches in parallel, with at most `concurrency` requests in flight at once.
+    """
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.concurrency = concurrency
+
+    # Fetch a single payload while holding a slot of the semaphore
+    async def _fetch_one(self, semaphore, executor, payload):
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            try:
+                await loop.run_in_executor(executor, payload.fetch_data)
+            except Exception as e:
+                # Leave the payload unfetched so the parse stage can retry it on its own
+                logging.error(f"Error fetching match {payload.match_id} in league {payload.league_id}: {e}")
+        return payload
+
+    # Fetch payloads for a list of (league_id, match_id) pairs, possibly across leagues
+    async def fetch_async(self, match_keys):
+        payloads = {}
+        for league_id, match_id in match_keys:
+            if (league_id, match_id) not in payloads:
+                payloads[(league_id, match_id)] = MatchPayload(league_id, match_id)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            await asyncio.gather(*(self._fetch_one(semaphore, executor, payload) for payload in payloads.values()))
+
+        logging.info(f"Fetched {len(payloads)} match payloads with concurrency {self.concurrency}.")
+        return payloads
+
+    # Blocking entry point for callers that are not running an event loop
+    def fetch(self, match_keys):
+        return asyncio.run(self.fetch_async(match_keys))
+
+    # Fetch every payload of a single league, keyed by match ID
+    def fetch_league(self, league_id, match_ids):
+        payloads = self.fetch([(league_id, match_id) for match_id in match_ids])
+        return {match_id: payload for (_, match_id), payload in payloads.items()}
@@ -0,0 +1,102 @@
+import pandas as pd
+import logging
+from Utils import http_session
+from Utils.scrape_ledger import fingerprint_bytes
+
+# Player info columns merged into the match, period and score flow data
+PLAYER_INFO_COLUMNS = ['playerId', 'firstname', 'surname', 'displayName', 'shortDisplayName']
+
+class MatchPayload:
+    """
+    Raw Champion Data payload for a single match.
+    The match JSON is downloaded and decoded once, then shared by Match, PeriodData and ScoreFlow.
+    """
+    def __init__(self, league_id, match_id):
+        self.league_id = league_id
+        self.match_id = match_id
+        self.data = {}
+        self.status_code = None
+        self.fetched = False
+        self.fingerprint = None
+        self._player_info = None
+
+    # Fetch the match JSON from the Champion Data API
+    def fetch_data(self):
+        url = f'https://mc.championdata.com/data/{self.league_id}/{self.match_id}.json'
+        logging.info(f"Fetching match payload for match {self.match_id} in league {self.league_id}")
+        response = http_session.get(url)
+        self.fetched = True
+
+        if response.status_code != 200:
+            self.status_code = response.status_code
+            logging.error(f"Failed to retrieve data for match {self.match_id} in league {self.league_id}: {response.status_code}")
+            print(f"Failed to retrieve data for match {self.match_id} in league {self.league_id}: {response.status_code}")
+            return False
+
+        # A body that does not decode is a failed fetch, the payload is left without a status code
+        try:
+            data = response.json()
+        except ValueError as e:
+            logging.error(f"Invalid JSON for match {self.match_id} in league {self.league_id}: {e}")
+            print(f"Invalid JSON for match {self.match_id} in league {self.league_id}: {e}")
+            return False
+
+        self.load(data)
+        self.fingerprint = fingerprint_bytes(response.content) if isinstance(response.content, bytes) else None
+        return True
+
+    # Load an already decoded match JSON
+    def load(self, data):
+        self.data = data if isinstance(data, dict) else {}
+        self.status_code = 200
+        self.fetched = True
+        self.fingerprint = None
+        self._player_info = None
+        return self
+
+    # Fetch the payload on first use so it can be handed to the parsers unfetched
+    def ensure_fetched(self):
+        if not self.fetched:
+            return self.fetch_data()
+        return self.status_code == 200
+
+    @property
+    def match_stats(self):
+        match_stats = self.data.get('matchStats', {})
+        return match_stats if isinstance(match_stats, dict) else {}
+
+    @property
+    def match_info(self):
+        return self.match_stats.get('matchInfo', {})
+
+    @property
+    def team_info(self):
+        return self.match_stats.get('teamInfo', {}).get('team', [])
+
+    @property
+    def player_stats(self):
+        player_stats = self.match_stats.get('playerStats')
+        if isinstance(player_stats, dict):
+            return player_stats.get('player')
+        return None
+
+    @property
+    def player_period_stats(self):
+        return self.match_stats.get('playerPeriodStats', {}).get('player', [])
+
+    @property
+    def score_flow(self):
+        return self.match_stats.get('scoreFlow', {}).get('score', [])
+
+    # Player info DataFrame, built once and reused by every parser
+    @property
+    def player_info(self):
+        if self._player_info is None:
+            players = self.match_stats.get('playerInfo', {}).get('player', [])
+            if players:
+                players_df = pd.DataFrame(players)
+                columns = [column for column in PLAYER_INFO_COLUMNS if column in players_df.columns]
+                self._player_info = players_df[columns] if 'playerId' in columns else pd.DataFrame()
+            else:
+                self._player_info = pd.DataFrame()
+        return self._player_info
@@ -0,0 +1,337 @@
+import logging
+from collections import namedtuple
+from Core.MatchPayload import MatchPayload, PLAYER_INFO_COLUMNS
+from Core.MatchTransform import UNKNOWN_SQUAD
+from Utils.composite_keys import MISSING_KEY
+
+# Match payload parsers: DataFrames (Match, PeriodData, ScoreFlow and MatchTransform) or MatchRecordParser
+PIPELINES = ('pandas', 'records')
+
+# Columns of the player stats that are not stored with the match rows
+DROPPED_MATCH_COLUMNS = ('squadNickname', 'squadCode')
+
+# Record types already built, keyed by (type name, fields)
+_RECORD_TYPES = {}
+
+
+# Mapping-style access for record tuples, so they can be used where row dicts are expected
+class RecordMixin:
+    __slots__ = ()
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, field):
+        return field in self._fields
+
+
+# Named tuple type with one slot per field of a table's field spec, missing fields default to None
+def record_type(name, fields):
+    """
+    Fields follow the order of the spec (required then optional fields, duplicates dropped), so a record
+    is the tuple of values to insert for that spec. Records support get(), keys() and ['field'] like row dicts.
+    """
+    fields = tuple(dict.fromkeys(fields))
+    key = (name, fields)
+    if key not in _RECORD_TYPES:
+        base = namedtuple(f"{name}Base", fields, defaults=(None,) * len(fields))
+        _RECORD_TYPES[key] = type(name, (RecordMixin, base), {'__slots__': ()})
+    return _RECORD_TYPES[key]
+
+
+# Fields of a table's JSON field spec ('required_fields' then 'optional_fields'), without duplicates
+def spec_fields(json_fields):
+    return tuple(dict.fromkeys(json_fields.get('required_fields', []) + json_fields.get('optional_fields', [])))
+
+
+# Records of a list of row dicts, typed on the spec fields that at least one row has
+def build_records(name, fields, rows):
+    """
+    Sport specific stats make most of a spec absent from any one match, so the record type only has the
+    fields present in the rows; get() returns None for the others, as it does for a missing dict key.
+    """
+    present = set().union(*rows) if rows else set()
+    record = record_type(name, [field for field in fields if field in present])
+    return [record._make([row.get(field) for field in record._fields]) for row in rows]
+
+
+# Text of an ID value as the DataFrame path writes it, with MISSING_KEY for a missing value
+def id_text(value):
+    return MISSING_KEY if value is None else str(value)
+
+
+# Stripped name, or the default for anything that is not a string
+def clean_name(value, default=''):
+    return value.strip() if isinstance(value, str) else default
+
+
+class MatchRecordParser:
+    """
+    Pandas-free alternative to Match, PeriodData, ScoreFlow and MatchTransform for one match.
+    Player info and squad names are joined with dicts keyed on playerId and squadId, and the rows of each table
+    are returned as records of its field spec (see build_records), so fields no table stores are not kept.
+    Produces the same values for the stored fields as the DataFrame path.
+    """
+    def __init__(self, league_id, match_id, fixture_id, sport_id, fixture_year, unique_sport_id,
+                 resolve_player_ids, json_fields, error_logger=None, payload=None):
+        self.league_id = league_id
+        self.match_id = match_id
+        self.match_text = str(match_id)
+        self.fixture_id = fixture_id
+        self.sport_id = sport_id
+        self.fixture_year = fixture_year
+        self.unique_sport_id = unique_sport_id
+        self.unique_fixture_id = f"{fixture_id}-{match_id}"
+        self.resolve_player_ids = resolve_player_ids
+        self.error_logger = error_logger or logging.getLogger(__name__)
+        self.payload = payload or MatchPayload(league_id, match_id)
+        self.match_fields = spec_fields(json_fields['match'])
+        self.player_fields = spec_fields(json_fields['player'])
+        self.period_fields = spec_fields(json_fields['period'])
+        self.score_flow_fields = spec_fields(json_fields['score_flow'])
+        self.processed_unique_match_ids = set()
+        self._found_player_ids = {}
+        self._players_by_id = None
+        self.player_info_columns = set()
+
+    # Match, player, period and score flow records of the match, or None if the match has no usable data
+    def parse(self):
+        """
+        Returns a dict of record lists keyed by 'match', 'player', 'period' and 'score_flow',
+        like Scraper.match_rows.
+        """
+        if not self.payload.ensure_fetched():
+            return None
+        player_stats = self.payload.player_stats
+        if not player_stats:
+            self.error_logger.warning(f"Match data is empty for matchId: {self.match_id}, leagueId: {self.league_id}.")
+            return None
+        if not self.players_by_id():
+            self.error_logger.error(f"'firstname' or 'surname' not found in match data for matchId: {self.match_id}. Skipping match.")
+            return None
+
+        match_records, player_records = self.match_records(player_stats)
+        return {
+            'match': match_records,
+            'player': player_records,
+            'period': self.period_records(self.payload.player_period_stats),
+            'score_flow': self.score_flow_records(self.payload.score_flow),
+        }
+
+    # Player info of the payload keyed by playerId (a list per id, as a left merge repeats rows for duplicates)
+    def players_by_id(self):
+        if self._players_by_id is None:
+            self._players_by_id = {}
+            for player in self.payload.match_stats.get('playerInfo', {}).get('player', []):
+                if 'playerId' in player:
+                    info = {column: player.get(column) for column in PLAYER_INFO_COLUMNS[1:] if column in player}
+                    self.player_info_columns.update(info)
+                    self._players_by_id.setdefault(player['playerId'], []).append(info)
+        return self._players_by_id
+
+    # Rows of a payload list joined with the player info on playerId
+    def _with_player_info(self, rows):
+        players_by_id = self.players_by_id()
+        for row in rows:
+            for info in players_by_id.get(row.get('playerId'), ({},)):
+                yield {**row, **info}
+
+    # Squad names of the payload keyed by squadId (the first name given for each squad)
+    def squad_names(self):
+        squad_names = {}
+        for team in self.payload.team_info:
+            squad_names.setdefault(team.get('squadId'), team.get('squadName'))
+        return squad_names
+
+    # Name key a row is resolved by, or None if its playerId is usable
+    @staticmethod
+    def _name_key(row, player_id, squad_name):
+        if player_id == '0' or not player_id.isdigit():
+            return clean_name(row.get('firstname')), clean_name(row.get('surname')), squad_name
+        return None
+
+    # Names of the rows that are resolved by name, so the names of every match of a league can be resolved at once
+    def player_names(self):
+        if not self.payload.ensure_fetched():
+            return []
+        squad_names = self.squad_names()
+        names = []
+        for rows, squads in ((self.payload.player_stats or [], squad_names),
+                             (self.payload.player_period_stats, None), (self.payload.score_flow, None)):
+            for row in self._with_player_info(rows):
+                squad_name = clean_name(squads.get(row.get('squadId')), UNKNOWN_SQUAD) if squads is not None else ''
+                name_key = self._name_key(row, id_text(row.get('playerId')), squad_name)
+                if name_key is not None and name_key[0] and name_key[1]:
+                    names.append(name_key)
+        return list(dict.fromkeys(names))
+
+    # playerId of each row, resolving missing or invalid ones by name; rows that cannot be resolved are dropped
+    def _resolve_players(self, rows, label, squad_names=None):
+        """
+        Returns (row, playerId, squadId, squadName) tuples for the rows that have a usable playerId, in payload order.
+        squad_names maps squadId to squadName; without it the rows have no squad name (as in the period
+        and score flow data).
+        """
+        entries = []
+        invalid = 0
+        unnamed = 0
+        for row in rows:
+            player_id = id_text(row.get('playerId'))
+            squad_id = id_text(row.get('squadId'))
+            squad_name = clean_name(squad_names.get(row.get('squadId')), UNKNOWN_SQUAD) if squad_names is not None else ''
+            name_key = self._name_key(row, player_id, squad_name)
+            if name_key is not None:
+                invalid += 1
+                if not (name_key[0] and name_key[1]):
+                    unnamed += 1
+                    continue
+            entries.append((row, player_id, squad_id, squad_name, name_key))
+        if not invalid:
+            return [entry[:4] for entry in entries]
+
+        self.error_logger.warning(f"{invalid} rows with an invalid or missing playerId in {label} for match {self.match_text}.")
+        if unnamed:
+            self.error_logger.warning(f"Missing firstname or surname for {unnamed} players in {label} for match {self.match_text}. Skipping those rows.")
+
+        # Resolve every name not seen yet in this match at once
+        new_keys = [name_key for name_key in dict.fromkeys(entry[4] for entry in entries if entry[4] is not None)
+                    if name_key not in self._found_player_ids]
+        if new_keys:
+            self._found_player_ids.update(self.resolve_player_ids(new_keys))
+
+        resolved = []
+        for row, player_id, squad_id, squad_name, name_key in entries:
+            if name_key is not None:
+                found_player_id = self._found_player_ids.get(name_key)
+                if not found_player_id:
+                    self.error_logger.warning(f"Could not find playerId for {name_key[0]} {name_key[1]} in {label} for match {self.match_text}. Skipping row.")
+                    continue
+                player_id = str(found_player_id)
+            resolved.append((row, player_id, squad_id, squad_name))
+        return resolved
+
+    # Match records and the player records derived from them
+    def match_records(self, player_stats):
+        match_info = self.payload.match_info
+        squad_names = self.squad_names()
+        home_id = match_info.get('homeSquadId')
+        away_id = match_info.get('awaySquadId')
+        home = squad_names.get(home_id, "Unknown Home Team")
+        away = squad_names.get(away_id, "Unknown Away Team")
+        common = {
+            'homeId': home_id,
+            'awayId': away_id,
+            'round': match_info.get('roundNumber'),
+            'fixtureId': self.fixture_id,
+            'sportId': self.sport_id,
+            'matchId': self.match_text,
+            'fixtureYear': self.fixture_year,
+            'uniqueSportId': self.unique_sport_id,
+            'uniqueFixtureId': self.unique_fixture_id,
+        }
+
+        match_records = []
+        player_records = []
+        rows = self._with_player_info(player_stats)
+        for row, player_id, squad_id, squad_name in self._resolve_players(rows, 'match data', squad_names):
+            unique_player_id = f"{player_id}-{squad_id}"
+            unique_match_id = f"{self.match_text}-{player_id}"
+            unique_squad_id = f"{squad_id}-{squad_name}"
+            self.processed_unique_match_ids.add(unique_match_id)
+            values = {column: value for column, value in row.items() if column not in DROPPED_MATCH_COLUMNS}
+            values.update(common)
+            values.update({
+                'opponent': away if row.get('squadId') == home_id else home,
+                'playerId': player_id,
+                'squadId': squad_id,
+                'squadName': squad_name,
+                'uniquePlayerId': unique_player_id,
+                'uniqueMatchId': unique_match_id,
+                'uniqueSquadId': unique_squad_id,
+            })
+            match_records.append(values)
+            player_records.append({
+                'playerId': player_id,
+                'firstname': clean_name(row.get('firstname')) or 'Unknown',
+                'surname': clean_name(row.get('surname')) or 'Unknown',
+                'displayName': row.get('displayName') if 'displayName' in self.player_info_columns else 'Unknown',
+                'shortDisplayName': row.get('shortDisplayName') if 'shortDisplayName' in self.player_info_columns else 'Unknown',
+                'squadName': squad_name,
+                'squadId': squad_id,
+                'sportId': self.sport_id,
+                'uniqueSquadId': unique_squad_id,
+                'uniquePlayerId': unique_player_id,
+            })
+        print(f"Collected {len(match_records)} match records for match {self.match_text}.")
+        return (build_records('MatchRecord', self.match_fields, match_records),
+                build_records('PlayerRecord', self.player_fields, player_records))
+
+    # Period records of players that have a match record
+    def period_records(self, player_period_stats):
+        records = []
+        rows = self._with_player_info(player_period_stats)
+        for row, player_id, squad_id, squad_name in self._resolve_players(rows, 'period data'):
+            unique_match_id = self._match_row_id(player_id, 'period data')
+            if unique_match_id is None:
+                continue
+            period_id = f"{self.match_text}_{id_text(row.get('period'))}"
+            values = dict(row)
+            values.update({
+                'matchId': self.match_text,
+                'playerId': player_id,
+                'uniquePlayerId': f"{player_id}-{squad_id}",
+                'uniqueMatchId': unique_match_id,
+                'uniqueSquadId': f"{squad_id}-{squad_name}",
+                'uniqueSportId': self.unique_sport_id,
+                'uniqueFixtureId': self.unique_fixture_id,
+                'periodId': period_id,
+                'uniquePeriodId': period_id,
+            })
+            records.append(values)
+        print(f"Collected {len(records)} period records for match {self.match_text}.")
+        return build_records('PeriodRecord', self.period_fields, records)
+
+    # Score flow records of players that have a match record, numbered in payload order
+    def score_flow_records(self, score_flow):
+        rows = [dict(row, _position=position) for position, row in enumerate(self._with_player_info(score_flow), start=1)]
+        records = []
+        for row, player_id, squad_id, squad_name in self._resolve_players(rows, 'score flow data'):
+            unique_match_id = self._match_row_id(player_id, 'score flow data')
+            if unique_match_id is None:
+                continue
+            values = dict(row)
+            values.update({
+                'matchId': self.match_id,
+                'playerId': player_id,
+                'uniqueMatchId': unique_match_id,
+                'uniquePlayerId': f"{player_id}-{squad_id}",
+                'scoreFlowId': f"{self.match_text}_flow_{values.pop('_position')}",
+                'uniqueSquadId': f"{squad_id}-{squad_name}",
+                'uniqueSportId': self.unique_sport_id,
+                'uniqueFixtureId': self.unique_fixture_id,
+            })
+            records.append(values)
+        print(f"Collected {len(records)} score flow records for match {self.match_text}.")
+        return build_records('ScoreFlowRecord', self.score_flow_fields, records)
+
+    # uniqueMatchId of a player that has a match record, None otherwise (its foreign key would fail)
+    def _match_row_id(self, player_id, label):
+        unique_match_id = f"{self.match_text}-{player_id}"
+        if unique_match_id not in self.processed_unique_match_ids:
+            self.error_logger.warning(f"Match data for uniqueMatchId {unique_match_id} not found. Skipping {label} row.")
+            return None
+        return unique_match_id
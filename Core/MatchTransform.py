@@ -0,0 +1,152 @@
+import logging
+import pandas as pd
+from Utils.composite_keys import str_column
+
+UNKNOWN_SQUAD = 'Unknown Squad'
+
+
+# Stripped string column where every non-string value (NaN, None, numbers) becomes the default
+# (a missing column gives empty strings, as row.get(name, '') did; categoricals are read as their values)
+def clean_name_column(df, name, default=''):
+    if name not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    column = df[name]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+    if not (pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column)):
+        return pd.Series(default, index=df.index, dtype=object)
+    return column.str.strip().fillna(default)
+
+
+class MatchTransform:
+    """
+    Columnar transform of the match, period and score flow DataFrames of one match into ready-to-insert records.
+    Names are cleaned and composite IDs built with whole-column operations.
+    Rows whose playerId is missing or invalid are resolved by name, in one resolve_player_ids call per frame
+    (a callable mapping a list of (firstname, surname, squadName) tuples to their playerIds).
+    """
+    def __init__(self, match_id, fixture_id, sport_id, unique_sport_id, resolve_player_ids, error_logger=None):
+        self.match_id = str(match_id)
+        self.fixture_id = fixture_id
+        self.sport_id = sport_id
+        self.unique_sport_id = unique_sport_id
+        self.resolve_player_ids = resolve_player_ids
+        self.error_logger = error_logger or logging.getLogger(__name__)
+        self.unique_fixture_id = f"{fixture_id}-{match_id}"
+        self.processed_unique_match_ids = set()
+        self._found_player_ids = {}
+
+    # Clean the player, squad and name columns and resolve invalid playerIds
+    def _resolve_players(self, df, label):
+        """
+        Returns the rows that have a usable playerId, with the cleaned playerId, squadId, squadName,
+        firstname and surname as separate aligned Series.
+        """
+        player_id = str_column(df, 'playerId')
+        squad_id = str_column(df, 'squadId')
+        squad_name = clean_name_column(df, 'squadName', UNKNOWN_SQUAD)
+        firstname = clean_name_column(df, 'firstname')
+        surname = clean_name_column(df, 'surname')
+
+        invalid = (player_id == '0') | ~player_id.str.isdigit()
+        keep = ~invalid
+        if not invalid.any():
+            return df.copy(), player_id, squad_id, squad_name, firstname, surname
+
+        named = invalid & (firstname != '') & (surname != '')
+        self.error_logger.warning(f"{invalid.sum()} rows with an invalid or missing playerId in {label} for match {self.match_id}.")
+        unnamed = (invalid & ~named).sum()
+        if unnamed:
+            self.error_logger.warning(f"Missing firstname or surname for {unnamed} players in {label} for match {self.match_id}. Skipping those rows.")
+
+        # Resolve every name not seen yet in this match at once
+        name_keys = list(zip(firstname[named], surname[named], squad_name[named]))
+        new_keys = [name_key for name_key in dict.fromkeys(name_keys) if name_key not in self._found_player_ids]
+        if new_keys:
+            self._found_player_ids.update(self.resolve_player_ids(new_keys))
+
+        for index, name_key in zip(df.index[named], name_keys):
+            found_player_id = self._found_player_ids.get(name_key)
+            if not found_player_id:
+                self.error_logger.warning(f"Could not find playerId for {name_key[0]} {name_key[1]} in {label} for match {self.match_id}. Skipping row.")
+                continue
+            player_id[index] = str(found_player_id)
+            keep[index] = True
+
+        return df[keep].copy(), player_id[keep], squad_id[keep], squad_name[keep], firstname[keep], surname[keep]
+
+    # Match rows and the player info rows derived from them
+    def match_records(self, df):
+        rows, player_id, squad_id, squad_name, firstname, surname = self._resolve_players(df, 'match data')
+
+        unique_player_id = player_id + '-' + squad_id
+        unique_match_id = self.match_id + '-' + player_id
+        unique_squad_id = squad_id + '-' + squad_name
+
+        rows['matchId'] = self.match_id
+        rows['playerId'] = player_id
+        rows['squadId'] = squad_id
+        rows['squadName'] = squad_name
+        rows['uniquePlayerId'] = unique_player_id
+        rows['uniqueMatchId'] = unique_match_id
+        rows['uniqueSquadId'] = unique_squad_id
+        rows['uniqueSportId'] = self.unique_sport_id
+        rows['uniqueFixtureId'] = self.unique_fixture_id
+        self.processed_unique_match_ids.update(unique_match_id)
+
+        players = pd.DataFrame({
+            'playerId': player_id,
+            'firstname': firstname.replace('', 'Unknown'),
+            'surname': surname.replace('', 'Unknown'),
+            'displayName': rows['displayName'] if 'displayName' in rows.columns else 'Unknown',
+            'shortDisplayName': rows['shortDisplayName'] if 'shortDisplayName' in rows.columns else 'Unknown',
+            'squadName': squad_name,
+            'squadId': squad_id,
+            'sportId': self.sport_id,
+            'uniqueSquadId': unique_squad_id,
+            'uniquePlayerId': unique_player_id,
+        })
+        return rows.to_dict('records'), players.to_dict('records')
+
+    # Period rows of players that have a match row
+    def period_records(self, df):
+        df = df.assign(matchId=self.match_id)
+        period_id = self.match_id + '_' + str_column(df, 'period')
+        rows, player_id, squad_id, squad_name, _, _ = self._resolve_players(df, 'period data')
+        rows, player_id, squad_id, squad_name, period_id = self._with_match_rows(
+            'period data', rows, player_id, squad_id, squad_name, period_id[rows.index])
+
+        rows['playerId'] = player_id
+        rows['uniquePlayerId'] = player_id + '-' + squad_id
+        rows['uniqueMatchId'] = self.match_id + '-' + player_id
+        rows['uniqueSquadId'] = squad_id + '-' + squad_name
+        rows['uniqueSportId'] = self.unique_sport_id
+        rows['uniqueFixtureId'] = self.unique_fixture_id
+        rows['periodId'] = period_id
+        rows['uniquePeriodId'] = period_id
+        return rows.to_dict('records')
+
+    # Score flow rows of players that have a match row, numbered in payload order
+    def score_flow_records(self, df):
+        position = pd.Series(range(1, len(df) + 1), index=df.index).astype(str)
+        score_flow_id = self.match_id + '_flow_' + position
+        rows, player_id, squad_id, squad_name, _, _ = self._resolve_players(df, 'score flow data')
+        rows, player_id, squad_id, squad_name, score_flow_id = self._with_match_rows(
+            'score flow data', rows, player_id, squad_id, squad_name, score_flow_id[rows.index])
+
+        rows['playerId'] = player_id
+        rows['uniqueMatchId'] = self.match_id + '-' + player_id
+        rows['uniquePlayerId'] = player_id + '-' + squad_id
+        rows['scoreFlowId'] = score_flow_id
+        rows['uniqueSquadId'] = squad_id + '-' + squad_name
+        rows['uniqueSportId'] = self.unique_sport_id
+        rows['uniqueFixtureId'] = self.unique_fixture_id
+        return rows.to_dict('records')
+
+    # Drop the rows whose player has no match row (their foreign key would fail)
+    def _with_match_rows(self, label, rows, *columns):
+        unique_match_id = self.match_id + '-' + columns[0]
+        has_match_row = unique_match_id.isin(self.processed_unique_match_ids)
+        for missing in unique_match_id[~has_match_row]:
+            self.error_logger.warning(f"Match data for uniqueMatchId {missing} not found. Skipping {label} row.")
+        return (rows[has_match_row],) + tuple(column[has_match_row] for column in columns)
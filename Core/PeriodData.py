@@ -1,30 +1,25 @@
-import requests
 import pandas as pd
 import logging
+from Core.MatchPayload import MatchPayload
+from Utils.composite_keys import composite_key
+from Utils.dtype_policy import apply_dtype_policy
 
 class PeriodData:
-    def __init__(self, league_id, match_id):
+    def __init__(self, league_id, match_id, payload=None):
         self.league_id = league_id
         self.match_id = str(match_id)
         self.data = pd.DataFrame()
+        self.payload = payload or MatchPayload(league_id, match_id)
 
     def fetch_data(self):
         logging.info(f"Fetching period stats for match {self.match_id} in league {self.league_id}")
 
-        url = f'https://mc.championdata.com/data/{self.league_id}/{self.match_id}.json'
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            logging.error(f"Failed to retrieve data for match {self.match_id} in league {self.league_id}: {response.status_code}")
+        # Fetch the shared match payload (no-op if another parser already fetched it)
+        if not self.payload.ensure_fetched():
             return
 
-        json_data = response.json()
-
         # Access player period stats
-        match_stats = json_data.get('matchStats', {})
-        player_period_stats = match_stats.get('playerPeriodStats', {})
-
-        players = player_period_stats.get('player', [])
+        players = self.payload.player_period_stats
 
         if not players:
             logging.warning(f"No player period stats found for match {self.match_id} in league {self.league_id}.")
@@ -33,13 +28,12 @@ class PeriodData:
 
         df = pd.DataFrame(players)
 
-        # Merge with player info if available
-        player_info = match_stats.get('playerInfo', {}).get('player', [])
-        if player_info:
-            players_info_df = pd.DataFrame(player_info)
+        # Merge with the shared player info if available
+        players_info_df = self.payload.player_info
+        if not players_info_df.empty:
             df = pd.merge(
                 df,
-                players_info_df[['playerId', 'firstname', 'surname', 'displayName', 'shortDisplayName']],
+                players_info_df,
                 how='left',
                 on='playerId'
             )
@@ -48,10 +42,7 @@ class PeriodData:
             print(f"Player info not found in period data for match {self.match_id} in league {self.league_id}.")
 
         # Generate uniquePeriodId
-        df['uniquePeriodId'] = df.apply(
-            lambda row: f"{row['period']}-{row['playerId']}" if pd.notnull(row.get('period')) and pd.notnull(row.get('playerId')) else 'Unknown',
-            axis=1
-        )
+        df['uniquePeriodId'] = composite_key(df.get('period'), df.get('playerId'), index=df.index)
 
-        self.data = df
+        self.data = apply_dtype_policy(df)
         print(f"Fetched {len(df)} period records for match {self.match_id}.")
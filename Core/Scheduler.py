@@ -0,0 +1,205 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+from Core.LeaguesList import League
+from Core.FixtureDetails import Fixture, FIXTURE_URL
+from Core.MatchPayload import MatchPayload
+from Utils import http_session
+
+# Expected time (seconds) from the scheduled start to full time, plus a grace period before scraping
+MATCH_DURATION = 2 * 60 * 60
+SCRAPE_GRACE = 10 * 60
+
+# Backoff (seconds) while a match that should be over is not complete yet
+RETRY_BASE = 5 * 60
+RETRY_MAX = 2 * 60 * 60
+MAX_ATTEMPTS = 12
+
+# How often (seconds) the competitions and fixtures are re-read for new or moved matches
+REFRESH_INTERVAL = 6 * 60 * 60
+
+
+# Leagues to watch: the requested IDs, or every league of min_season (default: the current year) onwards
+def active_leagues(leagues_df, league_ids=None, min_season=None, now=None):
+    if leagues_df.empty:
+        return leagues_df
+    if league_ids:
+        return leagues_df[leagues_df['id'].isin(set(league_ids))]
+    min_season = min_season or datetime.fromtimestamp(now if now is not None else time.time()).year
+    seasons = pd.to_numeric(leagues_df['season'], errors='coerce')
+    return leagues_df[seasons >= min_season]
+
+
+# Scheduled start of a fixture match as a Unix timestamp, or None if it has no usable start time
+def match_start_timestamp(match_row):
+    """
+    Uses utcStartTime when the fixture has one, otherwise localStartTime read as the local time of this machine.
+    """
+    utc_start = match_row.get('utcStartTime')
+    if isinstance(utc_start, str) and utc_start:
+        start = pd.to_datetime(utc_start, errors='coerce')
+        if not pd.isnull(start):
+            start = start.tz_localize('UTC') if start.tzinfo is None else start
+            return start.timestamp()
+
+    local_start = match_row.get('localStartTime')
+    if isinstance(local_start, str) and local_start:
+        start = pd.to_datetime(local_start, errors='coerce')
+        if not pd.isnull(start):
+            if start.tzinfo is not None:
+                return start.timestamp()
+            return start.to_pydatetime().timestamp()  # Naive datetimes are read as local time
+    return None
+
+
+class MatchScheduler:
+    """
+    Long-running scheduler that scrapes each match shortly after it should finish.
+    Pending matches are read from the fixtures, queued for their start time plus MATCH_DURATION and
+    SCRAPE_GRACE, and retried with exponential backoff until their payload reports 'complete'.
+    """
+    def __init__(self, scraper, league_ids=None, min_season=None, match_duration=MATCH_DURATION,
+                 grace=SCRAPE_GRACE, retry_base=RETRY_BASE, retry_max=RETRY_MAX, max_attempts=MAX_ATTEMPTS,
+                 refresh_interval=REFRESH_INTERVAL, clock=time.time):
+        self.scraper = scraper
+        self.league_ids = set(league_ids) if league_ids else None
+        self.min_season = min_season
+        self.match_duration = match_duration
+        self.grace = grace
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        self.leagues = {}
+        self.queue = []
+        self.queued = set()
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+
+    # Queue a match to be checked at the given time
+    def schedule(self, league_id, match_id, due, attempt=0):
+        heapq.heappush(self.queue, (due, next(self._sequence), league_id, match_id, attempt))
+        self.queued.add((league_id, match_id))
+
+    # Re-read the competitions and fixtures and queue every pending match not queued yet
+    def refresh(self):
+        """Returns False if the competitions could not be read; a league whose fixture fails is skipped until the next refresh."""
+        # The tables may have been rebuilt since the last refresh, with other columns
+        self.scraper.db_helper.invalidate_schema()
+        try:
+            leagues_df, _ = League.fetch_leagues()
+        except Exception as e:
+            logging.error(f"Error reading the competitions, keeping the leagues already watched: {e}")
+            return False
+        active = active_leagues(leagues_df, self.league_ids, self.min_season, self.clock())
+        logging.info(f"Scheduler watching {len(active)} leagues.")
+
+        for _, league in active.iterrows():
+            self.leagues[league['id']] = league
+            fixture = Fixture(league['id'], league['id'], league['regulationPeriods'],
+                              self.scraper.info_logger, self.scraper.error_logger)
+            try:
+                fixture.fetch_data()
+            except Exception as e:
+                logging.error(f"Error reading the fixture of league {league['id']}, skipping it until the next refresh: {e}")
+                continue
+
+            for _, match_row in fixture.pending.iterrows():
+                key = (league['id'], match_row['matchId'])
+                if key in self.queued:
+                    continue
+                start = match_start_timestamp(match_row)
+                if start is None:
+                    logging.warning(f"Match {match_row['matchId']} in league {league['id']} has no start time, not scheduling it.")
+                    continue
+                due = max(start + self.match_duration + self.grace, self.clock())
+                self.schedule(league['id'], match_row['matchId'], due)
+                logging.info(f"Scheduled match {match_row['matchId']} in league {league['id']} for {datetime.fromtimestamp(due)}.")
+        return True
+
+    # Backoff delay before the given (one-based) retry
+    def retry_delay(self, attempt):
+        return min(self.retry_max, self.retry_base * (2 ** (attempt - 1)))
+
+    # Reschedule a match with backoff, or give up on it after max_attempts checks
+    def retry(self, league_id, match_id, attempt, reason, now):
+        if attempt + 1 >= self.max_attempts:
+            logging.error(f"Match {match_id} in league {league_id} {reason} after {attempt + 1} checks, giving up.")
+            self.queued.discard((league_id, match_id))
+        else:
+            delay = self.retry_delay(attempt + 1)
+            logging.info(f"Match {match_id} in league {league_id} {reason}, checking again in {delay} seconds.")
+            self.schedule(league_id, match_id, now + delay, attempt + 1)
+
+    # Check the due matches of a league, scrape the complete ones and reschedule the ones not stored
+    def run_league(self, league_id, matches, now):
+        statuses = {}
+        for match_id, attempt in matches:
+            payload = MatchPayload(league_id, match_id)
+            statuses[match_id] = payload.match_info.get('matchStatus') if payload.fetch_data() else None
+
+        complete_match_ids = [match_id for match_id, _ in matches if statuses[match_id] == 'complete']
+        stored_match_ids = set()
+        if complete_match_ids:
+            # The cached fixture still lists these matches as pending, so revalidate it first
+            http_session.expire(FIXTURE_URL.format(league_id=league_id))
+            stored_match_ids = self.scraper.scrape_league(self.leagues[league_id], match_ids=complete_match_ids)
+            logging.info(f"Scraped {len(stored_match_ids)} of {len(complete_match_ids)} completed matches in league {league_id}.")
+
+        for match_id, attempt in matches:
+            if match_id in stored_match_ids:
+                self.queued.discard((league_id, match_id))
+            elif statuses[match_id] == 'complete':
+                # e.g. the revalidated fixture still lists it as pending, or its rows could not be written
+                self.retry(league_id, match_id, attempt, "is complete but was not stored", now)
+            else:
+                self.retry(league_id, match_id, attempt, f"is '{statuses[match_id]}'", now)
+
+    # Check every due match, scrape the complete ones and reschedule the rest
+    def run_pending(self):
+        now = self.clock()
+        due = {}
+        while self.queue and self.queue[0][0] <= now:
+            _, _, league_id, match_id, attempt = heapq.heappop(self.queue)
+            due.setdefault(league_id, []).append((match_id, attempt))
+
+        for league_id, matches in due.items():
+            try:
+                self.run_league(league_id, matches, now)
+            except Exception as e:
+                # A network error that outlasted the HTTP retries, or a failed scrape: the matches stay queued
+                logging.error(f"Error checking the matches of league {league_id}: {e}")
+                for match_id, attempt in matches:
+                    self.retry(league_id, match_id, attempt, "could not be checked", now)
+
+    # Seconds until the next queued match is due
+    def next_due_in(self):
+        if not self.queue:
+            return None
+        return max(0, self.queue[0][0] - self.clock())
+
+    def stop(self):
+        self._stop.set()
+
+    # Run until stop() is called
+    def run_forever(self, poll_interval=60):
+        next_refresh = self.clock()
+        while not self._stop.is_set():
+            if self.clock() >= next_refresh:
+                # Retried sooner when the competitions could not be read
+                refreshed = self.refresh()
+                next_refresh = self.clock() + (self.refresh_interval if refreshed else self.retry_base)
+
+            self.run_pending()
+
+            wait = min(poll_interval, max(0, next_refresh - self.clock()))
+            next_due = self.next_due_in()
+            if next_due is not None:
+                wait = min(wait, next_due)
+            self._stop.wait(wait)
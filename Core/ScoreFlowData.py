@@ -1,31 +1,24 @@
-import requests
 import pandas as pd
 import logging
+from Core.MatchPayload import MatchPayload
+from Utils.dtype_policy import apply_dtype_policy
 
 class ScoreFlow:
-    def __init__(self, league_id, match_id):
+    def __init__(self, league_id, match_id, payload=None):
         self.league_id = league_id
         self.match_id = match_id
         self.data = pd.DataFrame()
+        self.payload = payload or MatchPayload(league_id, match_id)
 
     def fetch_data(self):
         logging.info(f"Fetching score flow data for match {self.match_id} in league {self.league_id}")
 
-        url = f'https://mc.championdata.com/data/{self.league_id}/{self.match_id}.json'
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            logging.error(f"Failed to retrieve score flow data for match {self.match_id} in league {self.league_id}: {response.status_code}")
-            print(f"Failed to retrieve data: {response.status_code}")
+        # Fetch the shared match payload (no-op if another parser already fetched it)
+        if not self.payload.ensure_fetched():
             return
 
-        json_data = response.json()
-
         # Access score flow data
-        match_stats = json_data.get('matchStats', {})
-        score_flow = match_stats.get('scoreFlow', {})
-
-        scores = score_flow.get('score', [])
+        scores = self.payload.score_flow
 
         if not scores:
             logging.warning(f"No score flow data found for match {self.match_id} in league {self.league_id}.")
@@ -35,13 +28,12 @@ class ScoreFlow:
         df = pd.DataFrame(scores)
         df['matchId'] = self.match_id
 
-        # Merge with player info if available
-        player_info = match_stats.get('playerInfo', {}).get('player', [])
-        if player_info:
-            players_df = pd.DataFrame(player_info)
+        # Merge with the shared player info if available
+        players_df = self.payload.player_info
+        if not players_df.empty:
             df = pd.merge(
                 df,
-                players_df[['playerId', 'firstname', 'surname', 'displayName', 'shortDisplayName']],
+                players_df,
                 how='left',
                 on='playerId'
             )
@@ -49,5 +41,5 @@ class ScoreFlow:
             logging.warning(f"Player info not found in score flow data for match {self.match_id} in league {self.league_id}.")
             print(f"Player info not found in score flow data for match {self.match_id} in league {self.league_id}.")
 
-        self.data = df
+        self.data = apply_dtype_policy(df)
         print(f"Fetched {len(df)} score flow records for match {self.match_id}.")
@@ -5,30 +5,128 @@ import os
 import pandas as pd
 import re
 import traceback
-from DatabaseUtils.SqlConnector import connect
+from DatabaseUtils.SqlConnector import connect, connect_pool
 from DatabaseUtils.database_helper import DatabaseHelper
+from DatabaseUtils.bulk_loader import BulkLoader, BULK_DIR
+from DatabaseUtils.write_scheduler import (
+    WritePlan, WriteScheduler, DEFAULT_BATCH_LEAGUES)
+from DatabaseUtils.player_index import PlayerIndex
+from Utils.name_matcher import DEFAULT_THRESHOLD
 from Utils.logger import setup_logging
+from Utils import http_session
+from Utils.scrape_ledger import ScrapeLedger, LEDGER_PATH, fingerprint_row
 from Utils.JsonLoader import load_json_fields
+from Utils.table_batches import TableBatches
 from Core.LeaguesList import League
 from Core.FixtureDetails import Fixture
 from Core.MatchDetails import Match
+from Core.MatchPayload import MatchPayload
+from Core.MatchFetcher import MatchFetcher, DEFAULT_CONCURRENCY
+from Core.MatchTransform import MatchTransform
+from Core.MatchRecords import MatchRecordParser, PIPELINES
 from Core.PeriodData import PeriodData
 from Core.ScoreFlowData import ScoreFlow
-from Utils.sport_category import determine_sport_category
+from Utils.sport_category import classify_league
+
+# Savepoint set before the rows of each match
+MATCH_SAVEPOINT = 'match_rows'
+
 
 class Scraper:
-    def __init__(self):
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, incremental=False,
+                 ledger_path=LEDGER_PATH, fuzzy_threshold=DEFAULT_THRESHOLD,
+                 pipeline='pandas', use_arrow=False, bulk_load=False,
+                 defer_indexes=False, staging_merge=False, writers=0,
+                 commit_every=0):
         # Setup logging with both error and info logs
         self.info_logger, self.error_logger = setup_logging()
 
-        self.connection = connect()
+        # Concurrent fetch engine for match payloads
+        self.match_fetcher = MatchFetcher(concurrency)
+
+        # In incremental mode the ledger records the matches already stored,
+        # so only new or changed matches are fetched and processed
+        self.ledger = ScrapeLedger(ledger_path) if incremental else None
+
+        # The bulk load keeps the rows already stored (LOAD DATA IGNORE), so
+        # the changed matches of an incremental run would never be written
+        if bulk_load and incremental:
+            raise ValueError("bulk_load is for empty or rebuilt tables, it "
+                             "cannot be combined with incremental.")
+        # The merge reports the rows it drops (foreign keys, truncation) only
+        # as warnings, so their matches would be recorded as stored
+        if staging_merge and incremental:
+            raise ValueError("staging_merge cannot be combined with "
+                             "incremental.")
+
+        # The bulk load sends its TSV files with LOAD DATA LOCAL INFILE
+        self.connection = connect(
+            local_infile_dir=BULK_DIR if bulk_load else None)
         if self.connection is None:
             self.error_logger.error("Failed to connect to the database.")
             raise ConnectionError("Database connection failed.")
         self.connection.autocommit = False  # Turn off auto-commit
+        # Each fixture is written in one transaction, with a savepoint per
+        # match; commit_every also commits after that many matches
+        self.commit_every = commit_every
         self.db_helper = DatabaseHelper(
             self.connection, self.info_logger, self.error_logger)
 
+        # In bulk load mode (full-history backfills into empty or rebuilt
+        # tables) the rows are spooled to TSV files and loaded once every
+        # league is scraped
+        self.bulk_loader = BulkLoader(
+            self.db_helper, defer_indexes=defer_indexes) if bulk_load else None
+
+        # With staging_merge the rows of a league are written to temporary
+        # staging tables and merged into the live tables with one statement
+        # per table just before the commit
+        if bulk_load and staging_merge:
+            raise ValueError("bulk_load and staging_merge are separate write "
+                             "strategies, use one of them.")
+        self.staging_merge = staging_merge
+
+        # With writers, the rows of a few leagues are written together by
+        # that many parallel writers on pooled connections, in foreign key
+        # order (see DatabaseUtils.write_scheduler)
+        if writers and (bulk_load or staging_merge):
+            raise ValueError("writers cannot be combined with bulk_load or "
+                             "staging_merge.")
+        self.write_scheduler = None
+        if writers:
+            pool = connect_pool(writers)
+            if pool is None:
+                self.error_logger.error(
+                    "Failed to create the database connection pool.")
+                raise ConnectionError("Database connection pool failed.")
+            self.write_scheduler = WriteScheduler(
+                pool, self.db_helper, writers)
+        self.pending_writes = WritePlan()
+        self.pending_fixture_ids = []
+
+        # Ledger entries of the spooled or pending rows, saved once the rows
+        # are written
+        self.pending_ledger_updates = []
+
+        # static_player_info is loaded once, on the first player to resolve;
+        # names without an exact match are fuzzy matched unless the
+        # threshold is None
+        self.player_index = PlayerIndex(
+            self.connection, self.info_logger, self.error_logger,
+            fuzzy_threshold=fuzzy_threshold)
+
+        # Match payloads are parsed with DataFrames ('pandas') or straight
+        # into field spec records ('records', see Core.MatchRecords)
+        if pipeline not in PIPELINES:
+            raise ValueError(f"Unknown pipeline {pipeline!r}, "
+                             f"expected one of {PIPELINES}.")
+        self.pipeline = pipeline
+
+        # Parsed rows of the big tables are kept as lists of dicts between
+        # the parse and insert stages; use_arrow (opt-in) holds them as Arrow
+        # record batches instead, see Utils.table_batches
+        self.use_arrow = use_arrow
+
         # Load JSON fields for each table
         self.json_fields = load_json_fields()
         self.fixture_fields = self.json_fields['fixture_fields']
@@ -62,743 +160,695 @@ class Scraper:
             self.error_logger.info(
                 f"Added fixtureId {fixture_id} to broken fixtures list.")
 
+    # Find the playerId of a player by name in the in-memory player index
     def find_player_id(self, firstname, surname, squad_name=None):
-        # Normalize the names
-        firstname = firstname.strip().lower()
-        surname = surname.strip().lower()
-        params = [firstname, surname]
-
-        # Prepare the base query
-        query = """
-        SELECT playerId FROM static_player_info
-        WHERE LOWER(firstname) = %s AND LOWER(surname) = %s
-        """
-
-        # If squad_name is provided and not 'Unknown Squad', include it
-        if squad_name and squad_name.lower() != 'unknown squad':
-            squad_name = squad_name.strip().lower()
-            query += " AND LOWER(squadName) = %s"
-            params.append(squad_name)
-
-        # Log the query and parameters
-        self.error_logger.debug(
-            f"Executing query: {query} with params: {params}")
-
-        # Execute the query
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchall()
-        cursor.close()
-
-        # Process the result
-        if len(result) == 1:
-            player_id_found = result[0][0]
-            self.error_logger.info(
-                f"Found playerId {player_id_found} for {firstname} "
-                f"{surname} with squadName {squad_name}.")
-            return player_id_found  # Return the playerId
-        elif len(result) > 1:
-            self.error_logger.warning(
-                f"Multiple playerIds found for {firstname} {surname} with "
-                f"squadName {squad_name}. Using the first one.")
-            return result[0][0]
-        else:
-            self.error_logger.warning(
-                f"No playerId found for {firstname} {surname} with "
-                f"squadName {squad_name}.")
-            return None  # No match found
+        return self.player_index.find(firstname, surname, squad_name)
 
     def scrape_entire_database(self):
-        # Define the sport_id_map
-        sport_id_map = {
-            'afl mens': 1,
-            'afl womens': 2,
-            'nrl mens': 3,
-            'nrl womens': 4,
-            'fast5 mens': 5,
-            'fast5 womens': 6,
-            'netball mens': 7,
-            'netball womens nz': 8,
-            'netball womens australia': 9,
-            'netball womens international': 10,
-            'netball unknown': 11,
-            'nrl unknown': 12
-        }
-
         # Fetch leagues
         leagues_df, _ = League.fetch_leagues()
         print(f"Fetched {len(leagues_df)} leagues.")
 
-        for _, league in leagues_df.iterrows():
-            league_id = league['id']
-            league_name = league['league_season']
-            regulation_periods = league['regulationPeriods']
-            fixture_id = league['id']
-
-            fixture = Fixture(
-                league_id, fixture_id, regulation_periods,
-                self.info_logger, self.error_logger)
-            fixture.fetch_data()
-            print(f"Fetched {len(fixture.data)} fixtures for league "
-                  f"{league_id}.")
-            if fixture.data.empty:
-                continue
+        try:
+            for _, league in leagues_df.iterrows():
+                self.scrape_league(league)
 
-            # Extract squad ids from fixture data
-            squad_ids = pd.unique(
-                fixture.data[['homeSquadId', 'awaySquadId']].values.ravel()
-            ).tolist()
-            print(f"Extracted squad IDs: {squad_ids}")
+            self.flush_bulk_load()
+            self.flush_pending_writes()
 
-            # Filter sport category and sport id
-            sport_category, sport_id = determine_sport_category(
-                regulation_periods,
-                squad_ids,
-                league_name,
-                league_id
-            )
-
-            # Normalize the sport category
-            sport_category = sport_category.strip()
-            sport_category = re.sub(
-                r'\s+', ' ', sport_category)  # Remove extra spaces
-            sport_category_lower = sport_category.lower()
-
-            # Log the normalized category
-            self.info_logger.info(
-                f"Normalized sport category: '{sport_category}' "
-                f"for league: {league_id}")
-
-            # Convert the sport_id_map keys to lowercase
-            sport_id_map_lower = {k.lower(): v for k, v in sport_id_map.items()}
-
-            # Check if the sport category exists in the map
-            if sport_category_lower in sport_id_map_lower:
-                sport_id = sport_id_map_lower[sport_category_lower]
+            # At the end, write the broken fixtures list to the JSON file
+            with open(self.broken_fixtures_file, 'w') as f:
+                json.dump(self.broken_fixtures, f)
+        finally:
+            # Stop the parallel writers and close their connections
+            if self.write_scheduler is not None:
+                self.write_scheduler.close()
+
+    # Scrape a single league; match_ids restricts it to those matches.
+    # Returns the matchIds that are stored once it is done: written now
+    # (or queued for the bulk load or the parallel writers), or unchanged
+    # since they were stored
+    def scrape_league(self, league, match_ids=None):
+        league_id = league['id']
+        league_name = league['league_season']
+        fixture_id = league['id']
+
+        fixture = Fixture(
+            league_id, fixture_id, league['regulationPeriods'],
+            self.info_logger, self.error_logger)
+        fixture.fetch_data()
+        print(f"Fetched {len(fixture.data)} fixtures for league "
+              f"{league_id}.")
+        if fixture.data.empty:
+            return set()
+
+        sport_category, sport_id, fixture_year = self.resolve_sport(
+            league, fixture.data, fixture.sport)
+        sport_category_lower = sport_category.lower()
+
+        # Restrict the league to the requested matches
+        if match_ids is not None:
+            fixture.data = fixture.data[
+                fixture.data['matchId'].isin(match_ids)]
+            if fixture.data.empty:
+                print(f"None of the requested matches are complete in league "
+                      f"{league_id}.")
+                return set()
+
+        # Find the matches that are already stored and unchanged
+        fixture_fingerprints = {}
+        unchanged_match_ids = set()
+        if self.ledger is not None:
+            for _, match_row in fixture.data.iterrows():
+                match_id = match_row['matchId']
+                fixture_fingerprints[match_id] = fingerprint_row(match_row)
+                if not self.ledger.needs_fetch(
+                        league_id, match_id, match_row['matchStatus'],
+                        fixture_fingerprints[match_id]):
+                    unchanged_match_ids.add(match_id)
+            if len(unchanged_match_ids) == len(fixture.data):
+                print(f"No new or changed matches for league "
+                      f"{league_id}, skipping.")
+                return unchanged_match_ids
+            print(f"{len(fixture.data) - len(unchanged_match_ids)} new or "
+                  f"changed matches for league {league_id}.")
+
+        # Rows spooled or pending for this league are discarded if it is
+        # rolled back
+        pending_mark = self.mark_pending_rows()
+
+        # Start the transaction
+        try:
+            # Begin transaction
+            self.connection.start_transaction()
+
+            # Process sport info
+            sport_info_data = self.sport_info_row(
+                sport_id, sport_category, fixture_id, league_name,
+                fixture_year)
+
+            # Collect data for batch insertion, one batch per match for the
+            # player, match, period and score flow rows
+            squad_info_list = []
+            fixture_data_list = []
+            player_info_list = TableBatches('player_info', self.use_arrow)
+            match_data_list = TableBatches('match', self.use_arrow)
+            period_data_list = TableBatches('period', self.use_arrow)
+            score_flow_data_list = TableBatches('score_flow', self.use_arrow)
+
+            # For table names
+            table_prefix = sport_category_lower.replace(' ', '_')
+            fixture_table = f"{table_prefix}_fixture"
+            match_table = f"{table_prefix}_match"
+            period_table = f"{table_prefix}_period"
+            score_flow_table = f"{table_prefix}_score_flow"
+
+            # Initialize the set to track processed squad IDs
+            processed_unique_squad_ids = set()
+
+            # Ledger entries recorded once the transaction is committed
+            ledger_updates = []
+
+            # Matches whose rows are written, in fixture order, and those of
+            # them that produced match rows
+            parsed_match_ids = []
+            written_match_ids = []
+
+            # Download every completed match payload of the league
+            # concurrently before the parse stage
+            completed_match_ids = [
+                match_id for match_id, match_status in zip(
+                    fixture.data['matchId'], fixture.data['matchStatus'])
+                if match_status not in ['scheduled', 'incomplete']
+                and match_id and match_id not in unchanged_match_ids]
+            payloads = self.match_fetcher.fetch_league(
+                league_id, completed_match_ids)
+            print(f"Prefetched {len(payloads)} match payloads for "
+                  f"league {league_id}.")
+            for host, stats in http_session.limiter_stats().items():
                 self.info_logger.info(
-                    f"Sport ID found: {sport_id} for category: "
-                    f"'{sport_category}'")
-            else:
-                self.error_logger.error(
-                    f"Sport category '{sport_category}' not found in "
-                    f"sport_id_map for league {league_id}.")
-                sport_id = None  # Skip if category not in map
-
-            match_year = re.search(r'\b(20\d{2})\b', league_name)
-            fixture_year = match_year.group(1) if match_year else None
-
-            # Start the transaction
-            try:
-                # Begin transaction
-                self.connection.start_transaction()
-
-                # Process sport info
-                sport_info_data = {
-                    'sportId': str(sport_id),
-                    'sportName': sport_category,
-                    'fixtureId': str(fixture_id),
-                    'fixtureTitle': league_name,
-                    'fixtureYear': fixture_year,
-                    'uniqueSportId': f"{sport_id}-{fixture_id}"
-                    if sport_id and fixture_id else 'Unknown'
-                }
-
-                # Collect data for batch insertion
-                squad_info_list = []
-                fixture_data_list = []
-                player_info_list = []
-                match_data_list = []
-                period_data_list = []
-                score_flow_data_list = []
-
-                # For table names
-                table_prefix = sport_category_lower.replace(' ', '_')
-                fixture_table = f"{table_prefix}_fixture"
-                match_table = f"{table_prefix}_match"
-                period_table = f"{table_prefix}_period"
-                score_flow_table = f"{table_prefix}_score_flow"
-
-                # Initialize sets to track processed IDs
-                processed_unique_match_ids = set()
-                processed_unique_squad_ids = set()
-
-                for index, match_row in fixture.data.iterrows():
-                    if match_row['matchStatus'] in ['scheduled', 'incomplete']:
+                    f"Rate limiter for {host}: limit {stats['limit']}, "
+                    f"observed latency {stats['observed_latency']}, "
+                    f"{stats['throttled']} throttled and "
+                    f"{stats['errors']} failed of {stats['requests']} "
+                    f"requests.")
+
+            # Resolve the players without a usable playerId of every
+            # prefetched match at once, the parsers reuse the results
+            self.resolve_league_players(
+                league_id, fixture_id, sport_id, fixture_year,
+                sport_info_data, payloads)
+
+            for index, match_row in fixture.data.iterrows():
+                if match_row['matchStatus'] in ['scheduled', 'incomplete']:
+                    continue
+                if match_row['matchId'] in unchanged_match_ids:
+                    continue
+
+                match_id = match_row['matchId'] or 'Unknown'
+                fixture.data.at[index, 'sportId'] = sport_id
+
+                # Collect fixture data and squad info for both sides
+                fixture_data, squad_rows = self.fixture_rows(
+                    match_row, fixture_id, sport_id, sport_info_data,
+                    processed_unique_squad_ids)
+                fixture_data_list.append(fixture_data)
+                squad_info_list.extend(squad_rows)
+
+                # Use the prefetched payload (released once the match is
+                # parsed) and share it across parsers
+                payload = payloads.pop(match_id, None) or MatchPayload(
+                    league_id, match_id)
+
+                ledger_update = None
+                if self.ledger is not None and payload.ensure_fetched():
+                    ledger_update = (
+                        match_id, match_row['matchStatus'],
+                        fixture_fingerprints.get(match_id),
+                        payload.fingerprint)
+                    if not self.ledger.payload_changed(
+                            league_id, match_id, payload.fingerprint):
+                        ledger_updates.append(ledger_update)
+                        unchanged_match_ids.add(match_id)
+                        print(f"Payload unchanged for match {match_id}, "
+                              f"skipping.")
                         continue
 
-                    match_id = match_row['matchId'] or 'Unknown'
-                    fixture.data.at[index, 'sportId'] = sport_id
-
-                    # Generate uniqueFixtureId
-                    uniqueFixtureId = f"{fixture_id}-{match_id}"
-                    print(f"Unique fixture ID: {uniqueFixtureId}")
-
-                    # Ensure matchName is populated
-                    match_name = match_row.get('matchName') or (
-                        f"{match_row['homeSquadName']} vs "
-                        f"{match_row['awaySquadName']} | "
-                        f"{match_row['localStartTime']}")
-
-                    # Log uniqueMatchId
-                    uniqueMatchId = f"{match_id}-{fixture_id}"
-                    self.info_logger.info(
-                        f"Generated uniqueMatchId: {uniqueMatchId} for "
-                        f"match {match_id}.")
-
-                    # Collect fixture data
-                    fixture_data = {
-                        **match_row,
-                        'fixtureId': fixture_id,
-                        'sportId': sport_id,
-                        'matchId': match_id,
-                        'uniqueFixtureId': uniqueFixtureId,
-                        'matchName': match_name,
-                        'uniqueSportId': sport_info_data['uniqueSportId']
-                    }
-                    fixture_data_list.append(fixture_data)
-
-                    # Collect squad info for both home and away
-                    for squad_side in ['home', 'away']:
-                        squad_id = str(match_row.get(
-                            f'{squad_side}SquadId', 'Unknown'))
-                        squad_name_raw = match_row.get(
-                            f'{squad_side}SquadName', '')
-                        # Handle NaN values for squad_name
-                        if not isinstance(squad_name_raw, str) or pd.isnull(
-                                squad_name_raw):
-                            squad_name = 'Unknown Squad'
-                        else:
-                            squad_name = squad_name_raw.strip()
-
-                        # Generate uniqueSquadId
-                        uniqueSquadId = f"{squad_id}-{squad_name}"
-                        self.info_logger.info(
-                            f"Generated uniqueSquadId: {uniqueSquadId} "
-                            f"for {squad_side} side in match {match_id}.")
-
-                        if uniqueSquadId not in processed_unique_squad_ids:
-                            squad_info_data = {
-                                'squadId': squad_id,
-                                'squadName': squad_name,
-                                'uniqueSquadId': uniqueSquadId,
-                                'fixtureTitle': sport_info_data[
-                                    'fixtureTitle'],
-                                'fixtureYear': sport_info_data['fixtureYear']
-                            }
-                            squad_info_list.append(squad_info_data)
-                            processed_unique_squad_ids.add(uniqueSquadId)
-
-                    # Fetch match data
-                    match = Match(
-                        league_id, match_id, fixture_id, sport_id,
-                        fixture_year)
-                    match.fetch_data()
-
-                    if match.data.empty:
-                        self.error_logger.warning(
-                            f"Match data is empty for matchId: {match_id}, "
-                            f"leagueId: {league_id}.")
-                        continue  # Skip to next match
-
-                    print(f"Fetched {len(match.data)} match records for "
-                          f"match {match_id}.")
-
-                    # Ensure 'firstname' and 'surname' are in match.data
-                    if 'firstname' not in match.data.columns or 'surname' not \
-                            in match.data.columns:
-                        self.error_logger.error(
-                            f"'firstname' or 'surname' not found in match "
-                            f"data for matchId: {match_id}. Skipping match.")
-                        continue  # Skip this match
-
-                    # Process and collect match data
-                    for _, row in match.data.iterrows():
-                        player_id = str(row.get('playerId', 'Unknown'))
-                        squad_id = str(row.get('squadId', 'Unknown'))
-
-                        # Extract squad_name, handle NaN values
-                        squad_name_raw = row.get('squadName', '')
-                        if not isinstance(squad_name_raw, str) or pd.isnull(
-                                squad_name_raw):
-                            squad_name = 'Unknown Squad'
-                        else:
-                            squad_name = squad_name_raw.strip()
-
-                        # Extract firstname and surname
-                        firstname = row.get('firstname', '')
-                        surname = row.get('surname', '')
-
-                        # Handle non-string types and NaN values
-                        if not isinstance(firstname, str) or pd.isnull(
-                                firstname):
-                            firstname = ''
-                        else:
-                            firstname = firstname.strip()
-                        if not isinstance(surname, str) or pd.isnull(surname):
-                            surname = ''
-                        else:
-                            surname = surname.strip()
-
-                        # Check if player_id is missing or invalid
-                        if player_id == '0' or not player_id.isdigit():
-                            self.error_logger.warning(
-                                f"Invalid or missing playerId '{player_id}' "
-                                f"for row: {row.to_dict()}")
-                            if firstname and surname:
-                                self.error_logger.info(
-                                    f"Attempting to find playerId for "
-                                    f"{firstname} {surname} with squadName "
-                                    f"'{squad_name}'.")
-                                found_player_id = self.find_player_id(
-                                    firstname, surname, squad_name)
-                                if found_player_id:
-                                    player_id = str(found_player_id)
-                                    self.info_logger.info(
-                                        f"Found playerId {player_id} for "
-                                        f"{firstname} {surname}.")
-                                else:
-                                    self.error_logger.warning(
-                                        f"Could not find playerId for "
-                                        f"{firstname} {surname} in match "
-                                        f"{match_id}. Skipping row.")
-                                    continue  # Skip this row
-                            else:
-                                self.error_logger.warning(
-                                    f"Missing firstname or surname for player "
-                                    f"in match {match_id}. Skipping row.")
-                                continue  # Skip this row
-
-                        # Log uniquePlayerId
-                        uniquePlayerId = f"{player_id}-{squad_id}"
-                        self.info_logger.info(
-                            f"Generated uniquePlayerId: {uniquePlayerId} for "
-                            f"player {player_id} in match {match_id}.")
-
-                        row['matchId'] = str(match_id)
-                        row['playerId'] = player_id  # Update playerId
-                        row['squadId'] = squad_id
-                        row['squadName'] = squad_name
-
-                        # Generate unique IDs
-                        uniqueMatchId = f"{match_id}-{player_id}"
-                        uniqueSquadId = f"{squad_id}-{squad_name}"
-                        uniqueSportId = sport_info_data['uniqueSportId']
-                        uniqueFixtureId = f"{fixture_id}-{match_id}"
-
-                        row['uniquePlayerId'] = uniquePlayerId
-                        row['uniqueMatchId'] = uniqueMatchId
-                        row['uniqueSquadId'] = uniqueSquadId
-                        row['uniqueSportId'] = uniqueSportId
-                        row['uniqueFixtureId'] = uniqueFixtureId
-
-                        match_data_list.append(row.to_dict())
-
-                        # Add the uniqueMatchId to the set
-                        processed_unique_match_ids.add(uniqueMatchId)
-
-                        # Collect player info
-                        player_info_data = {
-                            'playerId': player_id,
-                            'firstname': firstname or 'Unknown',
-                            'surname': surname or 'Unknown',
-                            'displayName': row.get('displayName', 'Unknown'),
-                            'shortDisplayName': row.get(
-                                'shortDisplayName', 'Unknown'),
-                            'squadName': squad_name,
-                            'squadId': squad_id,
-                            'sportId': sport_id,
-                            'uniqueSquadId': uniqueSquadId,
-                            'uniquePlayerId': uniquePlayerId
-                        }
-                        player_info_list.append(player_info_data)
-
-                    print(f"Collected {len(match_data_list)} match entries "
-                          f"for league {league_id}.")
-
-                    # Fetch period data
-                    period_data = PeriodData(league_id, match_id)
-                    period_data.fetch_data()
-                    print(f"Fetched {len(period_data.data)} period records "
-                          f"for match {match_id}.")
-
-                    if not period_data.data.empty:
-                        period_data.data['matchId'] = str(match_id)
-
-                        # Ensure 'firstname' and 'surname' are present
-                        if 'firstname' not in period_data.data.columns or \
-                                'surname' not in period_data.data.columns:
-                            self.error_logger.error(
-                                f"'firstname' or 'surname' not found in "
-                                f"period data for matchId: {match_id}. "
-                                f"Skipping period data.")
-                        else:
-                            for idx, row in period_data.data.iterrows():
-                                period_num = str(row.get('period', 'Unknown'))
-                                period_id = f"{match_id}_{period_num}"
-
-                                # Fetch playerId and squadId
-                                player_id = str(row.get(
-                                    'playerId', 'Unknown'))
-                                squad_id = str(row.get('squadId', 'Unknown'))
-
-                                # Extract squad_name, handle NaN values
-                                squad_name_raw = row.get('squadName', '')
-                                if not isinstance(
-                                        squad_name_raw, str) or pd.isnull(
-                                        squad_name_raw):
-                                    squad_name = 'Unknown Squad'
-                                else:
-                                    squad_name = squad_name_raw.strip()
-
-                                # Extract firstname and surname
-                                firstname = row.get('firstname', '')
-                                surname = row.get('surname', '')
-
-                                # Handle non-string types and NaN values
-                                if not isinstance(
-                                        firstname, str) or pd.isnull(
-                                        firstname):
-                                    firstname = ''
-                                else:
-                                    firstname = firstname.strip()
-                                if not isinstance(
-                                        surname, str) or pd.isnull(surname):
-                                    surname = ''
-                                else:
-                                    surname = surname.strip()
-
-                                # Apply the same logic for playerId
-                                if player_id == '0' or not player_id.isdigit():
-                                    self.error_logger.warning(
-                                        f"Invalid or missing playerId "
-                                        f"'{player_id}' for period data row: "
-                                        f"{row.to_dict()}")
-                                    if firstname and surname:
-                                        self.error_logger.info(
-                                            f"Attempting to find playerId for "
-                                            f"{firstname} {surname} with "
-                                            f"squadName '{squad_name}'.")
-                                        found_player_id = self.find_player_id(
-                                            firstname, surname, squad_name)
-                                        if found_player_id:
-                                            player_id = str(found_player_id)
-                                            self.info_logger.info(
-                                                f"Found playerId {player_id} "
-                                                f"for {firstname} {surname} "
-                                                f"in period data.")
-                                        else:
-                                            self.error_logger.warning(
-                                                f"Could not find playerId for "
-                                                f"{firstname} {surname} in "
-                                                f"period data for match "
-                                                f"{match_id}. Skipping row.")
-                                            continue  # Skip this row
-                                    else:
-                                        self.error_logger.warning(
-                                            f"Missing firstname or surname "
-                                            f"for player in period data for "
-                                            f"match {match_id}. Skipping row.")
-                                        continue  # Skip this row
-
-                                # Generate uniqueMatchId
-                                uniqueMatchId = f"{match_id}-{player_id}"
-
-                                # Check if uniqueMatchId was processed
-                                if uniqueMatchId not in \
-                                        processed_unique_match_ids:
-                                    self.error_logger.warning(
-                                        f"Match data for uniqueMatchId "
-                                        f"{uniqueMatchId} not found. "
-                                        f"Skipping period data row.")
-                                    continue  # Skip this period data row
-
-                                row['playerId'] = player_id
-
-                                # Generate unique IDs
-                                uniquePlayerId = f"{player_id}-{squad_id}"
-                                uniqueSquadId = f"{squad_id}-{squad_name}"
-                                uniqueSportId = sport_info_data[
-                                    'uniqueSportId']
-                                uniqueFixtureId = f"{fixture_id}-{match_id}"
-                                uniquePeriodId = period_id
-
-                                # Assign IDs back to the row
-                                row['uniquePlayerId'] = uniquePlayerId
-                                row['uniqueMatchId'] = uniqueMatchId
-                                row['uniqueSquadId'] = uniqueSquadId
-                                row['uniqueSportId'] = uniqueSportId
-                                row['uniqueFixtureId'] = uniqueFixtureId
-                                row['periodId'] = period_id
-                                row['uniquePeriodId'] = uniquePeriodId
-
-                                # Add the row to the period_data_list
-                                period_data_list.append(row.to_dict())
-
-                    # Fetch score flow data
-                    score_flow = ScoreFlow(league_id, match_id)
-                    score_flow.fetch_data()
-                    print(f"Fetched {len(score_flow.data)} score flow records "
-                          f"for match {match_id}.")
-                    if not score_flow.data.empty:
-                        if 'firstname' not in score_flow.data.columns or \
-                                'surname' not in score_flow.data.columns:
-                            self.error_logger.error(
-                                f"'firstname' or 'surname' not found in "
-                                f"score flow data for matchId: {match_id}. "
-                                f"Skipping score flow data.")
-                        else:
-                            score_flow_counter = 1
-                            for idx, row in score_flow.data.iterrows():
-                                score_flow_id = f"{match_id}_flow_" \
-                                                f"{score_flow_counter}"
-                                score_flow_counter += 1
-
-                                # Similar logic for playerId
-                                player_id = str(row.get(
-                                    'playerId', 'Unknown'))
-                                squad_id = str(row.get('squadId', 'Unknown'))
-
-                                # Extract squad_name, handle NaN values
-                                squad_name_raw = row.get('squadName', '')
-                                if not isinstance(
-                                        squad_name_raw, str) or pd.isnull(
-                                        squad_name_raw):
-                                    squad_name = 'Unknown Squad'
-                                else:
-                                    squad_name = squad_name_raw.strip()
-
-                                # Extract firstname and surname
-                                firstname = row.get('firstname', '')
-                                surname = row.get('surname', '')
-
-                                # Handle non-string types and NaN values
-                                if not isinstance(
-                                        firstname, str) or pd.isnull(
-                                        firstname):
-                                    firstname = ''
-                                else:
-                                    firstname = firstname.strip()
-                                if not isinstance(
-                                        surname, str) or pd.isnull(surname):
-                                    surname = ''
-                                else:
-                                    surname = surname.strip()
-
-                                if player_id == '0' or not player_id.isdigit():
-                                    self.error_logger.warning(
-                                        f"Invalid or missing playerId "
-                                        f"'{player_id}' for score flow data "
-                                        f"row: {row.to_dict()}")
-                                    if firstname and surname:
-                                        self.error_logger.info(
-                                            f"Attempting to find playerId for "
-                                            f"{firstname} {surname} with "
-                                            f"squadName '{squad_name}'.")
-                                        found_player_id = self.find_player_id(
-                                            firstname, surname, squad_name)
-                                        if found_player_id:
-                                            player_id = str(found_player_id)
-                                            self.info_logger.info(
-                                                f"Found playerId {player_id} "
-                                                f"for {firstname} {surname} "
-                                                f"in score flow data.")
-                                        else:
-                                            self.error_logger.warning(
-                                                f"Could not find playerId for "
-                                                f"{firstname} {surname} in "
-                                                f"score flow data for match "
-                                                f"{match_id}. Skipping row.")
-                                            continue  # Skip this row
-                                    else:
-                                        self.error_logger.warning(
-                                            f"Missing firstname or surname "
-                                            f"for player in score flow data "
-                                            f"for match {match_id}. "
-                                            f"Skipping row.")
-                                        continue  # Skip this row
-
-                                # Generate uniqueMatchId
-                                uniqueMatchId = f"{match_id}-{player_id}"
-
-                                # Check if uniqueMatchId was processed
-                                if uniqueMatchId not in \
-                                        processed_unique_match_ids:
-                                    self.error_logger.warning(
-                                        f"Match data for uniqueMatchId "
-                                        f"{uniqueMatchId} not found. "
-                                        f"Skipping score flow data row.")
-                                    continue  # Skip this score flow data row
-
-                                row['playerId'] = player_id
-                                row['uniqueMatchId'] = uniqueMatchId
-                                row['uniquePlayerId'] = f"{player_id}-" \
-                                                        f"{squad_id}"
-                                row['scoreFlowId'] = score_flow_id
-
-                                # Generate unique IDs
-                                uniqueSquadId = f"{squad_id}-{squad_name}"
-                                uniqueSportId = sport_info_data[
-                                    'uniqueSportId']
-                                uniqueFixtureId = f"{fixture_id}-{match_id}"
-
-                                row['uniqueSquadId'] = uniqueSquadId
-                                row['uniqueSportId'] = uniqueSportId
-                                row['uniqueFixtureId'] = uniqueFixtureId
-
-                                score_flow_data_list.append(row.to_dict())
-
-                print(f"Collected {len(squad_info_list)} squad info entries.")
-                print(f"Collected {len(player_info_list)} player info entries.")
-                print(f"Collected {len(fixture_data_list)} fixture entries.")
-                print(f"Collected {len(match_data_list)} match entries.")
-                print(f"Collected {len(period_data_list)} period data entries.")
-                print(f"Collected {len(score_flow_data_list)} score flow "
-                      f"entries.")
-
-                # Insert data with individual error handling
-
-                # 1. Insert squad info
-                for squad_info_data in squad_info_list:
-                    print(f"Inserting squad info: {squad_info_data}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            'squad_info', squad_info_data, self.squad_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting squad info for fixtureId: "
-                            f"{fixture_id}, squadId: "
-                            f"{squad_info_data['squadId']}. Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {squad_info_data}")
-                        continue  # Skip this squad_info_data
-
-                # 2. Insert sport info
-                print(f"Inserting sport info: {sport_info_data}")
-                try:
-                    self.db_helper.insert_data_dynamically(
-                        'sport_info', sport_info_data, self.sport_fields)
-                except mysql_error as err:
-                    self.error_logger.error(
-                        f"MySQL error inserting sport info for fixtureId: "
-                        f"{fixture_id}. Error: {err}")
-                    self.error_logger.error(
-                        f"Data causing error: {sport_info_data}")
-                    self.connection.rollback()
-                    self.error_logger.error(
-                        f"Transaction rolled back for fixtureId: {fixture_id}")
-                    # Add the fixtureId to the broken fixtures list
-                    self.add_broken_fixture(fixture_id)
-                    continue  # Skip to the next fixture
-
-                # 3. Insert player info
-                for player_info_data in player_info_list:
-                    print(f"Inserting player info: {player_info_data}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            'player_info', player_info_data, self.player_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting player info for "
-                            f"playerId: {player_info_data['playerId']}. "
-                            f"Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {player_info_data}")
-                        continue  # Skip this player_info_data
-
-                # 4. Insert fixture data
-                for fixture_data in fixture_data_list:
-                    print(f"Inserting fixture data: {fixture_data}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            fixture_table, fixture_data, self.fixture_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting fixture data for "
-                            f"uniqueFixtureId: {fixture_data['uniqueFixtureId']}."
-                            f" Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {fixture_data}")
-                        continue  # Skip this fixture_data
-
-                # 5. Insert match data
-                for match_data in match_data_list:
-                    print(f"Inserting match data: {match_data}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            match_table, match_data, self.match_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting match data for "
-                            f"uniqueMatchId: {match_data['uniqueMatchId']}."
-                            f" Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {match_data}")
-                        continue  # Skip this match_data
-
-                # 6. Insert period data
-                for period_row in period_data_list:
-                    print(f"Inserting period data: {period_row}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            period_table, period_row, self.period_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting period data for "
-                            f"uniquePeriodId: {period_row['uniquePeriodId']}."
-                            f" Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {period_row}")
-                        continue  # Skip this period_row
-
-                # 7. Insert score flow data
-                for score_flow_row in score_flow_data_list:
-                    print(f"Inserting score flow data: {score_flow_row}")
-                    try:
-                        self.db_helper.insert_data_dynamically(
-                            score_flow_table, score_flow_row,
-                            self.score_flow_fields)
-                    except mysql_error as err:
-                        self.error_logger.error(
-                            f"MySQL error inserting score flow data for "
-                            f"scoreFlowId: {score_flow_row['scoreFlowId']}."
-                            f" Error: {err}")
-                        self.error_logger.error(
-                            f"Data causing error: {score_flow_row}")
-                        continue  # Skip this score_flow_row
-
-                # Commit the transaction after successful batch insertion
-                self.connection.commit()
-                print(f"Transaction committed successfully for fixtureId: "
-                      f"{fixture_id}")
-
+                match_rows = self.match_rows(
+                    league_id, match_id, fixture_id, sport_id,
+                    fixture_year, sport_info_data, payload)
+                if match_rows is None:
+                    continue  # Skip to next match, fetched again next run
+                # Only a match that produced rows is recorded as stored
+                if len(match_rows['match']):
+                    written_match_ids.append(match_id)
+                    if ledger_update is not None:
+                        ledger_updates.append(ledger_update)
+                parsed_match_ids.append(match_id)
+                match_data_list.append(match_rows['match'], match_id)
+                player_info_list.append(match_rows['player'], match_id)
+                period_data_list.append(match_rows['period'], match_id)
+                score_flow_data_list.append(
+                    match_rows['score_flow'], match_id)
+
+            print(f"Collected {len(squad_info_list)} squad info entries.")
+            print(f"Collected {len(player_info_list)} player info entries.")
+            print(f"Collected {len(fixture_data_list)} fixture entries.")
+            print(f"Collected {len(match_data_list)} match entries.")
+            print(f"Collected {len(period_data_list)} period data entries.")
+            print(f"Collected {len(score_flow_data_list)} score flow "
+                  f"entries.")
+
+            # Insert data with individual error handling
+
+            # 1. Insert squad info
+            self.insert_rows(
+                'squad_info', squad_info_list, self.squad_fields, 'squadId',
+                staged=self.staging_merge)
+
+            # 2. Insert sport info
+            print(f"Inserting sport info: {sport_info_data}")
+            try:
+                self.db_helper.insert_data_dynamically(
+                    'sport_info', sport_info_data, self.sport_fields)
             except mysql_error as err:
-                # Log the error and rollback the transaction
                 self.error_logger.error(
-                    f"MySQL error during transaction for fixtureId: "
-                    f"{fixture_id}, leagueId: {league_id}. Error: {err}")
+                    f"MySQL error inserting sport info for fixtureId: "
+                    f"{fixture_id}. Error: {err}")
                 self.error_logger.error(
-                    f"MySQL Error Code: {err.errno}, SQLSTATE: {err.sqlstate}, "
-                    f"Message: {err.msg}")
+                    f"Data causing error: {sport_info_data}")
                 self.connection.rollback()
                 self.error_logger.error(
                     f"Transaction rolled back for fixtureId: {fixture_id}")
+                self.discard_pending_rows(pending_mark)
                 # Add the fixtureId to the broken fixtures list
                 self.add_broken_fixture(fixture_id)
-                continue  # Skip to the next fixture
-
+                return set()  # Skip to the next fixture
+
+            # 3. Insert player info
+            self.insert_rows(
+                'player_info', player_info_list, self.player_fields,
+                'playerId', staged=self.staging_merge)
+
+            # 4. Insert fixture data; a match whose rows fail anywhere is
+            # left out of the ledger, so the next run fetches it again
+            failed_match_ids = self.match_ids_of(self.insert_rows(
+                fixture_table, fixture_data_list, self.fixture_fields,
+                'uniqueFixtureId', staged=self.staging_merge))
+
+            # 5-7. Insert match, period and score flow data; written
+            # directly, each match has its own savepoint
+            match_tables = [
+                (match_table, match_data_list, self.match_fields,
+                 'uniqueMatchId'),
+                (period_table, period_data_list, self.period_fields,
+                 'uniquePeriodId'),
+                (score_flow_table, score_flow_data_list,
+                 self.score_flow_fields, 'scoreFlowId'),
+            ]
+            if (self.bulk_loader is None and self.write_scheduler is None
+                    and not self.staging_merge):
+                failed_match_ids |= self.insert_match_rows(
+                    parsed_match_ids, match_tables)
+            else:
+                for table_name, rows, json_fields, id_field in match_tables:
+                    failed_match_ids |= self.match_ids_of(self.insert_rows(
+                        table_name, rows, json_fields, id_field,
+                        staged=self.staging_merge))
+
+            # Merge the staged rows into the live tables
+            if self.staging_merge:
+                for table_name, count in self.db_helper.merge_staged().items():
+                    print(f"Merged {table_name}: {count} rows affected.")
+
+            # Commit the transaction after successful batch insertion
+            self.connection.commit()
+            print(f"Transaction committed successfully for fixtureId: "
+                  f"{fixture_id}")
+
+            # Remember the matches that are now stored, except the ones with
+            # rows that failed (fetched again by the next run); spooled and
+            # pending rows are only stored once they are written
+            if self.ledger is not None:
+                ledger_updates = [
+                    (league_id, *ledger_update)
+                    for ledger_update in ledger_updates
+                    if str(ledger_update[0]) not in failed_match_ids]
+                if self.bulk_loader is None and self.write_scheduler is None:
+                    self.save_ledger(ledger_updates)
+                else:
+                    self.pending_ledger_updates.extend(ledger_updates)
+
+            # Write the pending rows once enough leagues are collected
+            if self.write_scheduler is not None:
+                self.pending_fixture_ids.append(fixture_id)
+                if len(self.pending_fixture_ids) >= DEFAULT_BATCH_LEAGUES:
+                    self.flush_pending_writes()
+
+            return {match_id for match_id in written_match_ids
+                    if str(match_id) not in failed_match_ids
+                    } | unchanged_match_ids
+
+        except mysql_error as err:
+            # Log the error and rollback the transaction
+            self.error_logger.error(
+                f"MySQL error during transaction for fixtureId: "
+                f"{fixture_id}, leagueId: {league_id}. Error: {err}")
+            self.error_logger.error(
+                f"MySQL Error Code: {err.errno}, SQLSTATE: {err.sqlstate}, "
+                f"Message: {err.msg}")
+            self.connection.rollback()
+            self.error_logger.error(
+                f"Transaction rolled back for fixtureId: {fixture_id}")
+            self.discard_pending_rows(pending_mark)
+            # Add the fixtureId to the broken fixtures list
+            self.add_broken_fixture(fixture_id)
+            return set()  # Skip to the next fixture
+
+        except Exception as e:
+            # Log any other exceptions and rollback the transaction
+            self.error_logger.error(
+                f"Unexpected error during transaction for fixtureId: "
+                f"{fixture_id}, leagueId: {league_id}. Error: {e}")
+            self.error_logger.error(f"Traceback: {traceback.format_exc()}")
+            self.connection.rollback()
+            self.error_logger.error(
+                f"Transaction rolled back for fixtureId: {fixture_id}")
+            self.discard_pending_rows(pending_mark)
+            # Add the fixtureId to the broken fixtures list
+            self.add_broken_fixture(fixture_id)
+            return set()  # Skip to the next fixture
+
+    # Insert the rows of each match in a savepoint, so a match with a row
+    # that cannot be written is rolled back as a whole and the rest of the
+    # fixture is kept; returns the matchIds rolled back (as strings)
+    def insert_match_rows(self, match_ids, match_tables):
+        failed_match_ids = set()
+        for count, match_id in enumerate(match_ids, start=1):
+            self.db_helper.savepoint(MATCH_SAVEPOINT)
+            match_failed = False
+            try:
+                for table_name, rows, json_fields, id_field in match_tables:
+                    if self.insert_rows(table_name, rows.rows_of(match_id),
+                                        json_fields, id_field):
+                        match_failed = True
+                        break  # Its remaining rows are rolled back anyway
             except Exception as e:
-                # Log any other exceptions and rollback the transaction
                 self.error_logger.error(
-                    f"Unexpected error during transaction for fixtureId: "
-                    f"{fixture_id}, leagueId: {league_id}. Error: {e}")
-                self.error_logger.error(f"Traceback: {traceback.format_exc()}")
-                self.connection.rollback()
+                    f"Error inserting match {match_id}. Error: {e}")
+                match_failed = True
+            if match_failed:
                 self.error_logger.error(
-                    f"Transaction rolled back for fixtureId: {fixture_id}")
-                # Add the fixtureId to the broken fixtures list
+                    f"Rolling back the rows of match {match_id}, it is "
+                    f"fetched again by the next run.")
+                # Raises if the server already rolled back the whole
+                # transaction (e.g. a deadlock), failing the fixture
+                self.db_helper.rollback_to_savepoint(MATCH_SAVEPOINT)
+                failed_match_ids.add(str(match_id))
+                continue
+            self.db_helper.release_savepoint(MATCH_SAVEPOINT)
+            if self.commit_every and count % self.commit_every == 0:
+                self.connection.commit()
+        return failed_match_ids
+
+    # Position of the rows spooled for the bulk load or pending for the
+    # parallel writers
+    def mark_pending_rows(self):
+        if self.bulk_loader is not None:
+            return self.bulk_loader.mark()
+        return self.pending_writes.mark()
+
+    # Discard the rows spooled or pending since a mark and the staged rows of
+    # a league that is rolled back
+    def discard_pending_rows(self, pending_mark):
+        if self.bulk_loader is not None:
+            self.bulk_loader.discard_since(pending_mark)
+        else:
+            self.pending_writes.discard_since(pending_mark)
+        if self.staging_merge:
+            self.db_helper.discard_staged()
+
+    # Record matches as stored in the ledger and save it
+    def save_ledger(self, ledger_updates):
+        if self.ledger is None:
+            return
+        for ledger_update in ledger_updates:
+            self.ledger.record(*ledger_update)
+        self.ledger.save()
+
+    # Load the spooled rows of the bulk load mode, then save the ledger
+    def flush_bulk_load(self):
+        if self.bulk_loader is None:
+            return
+        ledger_updates, self.pending_ledger_updates = (
+            self.pending_ledger_updates, [])
+        try:
+            loaded = self.bulk_loader.flush()
+        except mysql_error as err:
+            self.error_logger.error(
+                f"MySQL error during the bulk load, the ledger is not "
+                f"saved. Error: {err}")
+            return
+        for table_name, count in loaded.items():
+            print(f"Bulk loaded {count} rows into {table_name}.")
+        self.save_ledger(ledger_updates)
+
+    # Write the pending rows with the parallel writers, then save the ledger
+    def flush_pending_writes(self):
+        if self.write_scheduler is None or not self.pending_writes:
+            return
+        plan, self.pending_writes = self.pending_writes, WritePlan()
+        fixture_ids, self.pending_fixture_ids = self.pending_fixture_ids, []
+        ledger_updates, self.pending_ledger_updates = (
+            self.pending_ledger_updates, [])
+        try:
+            failed = self.write_scheduler.write(plan)
+        except Exception as e:
+            self.error_logger.error(
+                f"Error writing the rows of fixtureIds {fixture_ids}, the "
+                f"ledger is not saved. Error: {e}")
+            for fixture_id in fixture_ids:
                 self.add_broken_fixture(fixture_id)
-                continue  # Skip to the next fixture
+            return
+        failed_match_ids = set()
+        for table_name, failed_rows in failed.items():
+            print(f"Wrote {plan.row_count(table_name) - len(failed_rows)} "
+                  f"rows into {table_name}.")
+            self.log_failed_rows(
+                table_name, failed_rows, plan.tables[table_name][1])
+            failed_match_ids |= self.match_ids_of(failed_rows)
+        # Matches with rows that failed are fetched again by the next run
+        self.save_ledger([ledger_update for ledger_update in ledger_updates
+                          if str(ledger_update[1]) not in failed_match_ids])
+
+    # Determine the sport category, sport id and year of a league
+    def resolve_sport(self, league, fixture_rows, sport=None):
+        """
+        sport is the SportClassification already made for the league by
+        Fixture; without it the league is classified from fixture_rows.
+        """
+        league_id = league['id']
+        league_name = league['league_season']
+
+        if sport is None:
+            # Extract squad ids from fixture data
+            squad_ids = pd.unique(
+                fixture_rows[['homeSquadId', 'awaySquadId']].values.ravel()
+            ).tolist()
+            print(f"Extracted squad IDs: {squad_ids}")
+            sport = classify_league(
+                league_id, league['regulationPeriods'], squad_ids,
+                league_name)
+        sport_category, sport_id = sport
+
+        # Log the normalized category
+        self.info_logger.info(
+            f"Normalized sport category: '{sport_category}' "
+            f"for league: {league_id}")
+        if sport_id is not None:
+            self.info_logger.info(
+                f"Sport ID found: {sport_id} for category: "
+                f"'{sport_category}'")
+        else:
+            self.error_logger.error(
+                f"Sport category '{sport_category}' not found in "
+                f"sport_id_map for league {league_id}.")
+
+        match_year = re.search(r'\b(20\d{2})\b', league_name)
+        fixture_year = match_year.group(1) if match_year else None
+        return sport_category, sport_id, fixture_year
+
+    # Build the sport_info row of a league
+    @staticmethod
+    def sport_info_row(sport_id, sport_category, fixture_id, league_name,
+                       fixture_year):
+        return {
+            'sportId': str(sport_id),
+            'sportName': sport_category,
+            'fixtureId': str(fixture_id),
+            'fixtureTitle': league_name,
+            'fixtureYear': fixture_year,
+            'uniqueSportId': f"{sport_id}-{fixture_id}"
+            if sport_id and fixture_id else 'Unknown'
+        }
 
-        # At the end, write the broken fixtures list to the JSON file
-        with open(self.broken_fixtures_file, 'w') as f:
-            json.dump(self.broken_fixtures, f)
+    # Build the fixture row of a match and the squad rows not seen yet
+    def fixture_rows(self, match_row, fixture_id, sport_id, sport_info_data,
+                     processed_unique_squad_ids):
+        match_id = match_row['matchId'] or 'Unknown'
+
+        # Generate uniqueFixtureId
+        uniqueFixtureId = f"{fixture_id}-{match_id}"
+        print(f"Unique fixture ID: {uniqueFixtureId}")
+
+        # Ensure matchName is populated
+        match_name = match_row.get('matchName') or (
+            f"{match_row['homeSquadName']} vs "
+            f"{match_row['awaySquadName']} | "
+            f"{match_row['localStartTime']}")
+
+        # Log uniqueMatchId
+        uniqueMatchId = f"{match_id}-{fixture_id}"
+        self.info_logger.info(
+            f"Generated uniqueMatchId: {uniqueMatchId} for "
+            f"match {match_id}.")
+
+        # Collect fixture data
+        fixture_data = {
+            **match_row,
+            'fixtureId': fixture_id,
+            'sportId': sport_id,
+            'matchId': match_id,
+            'uniqueFixtureId': uniqueFixtureId,
+            'matchName': match_name,
+            'uniqueSportId': sport_info_data['uniqueSportId']
+        }
+
+        # Collect squad info for both home and away
+        squad_rows = []
+        for squad_side in ['home', 'away']:
+            squad_id = str(match_row.get(
+                f'{squad_side}SquadId', 'Unknown'))
+            squad_name_raw = match_row.get(
+                f'{squad_side}SquadName', '')
+            # Handle NaN values for squad_name
+            if not isinstance(squad_name_raw, str) or pd.isnull(
+                    squad_name_raw):
+                squad_name = 'Unknown Squad'
+            else:
+                squad_name = squad_name_raw.strip()
+
+            # Generate uniqueSquadId
+            uniqueSquadId = f"{squad_id}-{squad_name}"
+            self.info_logger.info(
+                f"Generated uniqueSquadId: {uniqueSquadId} "
+                f"for {squad_side} side in match {match_id}.")
+
+            if uniqueSquadId not in processed_unique_squad_ids:
+                squad_info_data = {
+                    'squadId': squad_id,
+                    'squadName': squad_name,
+                    'uniqueSquadId': uniqueSquadId,
+                    'fixtureTitle': sport_info_data[
+                        'fixtureTitle'],
+                    'fixtureYear': sport_info_data['fixtureYear']
+                }
+                squad_rows.append(squad_info_data)
+                processed_unique_squad_ids.add(uniqueSquadId)
+        return fixture_data, squad_rows
+
+    # Resolve the names of the rows without a usable playerId of a league's
+    # payloads in one batch, so unmatched names are fuzzy matched once per
+    # league instead of once per match
+    def resolve_league_players(self, league_id, fixture_id, sport_id,
+                               fixture_year, sport_info_data, payloads):
+        names = []
+        for match_id, payload in payloads.items():
+            names.extend(MatchRecordParser(
+                league_id, match_id, fixture_id, sport_id, fixture_year,
+                sport_info_data['uniqueSportId'],
+                self.player_index.resolve_many,
+                {'match': self.match_fields, 'player': self.player_fields,
+                 'period': self.period_fields,
+                 'score_flow': self.score_flow_fields},
+                self.error_logger, payload=payload).player_names())
+        if names:
+            self.player_index.resolve_many(names)
+            print(f"Resolved {len(set(names))} player names for league "
+                  f"{league_id}.")
+
+    # Build the match, player info, period and score flow rows of a match
+    def match_rows(self, league_id, match_id, fixture_id, sport_id,
+                   fixture_year, sport_info_data, payload):
+        """
+        Returns a dict of row lists keyed by 'match', 'player', 'period'
+        and 'score_flow', or None if the match has no usable data.
+        """
+        if self.pipeline == 'records':
+            return MatchRecordParser(
+                league_id, match_id, fixture_id, sport_id, fixture_year,
+                sport_info_data['uniqueSportId'],
+                self.player_index.resolve_many,
+                {'match': self.match_fields, 'player': self.player_fields,
+                 'period': self.period_fields,
+                 'score_flow': self.score_flow_fields},
+                self.error_logger, payload=payload).parse()
+
+        transform = MatchTransform(
+            match_id, fixture_id, sport_id,
+            sport_info_data['uniqueSportId'], self.player_index.resolve_many,
+            self.error_logger)
+
+        # Fetch match data
+        match = Match(
+            league_id, match_id, fixture_id, sport_id,
+            fixture_year, payload=payload)
+        match.fetch_data()
+
+        if match.data.empty:
+            self.error_logger.warning(
+                f"Match data is empty for matchId: {match_id}, "
+                f"leagueId: {league_id}.")
+            return None  # Skip to next match
+
+        print(f"Fetched {len(match.data)} match records for "
+              f"match {match_id}.")
+
+        # Ensure 'firstname' and 'surname' are in match.data
+        if 'firstname' not in match.data.columns or 'surname' not \
+                in match.data.columns:
+            self.error_logger.error(
+                f"'firstname' or 'surname' not found in match "
+                f"data for matchId: {match_id}. Skipping match.")
+            return None  # Skip this match
+
+        # Process and collect match data
+        match_data_list, player_info_list = transform.match_records(
+            match.data)
+        print(f"Collected {len(match_data_list)} match entries "
+              f"for match {match_id}.")
+
+        # Fetch period data
+        period_data_list = []
+        period_data = PeriodData(
+            league_id, match_id, payload=payload)
+        period_data.fetch_data()
+        print(f"Fetched {len(period_data.data)} period records "
+              f"for match {match_id}.")
+
+        if not period_data.data.empty:
+            # Ensure 'firstname' and 'surname' are present
+            if 'firstname' not in period_data.data.columns or \
+                    'surname' not in period_data.data.columns:
+                self.error_logger.error(
+                    f"'firstname' or 'surname' not found in "
+                    f"period data for matchId: {match_id}. "
+                    f"Skipping period data.")
+            else:
+                period_data_list = transform.period_records(
+                    period_data.data)
+
+        # Fetch score flow data
+        score_flow_data_list = []
+        score_flow = ScoreFlow(
+            league_id, match_id, payload=payload)
+        score_flow.fetch_data()
+        print(f"Fetched {len(score_flow.data)} score flow records "
+              f"for match {match_id}.")
+        if not score_flow.data.empty:
+            if 'firstname' not in score_flow.data.columns or \
+                    'surname' not in score_flow.data.columns:
+                self.error_logger.error(
+                    f"'firstname' or 'surname' not found in "
+                    f"score flow data for matchId: {match_id}. "
+                    f"Skipping score flow data.")
+            else:
+                score_flow_data_list = transform.score_flow_records(
+                    score_flow.data)
+
+        return {
+            'match': match_data_list,
+            'player': player_info_list,
+            'period': period_data_list,
+            'score_flow': score_flow_data_list,
+        }
+
+    # Insert rows with multi-row statements, logging and skipping the rows
+    # that fail, and return the (row, error) pairs of those; in bulk load
+    # mode the rows are spooled instead, with parallel writers they are
+    # queued for the next flush, and staged rows go to the staging table of
+    # the table (see staging_merge)
+    def insert_rows(self, table_name, rows, json_fields, id_field,
+                    staged=False):
+        if self.bulk_loader is not None:
+            self.bulk_loader.add(table_name, rows, json_fields)
+            return []
+        if self.write_scheduler is not None:
+            self.pending_writes.add(table_name, rows, json_fields, id_field)
+            return []
+        rows = list(rows)
+        if not rows:
+            return []
+        if staged:
+            print(f"Staging {len(rows)} rows for {table_name}")
+            failed = self.db_helper.stage_rows(table_name, rows, json_fields)
+        else:
+            print(f"Inserting {len(rows)} rows into {table_name}")
+            failed = self.db_helper.insert_rows_batch(
+                table_name, rows, json_fields)
+        self.log_failed_rows(table_name, failed, id_field)
+        return failed
+
+    # matchIds (as strings) of the rows that could not be written
+    @staticmethod
+    def match_ids_of(failed):
+        return {str(row.get('matchId')) for row, _ in failed
+                if row.get('matchId') is not None}
+
+    # Log the rows that could not be written
+    def log_failed_rows(self, table_name, failed, id_field):
+        for row, err in failed:
+            self.error_logger.error(
+                f"MySQL error inserting into {table_name} for "
+                f"{id_field}: {row.get(id_field)}. Error: {err}")
+            self.error_logger.error(f"Data causing error: {row}")
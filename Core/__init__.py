@@ -1,4 +1,5 @@
 from .LeaguesList import League
 from .FixtureDetails import Fixture
+from .MatchPayload import MatchPayload
 from .MatchDetails import Match
 from .Scraper import Scraper
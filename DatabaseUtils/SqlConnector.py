@@ -1,18 +1,26 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
+
+# Connection settings of the powerdata database
+DB_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 3306,
+    'user': 'root',
+    'password': 'powerdata',
+    'database': 'powerdata',
+}
 
 
 # Function to establish a connection to the MySQL database
-def connect():
-    """Establish and return a connection to the MySQL database using mysql-connector."""
+def connect(local_infile_dir=None):
+    """
+    Establish and return a connection to the MySQL database using mysql-connector.
+    local_infile_dir allows LOAD DATA LOCAL INFILE, for the files of that directory only.
+    """
     try:
-        connection = mysql.connector.connect(
-            host='127.0.0.1',  
-            port=3306,  
-            user='root',  
-            password='powerdata',  
-            database='powerdata'  
-        )
+        options = {'allow_local_infile_in_path': local_infile_dir} if local_infile_dir else {}
+        connection = mysql.connector.connect(**DB_CONFIG, **options)
         if connection.is_connected():
             print("Successfully connected to the MySQL database 'powerdata'.")
             return connection
@@ -21,6 +29,18 @@ def connect():
         return None
 
 
+# Function to create a pool of connections to the MySQL database
+def connect_pool(pool_size, pool_name='powerdata'):
+    """Create and return a pool of pool_size connections (at most 32), for writers running in parallel."""
+    try:
+        pool = pooling.MySQLConnectionPool(pool_name=pool_name, pool_size=pool_size, **DB_CONFIG)
+        print(f"Created a pool of {pool_size} connections to the MySQL database 'powerdata'.")
+        return pool
+    except Error as e:
+        print(f"Error creating the MySQL connection pool: {e}")
+        return None
+
+
 # Function to select a database
 def execute_query_from_file(connection, sql_file_path, parameters=None):
     """Executes a query from a given SQL file with optional parameters."""
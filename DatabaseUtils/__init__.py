@@ -1,2 +1,4 @@
-from .SqlConnector import connect
+from .SqlConnector import connect, connect_pool
 from .database_helper import DatabaseHelper
+from .player_index import PlayerIndex
+from .write_scheduler import WritePlan, WriteScheduler
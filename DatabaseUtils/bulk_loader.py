@@ -0,0 +1,205 @@
+import math
+import os
+import tempfile
+import mysql.connector
+
+# Directory of the spooled TSV files, the only one the connection may send with LOAD DATA LOCAL INFILE
+BULK_DIR = os.path.join(tempfile.gettempdir(), "powerdata_bulk")
+# How rows whose primary or unique key is already stored are handled
+DUPLICATE_MODES = ('ignore', 'replace')
+# NULL in the TSV files
+NULL = '\\N'
+
+# Characters escaped in a TSV field (ESCAPED BY '\\')
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+# Text of a value in a TSV field: None and NaN are NULL, booleans are 1 and 0
+def tsv_field(value):
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return NULL if math.isnan(value) else repr(value)
+    if isinstance(value, int):
+        return str(value)
+    return str(value).translate(TSV_ESCAPES)
+
+
+# One TSV line of a tuple of values
+def tsv_line(values):
+    return '\t'.join(map(tsv_field, values)) + '\n'
+
+
+# Statement loading a TSV file written by tsv_line into the given columns of a table
+def load_data_query(table_name, fields, duplicates='ignore'):
+    if duplicates not in DUPLICATE_MODES:
+        raise ValueError(f"Unknown duplicate handling {duplicates!r}, expected one of {DUPLICATE_MODES}.")
+    return f"""
+    LOAD DATA LOCAL INFILE %s
+    {duplicates.upper()} INTO TABLE {table_name}
+    CHARACTER SET utf8mb4
+    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+    LINES TERMINATED BY '\\n'
+    ({', '.join(fields)})
+    """
+
+
+class BulkLoader:
+    """
+    Bulk-load path for full-history backfills into empty or rebuilt tables: the rows of each table are streamed
+    to a TSV file while the leagues are scraped, and every file is ingested with one LOAD DATA LOCAL INFILE on
+    flush(), in the order the tables were first added (the scraper adds parents before children).
+    Duplicate keys are ignored (the stored row is kept, not updated) by default, so it is not a way to correct
+    stored rows; 'replace' deletes and reinserts the stored row instead, which fails for rows referenced by a
+    foreign key. As with any LOAD DATA IGNORE, rows that
+    violate a foreign key and values that do not fit their column are reported as warnings, not errors.
+    With defer_indexes, the non-unique secondary indexes of a table (other than those backing a foreign key)
+    are dropped before its load and rebuilt in one ALTER TABLE after it.
+    The connection must be opened with local_infile_dir=BULK_DIR and the server must have local_infile ON.
+    """
+    def __init__(self, db_helper, duplicates='ignore', defer_indexes=False, spool_dir=BULK_DIR):
+        if duplicates not in DUPLICATE_MODES:
+            raise ValueError(f"Unknown duplicate handling {duplicates!r}, expected one of {DUPLICATE_MODES}.")
+        self.db_helper = db_helper
+        self.connection = db_helper.connection
+        self.info_logger = db_helper.info_logger
+        self.error_logger = db_helper.error_logger
+        self.duplicates = duplicates
+        self.defer_indexes = defer_indexes
+        self.spool_dir = spool_dir
+        self.spools = {}  # Table name -> [statement, file, path, row count], in the order the tables were added
+
+    # Stream rows of a table to its TSV file; returns the number of rows written
+    def add(self, table_name, rows, json_fields):
+        spool = self.spools.get(table_name)
+        if spool is None:
+            statement = self.db_helper.statements.get(table_name, json_fields)
+            if statement is None:
+                self.error_logger.error(f"Table {table_name} does not exist or has no columns, its rows are not loaded.")
+                return 0
+            os.makedirs(self.spool_dir, exist_ok=True)
+            handle, path = tempfile.mkstemp(prefix=f"{table_name}_", suffix=".tsv", dir=self.spool_dir)
+            spool = self.spools[table_name] = [statement, os.fdopen(handle, 'wb'), path, 0]
+        statement, file, _, _ = spool
+        count = 0
+        for row in rows:
+            file.write(tsv_line(statement.values(row)).encode('utf-8'))
+            count += 1
+        spool[3] += count
+        return count
+
+    # Position of every spool, to discard the rows added after it (e.g. by a fixture that is rolled back)
+    def mark(self):
+        return {table_name: (file.tell(), count) for table_name, (_, file, _, count) in self.spools.items()}
+
+    # Discard the rows added since a mark
+    def discard_since(self, mark):
+        for table_name, spool in self.spools.items():
+            position, count = mark.get(table_name, (0, 0))
+            spool[1].truncate(position)
+            spool[1].seek(position)
+            spool[3] = count
+
+    # Load every spooled table; returns {table name: rows in its file}
+    def flush(self):
+        loaded = {}
+        try:
+            self.check_local_infile()
+            for table_name, (statement, file, path, count) in self.spools.items():
+                file.close()
+                if count:
+                    self.load_file(table_name, statement.fields, path)
+                loaded[table_name] = count
+        finally:
+            self.close()
+        return loaded
+
+    # Remove the spooled files without loading them
+    def close(self):
+        for _, file, path, _ in self.spools.values():
+            file.close()
+            if os.path.exists(path):
+                os.remove(path)
+        self.spools.clear()
+
+    # Fail early with a clear message when the server refuses LOAD DATA LOCAL
+    def check_local_infile(self):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT @@local_infile")
+            enabled = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        if not int(enabled):
+            raise mysql.connector.Error(msg="LOAD DATA LOCAL INFILE is disabled on the server, enable it with SET GLOBAL local_infile = 1.")
+
+    # Ingest one TSV file and commit
+    def load_file(self, table_name, fields, path):
+        indexes = self.drop_secondary_indexes(table_name) if self.defer_indexes else []
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(load_data_query(table_name, fields, self.duplicates), (path,))
+            self.info_logger.info(f"Loaded {cursor.rowcount} rows into {table_name} from {path}.")
+            if cursor.warning_count:
+                self.db_helper.log_warnings(cursor, f"loading {table_name}")
+            self.connection.commit()
+        except mysql.connector.Error as err:
+            self.error_logger.error(f"MySQL error loading {path} into {table_name}: {err}")
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            if indexes:
+                self.add_indexes(table_name, indexes)
+
+    # Drop the non-unique secondary indexes that no foreign key needs; returns their definitions
+    def drop_secondary_indexes(self, table_name):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("""
+            SELECT INDEX_NAME, COLUMN_NAME, SUB_PART
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = %s
+              AND INDEX_NAME <> 'PRIMARY'
+              AND NON_UNIQUE = 1
+              AND INDEX_TYPE = 'BTREE'
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+            """, (table_name,))
+            indexes = {}
+            for index_name, column, sub_part in cursor.fetchall():
+                indexes.setdefault(index_name, []).append((column, sub_part))
+
+            cursor.execute("""
+            SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+            UNION
+            SELECT REFERENCED_COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s
+            """, (table_name, table_name))
+            foreign_key_columns = {row[0] for row in cursor.fetchall()}
+
+            # Functional indexes (no column) and indexes backing a foreign key are kept
+            deferred = [(name, columns) for name, columns in indexes.items()
+                        if all(column is not None and column not in foreign_key_columns for column, _ in columns)]
+            if deferred:
+                cursor.execute(f"ALTER TABLE {table_name} " + ', '.join(f"DROP INDEX `{name}`" for name, _ in deferred))
+                self.info_logger.info(f"Dropped {len(deferred)} secondary indexes of {table_name} until it is loaded.")
+            return deferred
+        finally:
+            cursor.close()
+
+    # Rebuild dropped secondary indexes in one statement
+    def add_indexes(self, table_name, indexes):
+        definitions = []
+        for name, columns in indexes:
+            parts = ', '.join(f"`{column}`({sub_part})" if sub_part else f"`{column}`" for column, sub_part in columns)
+            definitions.append(f"ADD INDEX `{name}` ({parts})")
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"ALTER TABLE {table_name} " + ', '.join(definitions))
+            self.info_logger.info(f"Rebuilt {len(indexes)} secondary indexes of {table_name}.")
+        finally:
+            cursor.close()
@@ -1,4 +1,45 @@
+import itertools
 import mysql.connector
+from collections import namedtuple
+from mysql.connector import errorcode
+from .statement_registry import StatementRegistry
+
+# Share of max_allowed_packet one multi-row statement may fill, leaving room for escaping
+PACKET_FILL = 0.8
+# max_allowed_packet assumed when the server cannot be asked (the MySQL 5.7 default)
+DEFAULT_MAX_ALLOWED_PACKET = 4 * 1024 * 1024
+# Estimated bytes around each value in a statement (quotes and separator)
+VALUE_OVERHEAD = 3
+# Suffix of the session-scoped staging table of a table
+STAGING_SUFFIX = '_staging'
+# Warnings of a statement written to the error log
+MAX_LOGGED_WARNINGS = 10
+# Errors showing that the cached schema of a table is stale: the table was dropped, or rebuilt with other columns
+STALE_SCHEMA_ERRORS = (errorcode.ER_NO_SUCH_TABLE, errorcode.ER_BAD_FIELD_ERROR, errorcode.ER_NEED_REPREPARE)
+
+# Columns of every table of the current database, with whether they are part of the primary key
+SCHEMA_QUERY = """
+SELECT c.TABLE_NAME, c.COLUMN_NAME, k.COLUMN_NAME IS NOT NULL
+FROM INFORMATION_SCHEMA.COLUMNS c
+LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+  ON k.TABLE_SCHEMA = c.TABLE_SCHEMA
+ AND k.TABLE_NAME = c.TABLE_NAME
+ AND k.COLUMN_NAME = c.COLUMN_NAME
+ AND k.CONSTRAINT_NAME = 'PRIMARY'
+WHERE c.TABLE_SCHEMA = DATABASE()
+ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+# Tables referenced by the foreign keys of every table of the current database
+REFERENCES_QUERY = """
+SELECT DISTINCT TABLE_NAME, REFERENCED_TABLE_NAME
+FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+WHERE TABLE_SCHEMA = DATABASE()
+  AND REFERENCED_TABLE_NAME IS NOT NULL
+"""
+
+# Cached metadata of one table
+TableSchema = namedtuple('TableSchema', ['columns', 'primary_keys'])
 
 # Define a class to handle database operations
 class DatabaseHelper:
@@ -6,9 +47,105 @@ class DatabaseHelper:
         self.connection = connection
         self.info_logger = info_logger
         self.error_logger = error_logger
+        self._max_allowed_packet = None
+        self._schema = {}  # Table name -> TableSchema
+        self._schema_loaded = False
+        self._references = None  # Table name -> tables its foreign keys reference
+        self.statements = StatementRegistry(self)  # Compiled upserts per (table, field spec)
+        self._staged = {}  # Table name -> (staging table, fields), in the order the tables were staged
 
-    # Define a method to fetch column names from a given database table
+    # Define a method to load the columns and primary keys of every table in one query
+    def load_schema(self):
+        """Cache the columns and primary keys of every table of the current database."""
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(SCHEMA_QUERY)
+            tables = {}
+            for table_name, column, is_primary in cursor.fetchall():
+                columns, primary_keys = tables.setdefault(table_name, ([], []))
+                columns.append(column)
+                if is_primary:
+                    primary_keys.append(column)
+            for table_name, (columns, primary_keys) in tables.items():
+                self._schema[table_name] = TableSchema(tuple(columns), tuple(primary_keys))
+            self.info_logger.debug(f"Loaded the schema of {len(tables)} tables.")
+        except Exception as e:
+            self.error_logger.error(f"Error loading the schema, falling back to per table queries: {e}")
+        finally:
+            self._schema_loaded = True  # Not retried, tables missing from it are loaded one by one
+            if cursor is not None:
+                cursor.close()
+
+    # Define a method to get the cached metadata of a table
+    def table_schema(self, table_name):
+        """Columns and primary keys of a table, queried only the first time the table is used."""
+        schema = self._schema.get(table_name)
+        if schema is None and not self._schema_loaded:
+            self.load_schema()
+            schema = self._schema.get(table_name)
+        if schema is None:
+            columns = tuple(self.fetch_table_columns(table_name))
+            if not columns:  # A missing table is asked again, it may be created later
+                return TableSchema((), ())
+            schema = self._schema[table_name] = TableSchema(columns, tuple(self.fetch_primary_keys(table_name)))
+        return schema
+
+    # Define a method to get the tables referenced by the foreign keys of every table (cached)
+    def get_references(self):
+        """Returns {table name: set of the tables it references}, or None if the foreign keys cannot be read."""
+        if self._references is None:
+            cursor = None
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute(REFERENCES_QUERY)
+                references = {}
+                for table_name, referenced_table in cursor.fetchall():
+                    references.setdefault(table_name, set()).add(referenced_table)
+                self._references = references
+            except Exception as e:
+                self.error_logger.error(f"Error fetching the foreign keys: {e}")
+                return None
+            finally:
+                if cursor is not None:
+                    cursor.close()
+        return self._references
+
+    # Define a method to drop the cached metadata, after tables are dropped or recreated
+    def invalidate_schema(self, table_name=None):
+        """Forget the cached metadata and compiled upserts of a table, or of every table."""
+        if table_name is None:
+            self._schema.clear()
+            self._schema_loaded = False
+        else:
+            self._schema.pop(table_name, None)
+        self._references = None
+        self.statements.clear(table_name)  # Their statements were built from the old columns
+
+    # Define a method to drop the cached metadata of a table when an error shows it is stale
+    def invalidate_stale_schema(self, table_name, err):
+        """
+        The cache lives as long as this DatabaseHelper, so a process running while the tables are rebuilt
+        (e.g. by reconstructor.py) finds out from its failing statements. Returns True if err was such an error.
+        """
+        if getattr(err, 'errno', None) not in STALE_SCHEMA_ERRORS:
+            return False
+        self.error_logger.error(f"The cached schema of {table_name} is stale, reloading it on its next use: {err}")
+        self.invalidate_schema(table_name)
+        return True
+
+    # Define a method to get the column names of a table
     def get_table_columns(self, table_name):
+        """Column names of a table (cached)."""
+        return list(self.table_schema(table_name).columns)
+
+    # Define a method to get the primary key columns of a table
+    def get_primary_keys(self, table_name):
+        """Primary key columns of a table (cached)."""
+        return list(self.table_schema(table_name).primary_keys)
+
+    # Define a method to fetch column names from a given database table
+    def fetch_table_columns(self, table_name):
         """Fetch column names from a given database table."""
         try:
             cursor = self.connection.cursor()
@@ -23,10 +160,78 @@ class DatabaseHelper:
             cursor.close()  # Ensure cursor is closed even if there's an error
         return columns
 
+    # Define a method to build the upsert statement of a table for the fields of its JSON spec
+    def build_upsert(self, table_name, json_fields, into=None):
+        """
+        Returns the INSERT ... ON DUPLICATE KEY UPDATE statement (INSERT IGNORE if every field is a primary key)
+        and the fields it inserts, or (None, []) if the table does not exist or has no columns.
+        into is the table written to when it is not table_name itself (a staging table of the same shape).
+        """
+        target = into or table_name
+        # Extract 'required_fields' and 'optional_fields' from the JSON fields
+        required_fields = json_fields.get('required_fields', [])
+        optional_fields = json_fields.get('optional_fields', [])
+
+        # Combine required and optional fields
+        available_fields = required_fields + optional_fields
+
+        # Get the actual table columns from the database
+        columns = self.get_table_columns(table_name)
+
+        # Check if the table exists and has columns
+        if not columns:
+            self.error_logger.error(f"Table {table_name} does not exist or has no columns.")
+            return None, []
+
+        # Find which fields from the data_dict can be inserted into the table (matching columns)
+        matched_fields = [field for field in available_fields if field in columns]
+
+        # Remove duplicates while preserving order
+        seen = set()
+        matched_fields = [x for x in matched_fields if not (x in seen or seen.add(x))]
+
+        # Prepare SQL placeholders and the query
+        placeholders = ', '.join(['%s'] * len(matched_fields))
+        columns_formatted = ', '.join(matched_fields)
+
+        # Prepare the ON DUPLICATE KEY UPDATE part
+        # Exclude primary keys from the update statement to avoid issues
+        primary_keys = self.get_primary_keys(table_name)
+        update_fields = [field for field in matched_fields if field not in primary_keys]
+
+        # If there are fields to update, construct the update clause
+        if update_fields:
+            update_clause = ', '.join([f"{field}=VALUES({field})" for field in update_fields])
+            query = f"""
+            INSERT INTO {target} ({columns_formatted}) 
+            VALUES ({placeholders})
+            ON DUPLICATE KEY UPDATE {update_clause}
+            """
+        else:
+            # If there are no fields to update, perform a simple insert
+            query = f"INSERT IGNORE INTO {target} ({columns_formatted}) VALUES ({placeholders})"
+        return query, matched_fields
+
+    # Define a method to build the statement merging a staging table into its target table
+    def build_merge(self, table_name, fields, staging_table):
+        """
+        INSERT IGNORE ... SELECT ... ON DUPLICATE KEY UPDATE of the fields from staging_table into table_name.
+        IGNORE skips the rows that violate a foreign key (the staging table has none) with a warning,
+        like the row by row upsert skips them, instead of failing the whole merge.
+        """
+        columns_formatted = ', '.join(fields)
+        primary_keys = self.get_primary_keys(table_name)
+        update_fields = [field for field in fields if field not in primary_keys]
+        query = f"INSERT IGNORE INTO {table_name} ({columns_formatted}) SELECT {columns_formatted} FROM {staging_table}"
+        if update_fields:
+            query += " ON DUPLICATE KEY UPDATE " + ', '.join([f"{field}=VALUES({field})" for field in update_fields])
+        return query
+
     # Define a method to insert data dynamically into a table
     def insert_data_dynamically(self, table_name, data_dict, json_fields):
         """
         Insert or update data dynamically into the table by matching fields between data and table.
+        Does not commit or roll back: the row belongs to the caller's transaction.
         Parameters:
             table_name (str): Name of the table to insert data into.
             data_dict (dict): Dictionary containing data to be inserted.
@@ -34,88 +239,210 @@ class DatabaseHelper:
         """
         # Check if the table exists in the database
         try:
-            # Extract 'required_fields' and 'optional_fields' from the JSON fields
-            required_fields = json_fields.get('required_fields', [])
-            optional_fields = json_fields.get('optional_fields', [])
-
-            # Combine required and optional fields
-            available_fields = required_fields + optional_fields
-
-            # Get the actual table columns from the database
-            columns = self.get_table_columns(table_name)
-
-            # Check if the table exists and has columns
-            if not columns:
-                self.error_logger.error(f"Table {table_name} does not exist or has no columns.")
+            statement = self.statements.get(table_name, json_fields)
+            if statement is None:
                 return
 
-            # Find which fields from the data_dict can be inserted into the table (matching columns)
-            matched_fields = [field for field in available_fields if field in columns]
-
-            # Remove duplicates while preserving order
-            seen = set()
-            matched_fields = [x for x in matched_fields if not (x in seen or seen.add(x))]
-
-            # Extract the values for the matched fields, ensuring missing fields are handled appropriately
-            values = []
-            for field in matched_fields:
-                value = data_dict.get(field, None)
-
-                # Handle None or missing values differently based on the expected data type
-                if isinstance(value, (int, float)) or value is None:
-                    # If the value is None or numeric, leave it as None (SQL will treat it as NULL)
-                    value = value if value is not None else None
-                else:
-                    # If the value is a string, use an empty string for missing string fields
-                    value = value if value != '' else ''
-
-                values.append(value)
-
-            # Prepare SQL placeholders and the query
-            placeholders = ', '.join(['%s'] * len(matched_fields))
-            columns_formatted = ', '.join(matched_fields)
-
-            # Prepare the ON DUPLICATE KEY UPDATE part
-            # Exclude primary keys from the update statement to avoid issues
-            primary_keys = self.get_primary_keys(table_name)
-            update_fields = [field for field in matched_fields if field not in primary_keys]
-
-            # If there are fields to update, construct the update clause
-            if update_fields:
-                update_clause = ', '.join([f"{field}=VALUES({field})" for field in update_fields])
-                query = f"""
-                INSERT INTO {table_name} ({columns_formatted}) 
-                VALUES ({placeholders})
-                ON DUPLICATE KEY UPDATE {update_clause}
-                """
-            else:
-                # If there are no fields to update, perform a simple insert
-                query = f"INSERT IGNORE INTO {table_name} ({columns_formatted}) VALUES ({placeholders})"
+            # Extract the values for the matched fields, missing fields are inserted as NULL
+            values = statement.values(data_dict)
 
             # Logging the SQL query for debugging purposes
-            self.info_logger.debug(f"Executing query on table {table_name}: {query}")
+            self.info_logger.debug(f"Executing query on table {table_name}: {statement.query}")
             self.info_logger.debug(f"With values: {values}")
 
-            cursor = self.connection.cursor()
-            cursor.execute(query, values)
-            self.connection.commit()
+            statement.execute(values)
 
-        # Handle exceptions
+        # Handle exceptions, the caller rolls back its transaction or savepoint
         except mysql.connector.Error as err:
             self.error_logger.error(f"MySQL error inserting data into {table_name}: {err}")
             self.error_logger.error(f"MySQL Error Code: {err.errno}, SQLSTATE: {err.sqlstate}, Message: {err.msg}")
             self.error_logger.error(f"Data causing error: {data_dict}")
-            self.connection.rollback()  # Rollback in case of any error
+            self.invalidate_stale_schema(table_name, err)
             raise  # Re-raise the exception to be handled upstream
         except Exception as e:
             self.error_logger.error(f"Error inserting data into {table_name}: {e}. Data: {data_dict}")
-            self.connection.rollback()  # Rollback in case of any error
             raise  # Re-raise the exception to be handled upstream
+
+    # Define a method to run a savepoint statement of the current transaction
+    def _savepoint_statement(self, statement):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    # Define a method to set a savepoint in the current transaction
+    def savepoint(self, name):
+        """Set (or move) the savepoint name in the current transaction."""
+        self._savepoint_statement(f"SAVEPOINT {name}")
+
+    # Define a method to undo the writes made since a savepoint
+    def rollback_to_savepoint(self, name):
+        """Undo the writes made since the savepoint; the rest of the transaction is kept."""
+        self._savepoint_statement(f"ROLLBACK TO SAVEPOINT {name}")
+
+    # Define a method to release a savepoint
+    def release_savepoint(self, name):
+        """Forget the savepoint, keeping its writes in the transaction."""
+        self._savepoint_statement(f"RELEASE SAVEPOINT {name}")
+
+    # Define a method to fetch the server's max_allowed_packet, once per connection
+    def max_allowed_packet(self):
+        """Largest statement the server accepts, in bytes."""
+        if self._max_allowed_packet is None:
+            cursor = None
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute("SELECT @@max_allowed_packet")
+                self._max_allowed_packet = int(cursor.fetchone()[0])
+            except Exception as e:
+                self.error_logger.error(f"Error fetching max_allowed_packet, assuming {DEFAULT_MAX_ALLOWED_PACKET} bytes: {e}")
+                self._max_allowed_packet = DEFAULT_MAX_ALLOWED_PACKET
+            finally:
+                if cursor is not None:
+                    cursor.close()
+        return self._max_allowed_packet
+
+    # Define a method to group rows into chunks that fit in one statement
+    @staticmethod
+    def chunk_rows(rows, statement, budget):
+        """Yields lists of (row, values) whose estimated encoded size stays under budget bytes (at least one row each)."""
+        chunk = []
+        size = 0
+        for row in rows:
+            values = statement.values(row)
+            row_size = sum(len(str(value).encode('utf-8')) + VALUE_OVERHEAD for value in values) + 3
+            if chunk and size + row_size > budget:
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append((row, values))
+            size += row_size
+        if chunk:
+            yield chunk
+
+    # Define a method to insert or update many rows with multi-row statements
+    def insert_rows_batch(self, table_name, rows, json_fields, into=None):
+        """
+        Insert or update rows with multi-row INSERT ... ON DUPLICATE KEY UPDATE statements (executemany),
+        in chunks sized to max_allowed_packet. Does not commit: the rows belong to the caller's transaction.
+        A chunk the server rejects is retried row by row with the prepared statement, so only the rows that fail are skipped.
+        Parameters:
+            table_name (str): Name of the table to insert data into.
+            rows (iterable): Dictionaries (or records with get()) containing the data to be inserted.
+            json_fields (dict): Dictionary containing 'required_fields' and 'optional_fields'.
+            into (str): Staging table of the same shape the rows are written to instead of table_name.
+        Returns the list of (row, error) pairs that could not be inserted.
+        """
+        statement = self.statements.get(table_name, json_fields, into)
+        if statement is None:
+            return [(row, f"Table {table_name} does not exist or has no columns.") for row in rows]
+
+        budget = int(self.max_allowed_packet() * PACKET_FILL) - len(statement.query)
+        failed = []
+        statements = 0
+        inserted = 0
+        cursor = self.connection.cursor()
+        chunks = self.chunk_rows(rows, statement, budget)
+        try:
+            for chunk in chunks:
+                try:
+                    cursor.executemany(statement.query, [values for _, values in chunk])
+                    statements += 1
+                    inserted += len(chunk)
+                    continue
+                except mysql.connector.Error as err:
+                    if self.invalidate_stale_schema(table_name, err):
+                        # Every remaining row would fail the same way, they are written again by a later run
+                        failed.extend((row, err) for pending in itertools.chain([chunk], chunks) for row, _ in pending)
+                        break
+                    self.error_logger.error(f"MySQL error inserting {len(chunk)} rows into {table_name}, retrying them one by one: {err}")
+
+                # The failed statement changed nothing, find the rows that cannot be stored
+                for row, values in chunk:
+                    try:
+                        statement.execute(values)
+                        statements += 1
+                        inserted += 1
+                    except mysql.connector.Error as err:
+                        failed.append((row, err))
         finally:
             cursor.close()  # Ensure cursor is closed even if an error occurs
 
+        self.info_logger.debug(f"Upserted {inserted} rows into {into or table_name} with {statements} statements, {len(failed)} failed.")
+        return failed
+
+    # Define a method to write rows to the staging table of a table, merged later by merge_staged
+    def stage_rows(self, table_name, rows, json_fields):
+        """
+        Insert or update rows into a TEMPORARY staging table created LIKE table_name (same columns and keys,
+        no foreign keys), so the live table is not touched until merge_staged().
+        Returns the list of (row, error) pairs that could not be staged.
+        """
+        staged = self._staged.get(table_name)
+        if staged is None:
+            statement = self.statements.get(table_name, json_fields)
+            if statement is None:
+                return [(row, f"Table {table_name} does not exist or has no columns.") for row in rows]
+            staging_table = f"{table_name}{STAGING_SUFFIX}"
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}")
+                cursor.execute(f"CREATE TEMPORARY TABLE {staging_table} LIKE {table_name}")
+            finally:
+                cursor.close()
+            staged = self._staged[table_name] = (staging_table, statement.fields)
+        return self.insert_rows_batch(table_name, rows, json_fields, into=staged[0])
+
+    # Define a method to merge every staging table into its table, then drop them
+    def merge_staged(self):
+        """
+        Merge the staging tables with one INSERT ... SELECT ... ON DUPLICATE KEY UPDATE per table, in the order
+        they were staged (parents before children), and drop them. Does not commit.
+        Returns {table name: affected rows}.
+        """
+        merged = {}
+        cursor = self.connection.cursor()
+        try:
+            for table_name, (staging_table, fields) in self._staged.items():
+                try:
+                    cursor.execute(self.build_merge(table_name, fields, staging_table))
+                except mysql.connector.Error as err:
+                    self.invalidate_stale_schema(table_name, err)
+                    raise
+                merged[table_name] = cursor.rowcount
+                if cursor.warning_count:
+                    self.log_warnings(cursor, f"merging {staging_table} into {table_name}")
+        finally:
+            cursor.close()
+            self.discard_staged()
+        return merged
+
+    # Define a method to drop the staging tables without merging them
+    def discard_staged(self):
+        """Drop the staging tables, e.g. after a rollback."""
+        if not self._staged:
+            return
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS " + ', '.join(staging_table for staging_table, _ in self._staged.values()))
+        except mysql.connector.Error as err:
+            self.error_logger.error(f"MySQL error dropping the staging tables: {err}")
+        finally:
+            cursor.close()
+            self._staged.clear()
+
+    # Define a method to log the warnings of the last statement of a cursor
+    def log_warnings(self, cursor, action):
+        """Log the warning count and the first warnings (skipped rows, truncated values) of the last statement."""
+        warning_count = cursor.warning_count
+        cursor.execute(f"SHOW WARNINGS LIMIT {MAX_LOGGED_WARNINGS}")
+        self.error_logger.warning(f"{warning_count} warnings {action}, the first ones:")
+        for level, code, message in cursor.fetchall():
+            self.error_logger.warning(f"{level} {code}: {message}")
+
     # Define a method to fetch the primary key columns of a table
-    def get_primary_keys(self, table_name):
+    def fetch_primary_keys(self, table_name):
         """Retrieve the primary key columns of a table."""
         try:
             cursor = self.connection.cursor()
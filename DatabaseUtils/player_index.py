@@ -0,0 +1,142 @@
+import unicodedata
+from Utils.name_matcher import NameMatcher, DEFAULT_THRESHOLD, PLAYER_INFO_PATH, load_player_records
+
+# Squad name meaning the squad is not known, so only the names are matched
+UNKNOWN_SQUAD = 'unknown squad'
+
+
+# Normalized form of a name, compared the way the table's default (case and accent insensitive) collation does
+def normalize_name(name):
+    if not isinstance(name, str):
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name.strip())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+# Define a class to resolve playerIds from names without a query per row
+class PlayerIndex:
+    """
+    In-memory index of static_player_info, loaded once per run on the first lookup.
+    Players are keyed by (firstname, surname, squadName) and by (firstname, surname); names that are not found
+    are cached as misses so they are only reported once.
+    resolve_many falls back to fuzzy matching (see Utils.name_matcher) for the names without an exact match,
+    unless fuzzy_threshold is None. Fuzzy results are cached by lookup key, so resolving the names of a whole
+    league first leaves its matches with cache hits only.
+    """
+    def __init__(self, connection, info_logger, error_logger, fuzzy_threshold=DEFAULT_THRESHOLD,
+                 player_info_path=PLAYER_INFO_PATH):
+        self.connection = connection
+        self.info_logger = info_logger
+        self.error_logger = error_logger
+        self.fuzzy_threshold = fuzzy_threshold
+        self.player_info_path = player_info_path
+        self.by_name_squad = {}
+        self.by_name = {}
+        self.rows = []
+        self.loaded = False
+        self.misses = set()
+        self.matcher = None
+        self.fuzzy_matches = {}
+
+    # Load every player of static_player_info into the index
+    def load(self):
+        self.by_name_squad = {}
+        self.by_name = {}
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT playerId, firstname, surname, squadName FROM static_player_info")
+            rows = cursor.fetchall()
+        except Exception as e:
+            self.error_logger.error(f"Error loading static_player_info, players without a playerId cannot be resolved: {e}")
+            rows = []
+        finally:
+            if cursor is not None:
+                cursor.close()  # Ensure cursor is closed even if there's an error
+
+        for player_id, firstname, surname, squad_name in rows:
+            name_key = (normalize_name(firstname), normalize_name(surname))
+            self.by_name.setdefault(name_key, []).append(player_id)
+            self.by_name_squad.setdefault(name_key + (normalize_name(squad_name),), []).append(player_id)
+
+        self.rows = rows
+        self.loaded = True
+        self.misses = set()
+        self.matcher = None
+        self.fuzzy_matches = {}
+        self.info_logger.info(f"Loaded {len(rows)} players from static_player_info into the player index.")
+        return self
+
+    # Exact lookup key and playerIds of a player, restricted to the squad when it is known
+    def _lookup(self, firstname, surname, squad_name=None):
+        if not self.loaded:
+            self.load()
+
+        name_key = (normalize_name(firstname), normalize_name(surname))
+        squad_key = normalize_name(squad_name)
+        if squad_key and squad_key != UNKNOWN_SQUAD:
+            lookup_key = name_key + (squad_key,)
+            return lookup_key, self.by_name_squad.get(lookup_key)
+        return name_key, self.by_name.get(name_key)
+
+    # Log a name without a playerId, once per name
+    def _miss(self, lookup_key, firstname, surname, squad_name):
+        if lookup_key not in self.misses:
+            self.misses.add(lookup_key)
+            self.error_logger.warning(f"No playerId found for {firstname} {surname} with squadName {squad_name}.")
+
+    # Find the playerId of a player by name, restricted to the squad when it is known
+    def find(self, firstname, surname, squad_name=None):
+        lookup_key, player_ids = self._lookup(firstname, surname, squad_name)
+        if not player_ids:
+            self._miss(lookup_key, firstname, surname, squad_name)
+            return None
+        if len(player_ids) > 1:
+            self.error_logger.warning(f"Multiple playerIds found for {firstname} {surname} with squadName {squad_name}. Using the first one.")
+        return player_ids[0]
+
+    # Trigram matcher over static_player_info and the player export, built on the first fuzzy lookup
+    def fuzzy_matcher(self):
+        if self.matcher is None:
+            if not self.loaded:
+                self.load()
+            table_records = [{'playerId': player_id, 'firstname': firstname, 'surname': surname, 'squadName': squad_name}
+                             for player_id, firstname, surname, squad_name in self.rows]
+            self.matcher = NameMatcher(self.fuzzy_threshold, self.error_logger).add_records(table_records)
+            self.matcher.add_records(load_player_records(self.player_info_path))
+            self.info_logger.info(f"Built the fuzzy name index with {len(self.matcher.candidates)} name variants.")
+        return self.matcher
+
+    # Resolve a batch of (firstname, surname, squad_name) tuples in one pass, fuzzy matching the exact misses together
+    def resolve_many(self, names):
+        resolved = {}
+        unmatched = {}
+        for name in set(names):
+            lookup_key, player_ids = self._lookup(*name)
+            if player_ids:
+                resolved[name] = self.find(*name)
+            elif lookup_key in self.fuzzy_matches:
+                resolved[name] = self.fuzzy_matches[lookup_key]
+            else:
+                unmatched[name] = lookup_key
+        if not unmatched:
+            return resolved
+
+        if self.fuzzy_threshold is None:
+            matches = {}
+        else:
+            queries = {name: (name[0], name[1], None if normalize_name(name[2]) == UNKNOWN_SQUAD else name[2])
+                       for name in unmatched}
+            scored = self.fuzzy_matcher().match_many(queries.values())
+            matches = {name: scored[query] for name, query in queries.items()}
+
+        for name, lookup_key in unmatched.items():
+            player_id, score = matches.get(name, (None, 0.0))
+            if player_id is None:
+                self._miss(lookup_key, *name)
+            else:
+                player_id = int(player_id)  # playerId is a BIGINT, as returned by the exact lookup
+                self.info_logger.info(f"Fuzzy matched {name[0]} {name[1]} ({name[2]}) to playerId {player_id} with score {score:.2f}.")
+            self.fuzzy_matches[lookup_key] = player_id
+            resolved[name] = player_id
+        return resolved
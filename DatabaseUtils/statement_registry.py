@@ -0,0 +1,62 @@
+class UpsertStatement:
+    """
+    Upsert of one table for one field spec, compiled once: the statement text, the fields it inserts
+    and a server-side prepared statement, prepared on its first execution and kept for the connection.
+    """
+    def __init__(self, connection, table_name, query, fields):
+        self.connection = connection
+        self.table_name = table_name
+        self.query = query
+        self.fields = tuple(fields)
+        self._cursor = None
+
+    # Values of a row (dict, or record with get()) in the order of the statement, None (NULL) for missing fields
+    def values(self, row):
+        return tuple(map(row.get, self.fields))
+
+    # Execute the prepared statement for one row of values
+    def execute(self, values):
+        if self._cursor is None:
+            self._cursor = self.connection.cursor(prepared=True)
+        # The cursor keeps the statement prepared as long as it is given the same query object
+        self._cursor.execute(self.query, values)
+
+    # Close the prepared statement
+    def close(self):
+        if self._cursor is not None:
+            try:
+                self._cursor.close()
+            finally:
+                self._cursor = None
+
+
+class StatementRegistry:
+    """
+    Compiled upserts per (table, field spec). The statement is built from the cached schema the first time a
+    table is written with a spec, so writing a row only builds its tuple of values.
+    """
+    def __init__(self, db_helper):
+        self.db_helper = db_helper
+        self.statements = {}
+
+    # Hashable key of a field spec
+    @staticmethod
+    def spec_key(json_fields):
+        return tuple(json_fields.get('required_fields', [])), tuple(json_fields.get('optional_fields', []))
+
+    # Compiled upsert of a table for a field spec, or None if the table does not exist or has no columns;
+    # into is the staging table written to instead of the table
+    def get(self, table_name, json_fields, into=None):
+        key = (table_name, self.spec_key(json_fields), into)
+        statement = self.statements.get(key)
+        if statement is None:
+            query, fields = self.db_helper.build_upsert(table_name, json_fields, into)
+            if query is None:
+                return None  # Not cached, the table may be created later
+            statement = self.statements[key] = UpsertStatement(self.db_helper.connection, table_name, query, fields)
+        return statement
+
+    # Drop the compiled upserts of a table, or of every table, closing their prepared statements
+    def clear(self, table_name=None):
+        for key in [key for key in self.statements if table_name is None or key[0] == table_name]:
+            self.statements.pop(key).close()
@@ -0,0 +1,167 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .database_helper import DatabaseHelper
+
+# Writers (and pooled connections) used in parallel
+DEFAULT_WRITERS = 4
+# Leagues whose rows are written together, so the tables of independent leagues are written concurrently
+DEFAULT_BATCH_LEAGUES = 4
+# Dependency level of the tables when the foreign keys cannot be read:
+# sport and squad, then player and fixture, then match, then period and score flow
+TABLE_LEVELS = (
+    ('sport_info', 0), ('squad_info', 0), ('player_info', 1),
+    ('_fixture', 1), ('_match', 2), ('_period', 3), ('_score_flow', 3),
+)
+
+
+# Dependency level of a table from its name, tables of unknown kinds are written last
+def static_level(table_name):
+    for suffix, level in TABLE_LEVELS:
+        if table_name.endswith(suffix):
+            return level
+    return len(TABLE_LEVELS)
+
+
+# Levels of the tables from the foreign keys between them, or None if they reference each other in a cycle
+def reference_levels(table_names, references):
+    levels = {}
+
+    def level(table_name, path):
+        if table_name not in levels:
+            if table_name in path:
+                raise ValueError(f"Foreign key cycle through {table_name}")
+            parents = [parent for parent in references.get(table_name, ())
+                       if parent in table_names and parent != table_name]
+            levels[table_name] = 1 + max((level(parent, path | {table_name}) for parent in parents), default=-1)
+        return levels[table_name]
+
+    try:
+        for table_name in table_names:
+            level(table_name, frozenset())
+    except ValueError:
+        return None
+    return levels
+
+
+# Groups of tables that can be written concurrently, in write order: a table comes after every table it references
+def dependency_levels(table_names, references=None):
+    """references maps a table to the tables its foreign keys reference; without it TABLE_LEVELS is used."""
+    table_names = list(dict.fromkeys(table_names))
+    levels = reference_levels(set(table_names), references) if references is not None else None
+    if levels is None:
+        levels = {table_name: static_level(table_name) for table_name in table_names}
+    groups = {}
+    for table_name in table_names:
+        groups.setdefault(levels[table_name], []).append(table_name)
+    return [groups[level] for level in sorted(groups)]
+
+
+class WritePlan:
+    """
+    Rows to write per table, in the order the tables were first added. The rows of several leagues can be added
+    to one plan; each table is then written once, by one writer, for all of them.
+    """
+    def __init__(self):
+        self.tables = {}  # Table name -> [json_fields, id_field, list of row sources]
+
+    # Add rows (a list, or TableBatches) of a table
+    def add(self, table_name, rows, json_fields, id_field):
+        if not rows:
+            return
+        table = self.tables.setdefault(table_name, [json_fields, id_field, []])
+        table[2].append(rows)
+
+    # Number of row sources of every table, to discard the rows added after it
+    def mark(self):
+        return {table_name: len(table[2]) for table_name, table in self.tables.items()}
+
+    # Discard the rows added since a mark
+    def discard_since(self, mark):
+        for table_name in list(self.tables):
+            count = mark.get(table_name, 0)
+            if count:
+                del self.tables[table_name][2][count:]
+            else:
+                del self.tables[table_name]
+
+    def __bool__(self):
+        return bool(self.tables)
+
+    # Rows of a table, one source after the other
+    def rows(self, table_name):
+        return itertools.chain.from_iterable(self.tables[table_name][2])
+
+    # Number of rows of a table
+    def row_count(self, table_name):
+        return sum(len(rows) for rows in self.tables[table_name][2])
+
+
+class WriteScheduler:
+    """
+    Writes a WritePlan level by level in foreign key order. The tables of a level are written concurrently, each by
+    one writer thread on its own pooled connection (with its own DatabaseHelper, schema cache and prepared
+    statements), with the batched upsert, and committed on their own. A level starts once the tables it references
+    are committed, so the foreign keys of its rows can be checked.
+    """
+    def __init__(self, pool, db_helper, writers=DEFAULT_WRITERS):
+        self.pool = pool
+        self.db_helper = db_helper  # Reads the foreign keys and holds the loggers
+        self.info_logger = db_helper.info_logger
+        self.error_logger = db_helper.error_logger
+        self.executor = ThreadPoolExecutor(max_workers=writers, thread_name_prefix='db-writer')
+        self._local = threading.local()
+        self._helpers = []
+        self._lock = threading.Lock()
+
+    # DatabaseHelper of the current writer thread, on a connection taken from the pool for the thread's lifetime
+    def helper(self):
+        helper = getattr(self._local, 'helper', None)
+        if helper is None:
+            connection = self.pool.get_connection()
+            connection.autocommit = False
+            helper = self._local.helper = DatabaseHelper(connection, self.info_logger, self.error_logger)
+            with self._lock:
+                self._helpers.append(helper)
+        return helper
+
+    # Write the rows of one table and commit; returns the (row, error) pairs that could not be written
+    def write_table(self, plan, table_name):
+        helper = self.helper()
+        json_fields = plan.tables[table_name][0]
+        try:
+            failed = helper.insert_rows_batch(table_name, plan.rows(table_name), json_fields)
+            helper.connection.commit()
+        except Exception:
+            helper.connection.rollback()
+            raise
+        self.info_logger.info(f"Wrote {plan.row_count(table_name) - len(failed)} rows into {table_name}.")
+        return failed
+
+    # Write a plan; returns {table name: failed rows}
+    def write(self, plan):
+        """
+        Raises the first error of a level once every table of the level is finished; the later levels are not
+        written (the tables already committed are kept, their upserts are repeated when the rows are written again).
+        """
+        failed = {}
+        for level in dependency_levels(plan.tables, self.db_helper.get_references()):
+            futures = {table_name: self.executor.submit(self.write_table, plan, table_name) for table_name in level}
+            errors = []
+            for table_name, future in futures.items():
+                try:
+                    failed[table_name] = future.result()
+                except Exception as e:
+                    self.error_logger.error(f"Error writing {table_name}: {e}")
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+        return failed
+
+    # Stop the writer threads and return their connections to the pool
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            for helper in self._helpers:
+                helper.connection.close()
+            self._helpers.clear()
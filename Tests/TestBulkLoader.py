@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+import mysql.connector
+from unittest.mock import MagicMock, patch
+from DatabaseUtils.bulk_loader import BulkLoader, tsv_field, tsv_line, load_data_query
+from DatabaseUtils.statement_registry import UpsertStatement
+
+class TestBulkLoader(unittest.TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.cursor.fetchone.return_value = (1,)
+        self.cursor.warning_count = 0
+        self.db_helper = MagicMock(connection=self.connection)
+        self.db_helper.statements.get.side_effect = lambda table_name, json_fields: UpsertStatement(
+            self.connection, table_name, 'INSERT ...', json_fields['required_fields'])
+        self.loader = BulkLoader(self.db_helper, spool_dir=self.spool_dir)
+
+    def tearDown(self):
+        self.loader.close()
+        os.rmdir(self.spool_dir)
+
+    def spooled(self, table_name):
+        _, file, path, _ = self.loader.spools[table_name]
+        file.flush()
+        with open(path, encoding='utf-8') as spool:
+            return spool.read()
+
+    def test_tsv_encoding(self):
+        self.assertEqual(tsv_field(None), '\\N')
+        self.assertEqual(tsv_field(float('nan')), '\\N')
+        self.assertEqual(tsv_field(True), '1')
+        self.assertEqual(tsv_field(0.5), '0.5')
+        self.assertEqual(tsv_field('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(tsv_line((801, 'Zoë', None)), '801\tZoë\t\\N\n')
+        self.assertIn("IGNORE INTO TABLE squad_info", load_data_query('squad_info', ['squadId', 'squadName']))
+        self.assertIn("(squadId, squadName)", load_data_query('squad_info', ['squadId', 'squadName'], 'replace'))
+        with self.assertRaises(ValueError):
+            load_data_query('squad_info', ['squadId'], 'update')
+
+    def test_rows_spooled_and_loaded_in_table_order(self):
+        squad_fields = {'required_fields': ['squadId', 'squadName']}
+        self.loader.add('squad_info', [{'squadId': 801, 'squadName': 'Magic'}], squad_fields)
+        self.loader.add('netball_match', [{'uniqueMatchId': '1-2'}], {'required_fields': ['uniqueMatchId']})
+        self.loader.add('squad_info', [{'squadId': 806}], squad_fields)
+        self.assertEqual(self.spooled('squad_info'), '801\tMagic\n806\t\\N\n')
+        paths = [spool[2] for spool in self.loader.spools.values()]
+
+        self.assertEqual(self.loader.flush(), {'squad_info': 2, 'netball_match': 1})
+
+        loads = [call.args for call in self.cursor.execute.call_args_list if 'LOAD DATA' in call.args[0]]
+        self.assertEqual([args[1] for args in loads], [(paths[0],), (paths[1],)])
+        self.assertIn('netball_match', loads[1][0])
+        self.assertEqual(self.connection.commit.call_count, 2)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_rows_discarded_since_a_mark(self):
+        fields = {'required_fields': ['squadId']}
+        self.loader.add('squad_info', [{'squadId': 801}], fields)
+        mark = self.loader.mark()
+        self.loader.add('squad_info', [{'squadId': 806}], fields)
+        self.loader.add('player_info', [{'squadId': 806}], fields)
+        self.loader.discard_since(mark)
+        self.loader.add('squad_info', [{'squadId': 807}], fields)
+
+        self.assertEqual(self.spooled('squad_info'), '801\n807\n')
+        self.assertEqual(self.spooled('player_info'), '')
+        self.assertEqual(self.loader.flush(), {'squad_info': 2, 'player_info': 0})
+
+    def test_secondary_indexes_deferred_except_for_foreign_keys(self):
+        self.loader.defer_indexes = True
+        self.cursor.fetchall.side_effect = [
+            [('idx_round', 'roundNumber', None), ('idx_name', 'matchName', 20), ('idx_squad', 'uniqueHomeSquadId', None)],
+            [('uniqueHomeSquadId',)],
+        ]
+        self.loader.add('netball_fixture', [{'roundNumber': 1}], {'required_fields': ['roundNumber']})
+        self.loader.flush()
+
+        statements = [call.args[0] for call in self.cursor.execute.call_args_list]
+        alters = [statement for statement in statements if statement.startswith('ALTER TABLE')]
+        self.assertEqual(alters, [
+            "ALTER TABLE netball_fixture DROP INDEX `idx_round`, DROP INDEX `idx_name`",
+            "ALTER TABLE netball_fixture ADD INDEX `idx_round` (`roundNumber`), ADD INDEX `idx_name` (`matchName`(20))",
+        ])
+        load = next(index for index, statement in enumerate(statements) if 'LOAD DATA' in statement)
+        self.assertLess(statements.index(alters[0]), load)
+        self.assertGreater(statements.index(alters[1]), load)
+
+    def test_flush_refused_when_local_infile_is_off(self):
+        self.cursor.fetchone.return_value = (0,)
+        self.loader.add('squad_info', [{'squadId': 801}], {'required_fields': ['squadId']})
+        path = self.loader.spools['squad_info'][2]
+        with self.assertRaises(mysql.connector.Error):
+            self.loader.flush()
+        self.assertFalse(os.path.exists(path))
+
+class TestWriteStrategyOptions(unittest.TestCase):
+    @patch('Core.Scraper.connect')
+    def test_bulk_load_refused_for_incremental_runs(self, mock_connect):
+        from Core.Scraper import Scraper
+        with self.assertRaises(ValueError):
+            Scraper(incremental=True, ledger_path=os.path.join(tempfile.mkdtemp(), 'ledger.json'), bulk_load=True)
+        mock_connect.assert_not_called()
+
+    @patch('Core.Scraper.connect')
+    def test_staging_merge_refused_for_incremental_runs(self, mock_connect):
+        from Core.Scraper import Scraper
+        with self.assertRaises(ValueError):
+            Scraper(incremental=True, ledger_path=os.path.join(tempfile.mkdtemp(), 'ledger.json'), staging_merge=True)
+        mock_connect.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Utils.composite_keys import composite_key, str_column
+
+class TestCompositeKeys(unittest.TestCase):
+    def test_keys_match_per_row_formatting(self):
+        df = pd.DataFrame({'playerId': [1000.0, np.nan, 1002.0], 'squadId': [801, 806, 801],
+                           'squadName': ['Magic', 'Pulse', None]})
+
+        self.assertEqual(composite_key(df['playerId'], df['squadId']).tolist(), ['1000.0-801', 'Unknown', '1002.0-801'])
+        self.assertEqual(composite_key(df['squadId'], df['squadName']).tolist(), ['801-Magic', '806-Pulse', 'Unknown'])
+        self.assertEqual(composite_key(12438, df['squadId']).tolist(), ['12438-801', '12438-806', '12438-801'])
+
+    def test_missing_column_and_separator(self):
+        df = pd.DataFrame({'period': [1, 2]})
+        self.assertEqual(composite_key(df.get('period'), df.get('playerId'), index=df.index).tolist(), ['Unknown', 'Unknown'])
+        self.assertEqual(composite_key(124380101, df['period'], separator='_').tolist(), ['124380101_1', '124380101_2'])
+        self.assertEqual(composite_key(pd.Series([], dtype=float), 'x').tolist(), [])
+
+    def test_str_column(self):
+        df = pd.DataFrame({'playerId': [1, 2], 'squadId': [801.0, np.nan]})
+        self.assertEqual(str_column(df, 'playerId').tolist(), ['1', '2'])
+        self.assertEqual(str_column(df, 'squadId').tolist(), ['801.0', 'nan'])
+        self.assertEqual(str_column(df, 'squadName').tolist(), ['Unknown', 'Unknown'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import unittest
+from unittest.mock import MagicMock
+import mysql.connector
+from DatabaseUtils.database_helper import DatabaseHelper, TableSchema
+
+class TestDatabaseHelper(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.error_logger = MagicMock()
+        self.helper = DatabaseHelper(self.connection, MagicMock(), self.error_logger)
+        self.helper.get_table_columns = MagicMock(return_value=['squadId', 'squadName', 'squadCode'])
+        self.helper.get_primary_keys = MagicMock(return_value=['squadId'])
+        self.helper._max_allowed_packet = 10000
+        self.fields = {'required_fields': ['squadId'], 'optional_fields': ['squadName', 'squadCode', 'notAColumn']}
+
+    def rows(self, count):
+        return [{'squadId': index, 'squadName': 'x' * 100, 'squadCode': 'XX'} for index in range(count)]
+
+    def test_build_upsert_updates_non_key_columns(self):
+        query, fields = self.helper.build_upsert('squad_info', self.fields)
+        self.assertEqual(fields, ['squadId', 'squadName', 'squadCode'])
+        self.assertIn('ON DUPLICATE KEY UPDATE squadName=VALUES(squadName), squadCode=VALUES(squadCode)', query)
+
+        self.helper.get_primary_keys.return_value = fields
+        query, _ = self.helper.build_upsert('squad_info', self.fields)
+        self.assertTrue(query.startswith('INSERT IGNORE INTO squad_info'))
+
+    def test_rows_chunked_to_the_packet_size(self):
+        failed = self.helper.insert_rows_batch('squad_info', self.rows(200), self.fields)
+
+        self.assertEqual(failed, [])
+        chunks = [call.args[1] for call in self.cursor.executemany.call_args_list]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 200)
+        self.assertEqual(chunks[0][0], (0, 'x' * 100, 'XX'))
+        for chunk in chunks:
+            self.assertLess(sum(len(str(value)) for values in chunk for value in values), 8000)
+        self.connection.commit.assert_not_called()  # The caller commits
+        self.cursor.close.assert_called_once()
+
+    def test_failed_chunk_retried_row_by_row(self):
+        error = mysql.connector.Error(msg='Data too long', errno=1406)
+        self.cursor.executemany.side_effect = error
+        self.cursor.execute.side_effect = lambda query, values: (_ for _ in ()).throw(error) if values[0] == 1 else None
+        rows = self.rows(3)
+
+        failed = self.helper.insert_rows_batch('squad_info', rows, self.fields)
+
+        self.assertEqual(failed, [(rows[1], error)])
+        self.assertEqual(self.cursor.execute.call_count, 3)
+        self.connection.rollback.assert_not_called()
+
+    def test_stale_schema_invalidated_without_row_by_row_retry(self):
+        error = mysql.connector.Error(msg="Unknown column 'squadCode' in 'field list'", errno=1054)
+        self.cursor.executemany.side_effect = error
+        rows = self.rows(200)
+
+        failed = self.helper.insert_rows_batch('squad_info', rows, self.fields)
+
+        self.assertEqual([row for row, _ in failed], rows)
+        self.cursor.executemany.assert_called_once()
+        self.cursor.execute.assert_not_called()
+        self.assertEqual(self.helper.statements.statements, {})  # Built again from the reloaded columns
+
+    def test_max_allowed_packet_queried_once(self):
+        self.helper._max_allowed_packet = None
+        self.cursor.fetchone.return_value = (67108864,)
+        self.assertEqual(self.helper.max_allowed_packet(), 67108864)
+        self.assertEqual(self.helper.max_allowed_packet(), 67108864)
+        self.cursor.execute.assert_called_once_with("SELECT @@max_allowed_packet")
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.cursor.fetchall.return_value = [
+            ('squad_info', 'squadId', 1), ('squad_info', 'squadName', 0),
+            ('netball_match', 'uniqueMatchId', 1), ('netball_match', 'playerId', 0),
+        ]
+        self.helper = DatabaseHelper(self.connection, MagicMock(), MagicMock())
+
+    def test_schema_loaded_once_for_every_table(self):
+        self.assertEqual(self.helper.get_table_columns('squad_info'), ['squadId', 'squadName'])
+        self.assertEqual(self.helper.get_primary_keys('squad_info'), ['squadId'])
+        self.assertEqual(self.helper.get_primary_keys('netball_match'), ['uniqueMatchId'])
+        for _ in range(3):
+            self.helper.build_upsert('netball_match', {'required_fields': ['uniqueMatchId', 'playerId']})
+        self.cursor.execute.assert_called_once()
+
+    def test_missing_table_queried_on_its_own_and_not_cached(self):
+        self.helper.load_schema()
+        self.cursor.fetchall.return_value = []
+        self.assertEqual(self.helper.get_table_columns('afl_match'), [])
+        self.assertEqual(self.helper.get_table_columns('afl_match'), [])
+        self.assertEqual(self.cursor.execute.call_count, 3)  # The schema, then SHOW COLUMNS each time
+
+    def test_invalidate_reloads_the_schema(self):
+        self.helper.get_table_columns('squad_info')
+        self.helper.invalidate_schema()
+        self.cursor.fetchall.return_value = [('squad_info', 'squadId', 1), ('squad_info', 'squadCode', 0)]
+        self.assertEqual(self.helper.get_table_columns('squad_info'), ['squadId', 'squadCode'])
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+class TestStatementRegistry(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.helper = DatabaseHelper(self.connection, MagicMock(), MagicMock())
+        self.helper.build_upsert = MagicMock(return_value=('INSERT INTO squad_info ...', ['squadId', 'squadName']))
+        self.fields = {'required_fields': ['squadId'], 'optional_fields': ['squadName']}
+
+    def test_statement_compiled_once_per_table_and_spec(self):
+        statement = self.helper.statements.get('squad_info', self.fields)
+        self.assertIs(self.helper.statements.get('squad_info', dict(self.fields)), statement)
+        self.assertIsNot(self.helper.statements.get('squad_info', {'required_fields': ['squadId']}), statement)
+        self.assertEqual(self.helper.build_upsert.call_count, 2)
+        self.assertEqual(statement.values({'squadName': 'Magic', 'other': 1, 'squadId': 801}), (801, 'Magic'))
+        self.assertEqual(statement.values({'squadId': 801}), (801, None))
+
+    def test_rows_inserted_with_one_prepared_statement(self):
+        prepared = MagicMock()
+        self.connection.cursor.side_effect = lambda **kwargs: prepared if kwargs.get('prepared') else MagicMock()
+        for squad_id in (801, 806):
+            self.helper.insert_data_dynamically('squad_info', {'squadId': squad_id}, self.fields)
+
+        self.connection.cursor.assert_called_once_with(prepared=True)
+        query = prepared.execute.call_args_list[0].args[0]
+        self.assertIs(prepared.execute.call_args_list[1].args[0], query)  # Same object, the statement is not prepared again
+        self.assertEqual(prepared.execute.call_args.args[1], (806, None))
+        self.connection.commit.assert_not_called()  # The caller commits once per fixture
+        self.connection.rollback.assert_not_called()
+
+    def test_failed_row_left_to_the_callers_transaction(self):
+        self.connection.cursor.return_value.execute.side_effect = mysql.connector.Error(msg='Duplicate entry')
+        with self.assertRaises(mysql.connector.Error):
+            self.helper.insert_data_dynamically('squad_info', {'squadId': 801}, self.fields)
+        self.connection.rollback.assert_not_called()
+
+    def test_savepoint_statements(self):
+        self.helper.savepoint('match_rows')
+        self.helper.rollback_to_savepoint('match_rows')
+        self.helper.release_savepoint('match_rows')
+        self.assertEqual([call.args[0] for call in self.connection.cursor.return_value.execute.call_args_list],
+                         ['SAVEPOINT match_rows', 'ROLLBACK TO SAVEPOINT match_rows', 'RELEASE SAVEPOINT match_rows'])
+        self.assertEqual(self.connection.cursor.return_value.close.call_count, 3)
+
+    def test_invalidate_schema_closes_statements(self):
+        statement = self.helper.statements.get('squad_info', self.fields)
+        statement.execute((801, 'Magic'))
+        self.helper.invalidate_schema('squad_info')
+
+        self.connection.cursor.return_value.close.assert_called_once()
+        self.assertIsNot(self.helper.statements.get('squad_info', self.fields), statement)
+
+    def test_missing_table_not_compiled(self):
+        self.helper.build_upsert.return_value = (None, [])
+        self.assertIsNone(self.helper.statements.get('afl_match', self.fields))
+        self.assertEqual(self.helper.statements.statements, {})
+
+class TestStagingMerge(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.cursor.warning_count = 0
+        self.helper = DatabaseHelper(self.connection, MagicMock(), MagicMock())
+        self.helper._schema_loaded = True
+        self.helper._schema = {
+            'squad_info': TableSchema(('squadId', 'squadName'), ('squadId',)),
+            'netball_match': TableSchema(('uniqueMatchId', 'goals'), ('uniqueMatchId',)),
+        }
+        self.helper._max_allowed_packet = 10000
+
+    def statements(self):
+        return [call.args[0].strip() for call in self.cursor.execute.call_args_list + self.cursor.executemany.call_args_list]
+
+    def test_rows_staged_then_merged_in_order(self):
+        self.helper.stage_rows('squad_info', [{'squadId': 801, 'squadName': 'Magic'}], {'required_fields': ['squadId', 'squadName']})
+        self.helper.stage_rows('netball_match', [{'uniqueMatchId': '1-2'}], {'required_fields': ['uniqueMatchId'], 'optional_fields': ['goals']})
+        self.helper.stage_rows('squad_info', [{'squadId': 806}], {'required_fields': ['squadId', 'squadName']})
+        staged = self.statements()
+        self.assertEqual(staged[:2], ["DROP TEMPORARY TABLE IF EXISTS squad_info_staging", "CREATE TEMPORARY TABLE squad_info_staging LIKE squad_info"])
+        self.assertEqual(len([statement for statement in staged if statement.startswith('CREATE')]), 2)
+        self.assertTrue(all(call.args[0].strip().startswith('INSERT INTO') and '_staging' in call.args[0]
+                            for call in self.cursor.executemany.call_args_list))
+        self.cursor.reset_mock()
+
+        self.helper.merge_staged()
+
+        self.assertEqual(self.statements(), [
+            "INSERT IGNORE INTO squad_info (squadId, squadName) SELECT squadId, squadName FROM squad_info_staging "
+            "ON DUPLICATE KEY UPDATE squadName=VALUES(squadName)",
+            "INSERT IGNORE INTO netball_match (uniqueMatchId, goals) SELECT uniqueMatchId, goals FROM netball_match_staging "
+            "ON DUPLICATE KEY UPDATE goals=VALUES(goals)",
+            "DROP TEMPORARY TABLE IF EXISTS squad_info_staging, netball_match_staging",
+        ])
+        self.connection.commit.assert_not_called()
+
+    def test_staging_tables_dropped_when_a_merge_fails(self):
+        self.helper.stage_rows('squad_info', [{'squadId': 801}], {'required_fields': ['squadId']})
+        self.cursor.execute.side_effect = [mysql.connector.Error(msg='Lock wait timeout'), None]
+        with self.assertRaises(mysql.connector.Error):
+            self.helper.merge_staged()
+        self.assertEqual(self.cursor.execute.call_args.args[0], "DROP TEMPORARY TABLE IF EXISTS squad_info_staging")
+        self.assertEqual(self.helper._staged, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Core.MatchTransform import clean_name_column
+from Utils.dtype_policy import DtypePolicy, default_policy
+
+class TestDtypePolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = DtypePolicy({
+            'match_fields': {'required_fields': ['playerId', 'squadId'], 'optional_fields': ['squadName', 'surname', 'goals', 'height', 'disposals', 'position']},
+            'squad_fields': {'required_fields': ['squadId'], 'optional_fields': ['squadName']},
+        })
+
+    def frame(self):
+        return pd.DataFrame({
+            'playerId': [1000, 1001, 1002, 1003],
+            'squadId': [801, 801, 806, 806],
+            'squadName': ['Magic', 'Magic', 'Pulse', np.nan],
+            'surname': ['A', 'B', 'C', 'D'],
+            'goals': [1, 2, 3, 40],
+            'height': [180.5, np.nan, 0.1, 175.0],
+            'disposals': pd.Series([10, 12, 14, 300], dtype=object),
+            'position': [1.5, 2.5, np.nan, 3.0],
+            'notStored': ['x', 'x', 'x', 'x'],
+        })
+
+    def test_value_columns_are_compacted(self):
+        df = self.policy.apply(self.frame())
+        self.assertIsInstance(df['squadName'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['goals'].dtype, np.int8)
+        self.assertEqual(df['disposals'].dtype, np.int16)
+        self.assertEqual(df['position'].dtype, np.float32)
+
+    def test_keys_unique_names_and_lossy_floats_are_kept(self):
+        original = self.frame()
+        df = self.policy.apply(original)
+        for name in ('playerId', 'squadId', 'surname', 'height', 'notStored'):
+            self.assertEqual(df[name].dtype, original[name].dtype, name)
+        self.assertEqual(original['goals'].dtype, np.int64)  # The input is not modified
+
+    def test_rows_keep_their_values(self):
+        original = self.frame()
+        df = self.policy.apply(original)
+        self.assertEqual(repr(df.to_dict('records')), repr(original.to_dict('records')))
+        self.assertEqual(clean_name_column(df, 'squadName', 'Unknown Squad').tolist(), ['Magic', 'Magic', 'Pulse', 'Unknown Squad'])
+
+    def test_default_policy_comes_from_the_field_specs(self):
+        policy = default_policy()
+        self.assertIn('positionName', policy.value_fields)
+        self.assertIn('uniqueMatchId', policy.key_fields)
+        self.assertNotIn('squadId', policy.value_fields)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from Utils import http_session
+
+class TestHttpSession(unittest.TestCase):
+    def tearDown(self):
+        http_session.close_sessions()
+
+    def test_session_pooled_per_host(self):
+        first = http_session.get_session('https://mc.championdata.com/data/1/1.json')
+        second = http_session.get_session('https://mc.championdata.com/data/competitions.json')
+        other = http_session.get_session('http://mc.championdata.com/data/competitions.json')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertIn('gzip', first.headers['Accept-Encoding'])
+
+    @patch('Utils.http_session.time.sleep')
+    @patch('Utils.http_session.get_session')
+    def test_retries_server_errors_then_succeeds(self, mock_get_session, mock_sleep):
+        session = MagicMock()
+        session.get.side_effect = [MagicMock(status_code=503), MagicMock(status_code=502), MagicMock(status_code=200)]
+        mock_get_session.return_value = session
+
+        response = http_session.get('https://mc.championdata.com/data/1/1.json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(session.get.call_args.kwargs['timeout'], http_session.DEFAULT_TIMEOUT)
+
+    @patch('Utils.http_session.time.sleep')
+    @patch('Utils.http_session.get_session')
+    def test_client_errors_are_not_retried(self, mock_get_session, mock_sleep):
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=404)
+        mock_get_session.return_value = session
+
+        response = http_session.get('https://mc.championdata.com/data/1/1.json')
+
+        self.assertEqual(response.status_code, 404)
+        session.get.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch('Utils.http_session.time.sleep')
+    @patch('Utils.http_session.get_session')
+    def test_connection_resets_raise_after_max_retries(self, mock_get_session, mock_sleep):
+        session = MagicMock()
+        session.get.side_effect = requests.exceptions.ConnectionError('Connection reset by peer')
+        mock_get_session.return_value = session
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            http_session.get('https://mc.championdata.com/data/1/1.json', max_retries=2)
+
+        self.assertEqual(session.get.call_count, 3)
+
+    def test_backoff_delay_is_bounded(self):
+        for attempt in range(12):
+            delay = http_session.backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(http_session.BACKOFF_MAX, http_session.BACKOFF_BASE * 2 ** attempt))
+
+if __name__ == '__main__':
+    unittest.main()
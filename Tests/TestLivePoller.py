@@ -0,0 +1,154 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from Core.LivePoller import LivePoller, changed_rows
+
+LEAGUE = {'id': 12438, 'league_season': 'ANZ Premiership (2024)', 'regulationPeriods': 4}
+
+
+def live_fixture(match_status='incomplete'):
+    fixture = MagicMock()
+    row = {'matchId': 1, 'matchStatus': match_status, 'homeSquadId': 801, 'awaySquadId': 806,
+           'localStartTime': '2024-04-01 19:00:00'}
+    if match_status == 'incomplete':
+        fixture.pending = pd.DataFrame([row])
+        fixture.data = pd.DataFrame()
+    else:
+        fixture.pending = pd.DataFrame()
+        fixture.data = pd.DataFrame([row])
+    return fixture
+
+
+def score_flow_rows(count):
+    return [{'scoreFlowId': f"1_flow_{index}", 'scorepoints': 1} for index in range(1, count + 1)]
+
+
+def period_rows(goals):
+    return [{'uniquePeriodId': '1_1', 'uniquePlayerId': f"{player}-801", 'goals': goals[player]} for player in goals]
+
+
+class TestLivePoller(unittest.TestCase):
+    def setUp(self):
+        self.scraper = MagicMock()
+        self.scraper.ledger = None
+        self.scraper.insert_rows.return_value = []
+        self.scraper.resolve_sport.return_value = ('Netball Womens NZ', 8, '2024')
+        self.scraper.sport_info_row.return_value = {'uniqueSportId': '8-12438'}
+        self.scraper.fixture_rows.side_effect = lambda match_row, *args: (
+            {'uniqueFixtureId': f"12438-{match_row['matchId']}", 'matchId': match_row['matchId'],
+             'matchStatus': match_row['matchStatus']}, [])
+        self.poller = LivePoller(self.scraper, [LEAGUE])
+
+        patchers = [patch('Core.LivePoller.Fixture'), patch('Core.LivePoller.MatchPayload'),
+                    patch('Core.LivePoller.http_session.expire')]
+        self.mock_fixture, self.mock_payload, _ = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def poll(self, fixture, payload_fingerprint, rows):
+        self.mock_fixture.return_value = fixture
+        payload = self.mock_payload.return_value
+        payload.fetch_data.return_value = True
+        payload.fingerprint = payload_fingerprint
+        self.scraper.match_rows.return_value = rows
+        self.scraper.insert_rows.reset_mock()
+        self.poller.poll()
+        return {call.args[0]: call.args[1] for call in self.scraper.insert_rows.call_args_list}
+
+    def test_changed_rows(self):
+        rows = [{'id': 1, 'value': 'a'}, {'id': 2, 'value': 'b'}]
+        changed, fingerprints = changed_rows(rows, {}, ('id',))
+        self.assertEqual(changed, rows)
+
+        changed, _ = changed_rows([{'id': 1, 'value': 'a'}, {'id': 2, 'value': 'c'}], fingerprints, ('id',))
+        self.assertEqual(changed, [{'id': 2, 'value': 'c'}])
+
+    def test_only_new_and_changed_rows_are_upserted(self):
+        first = self.poll(live_fixture(), 'p1', {'match': [], 'player': [], 'period': period_rows({1000: 1, 1001: 0}),
+                                                 'score_flow': score_flow_rows(1)})
+        self.assertEqual(len(first['netball_womens_nz_score_flow']), 1)
+        self.assertEqual(len(first['netball_womens_nz_period']), 2)
+        self.assertEqual(len(first['sport_info']), 1)
+
+        second = self.poll(live_fixture(), 'p2', {'match': [], 'player': [], 'period': period_rows({1000: 1, 1001: 1}),
+                                                  'score_flow': score_flow_rows(3)})
+        self.assertEqual([row['scoreFlowId'] for row in second['netball_womens_nz_score_flow']], ['1_flow_2', '1_flow_3'])
+        self.assertEqual(second['netball_womens_nz_period'], [period_rows({1001: 1})[0]])
+        self.assertEqual(second['sport_info'], [])
+        self.assertEqual(second['netball_womens_nz_fixture'], [])
+
+    def test_unchanged_payload_is_not_parsed(self):
+        rows = {'match': [], 'player': [], 'period': [], 'score_flow': score_flow_rows(1)}
+        self.poll(live_fixture(), 'p1', rows)
+        self.poll(live_fixture(), 'p1', rows)
+        self.assertEqual(self.scraper.match_rows.call_count, 1)
+
+    def test_finished_match_gets_final_update_then_is_dropped(self):
+        self.poll(live_fixture(), 'p1', {'match': [], 'player': [], 'period': [], 'score_flow': score_flow_rows(1)})
+        final = self.poll(live_fixture('complete'), 'p2', {'match': [], 'player': [], 'period': [],
+                                                           'score_flow': score_flow_rows(2)})
+
+        self.assertEqual(len(final['netball_womens_nz_score_flow']), 1)
+        self.assertEqual(final['netball_womens_nz_fixture'][0]['matchStatus'], 'complete')
+        self.assertEqual(self.poller.live_matches, set())
+
+        self.scraper.insert_rows.reset_mock()
+        self.poll(live_fixture('complete'), 'p3', {'match': [], 'player': [], 'period': [], 'score_flow': []})
+        self.scraper.insert_rows.assert_not_called()
+
+    def test_finished_match_dropped_from_the_snapshots(self):
+        rows = {'match': [{'uniqueMatchId': '1-801', 'matchId': 1}], 'player': [{'uniquePlayerId': '1000-801'}],
+                'period': [dict(row, matchId=1) for row in period_rows({1000: 1})],
+                'score_flow': [dict(row, matchId=1) for row in score_flow_rows(1)]}
+        self.poll(live_fixture(), 'p1', rows)
+        self.assertEqual(len(self.poller.snapshots['period']), 1)
+
+        self.poll(live_fixture('complete'), 'p2', rows)
+
+        for kind in ('fixture', 'match', 'period', 'score_flow'):
+            self.assertEqual(self.poller.snapshots[kind], {}, kind)
+        self.assertEqual(len(self.poller.snapshots['player']), 1)  # Shared with the other matches
+        self.assertEqual(self.poller.match_snapshot_keys, {})
+
+    def test_failed_rows_are_retried_before_the_match_is_finished(self):
+        self.scraper.ledger = MagicMock()
+        rows = {'match': [], 'player': [], 'period': [], 'score_flow': [dict(row, matchId=1) for row in score_flow_rows(2)]}
+        bad_row = rows['score_flow'][1]
+        self.poll(live_fixture(), 'p0', {'match': [], 'player': [], 'period': [], 'score_flow': rows['score_flow'][:1]})
+        self.scraper.insert_rows.side_effect = lambda table_name, kind_rows, *args: (
+            [(bad_row, 'Data too long')] if bad_row in kind_rows else [])
+        self.poll(live_fixture('complete'), 'p1', rows)
+
+        self.assertEqual(self.poller.live_matches, {(12438, 1)})  # Kept live, not recorded as stored
+        self.scraper.ledger.record.assert_not_called()
+
+        self.scraper.insert_rows.side_effect = None
+        retried = self.poll(live_fixture('complete'), 'p1', rows)  # Same payload, parsed again
+
+        self.assertEqual(retried['netball_womens_nz_score_flow'], [bad_row])
+        self.assertEqual(self.poller.live_matches, set())
+        self.scraper.ledger.record.assert_called_once()
+
+    def test_failed_upsert_is_retried(self):
+        self.scraper.connection.commit.side_effect = [Exception('lost connection'), None]
+        rows = {'match': [], 'player': [], 'period': [], 'score_flow': score_flow_rows(1)}
+        self.poll(live_fixture(), 'p1', rows)
+        retried = self.poll(live_fixture(), 'p1', rows)
+
+        self.scraper.connection.rollback.assert_called_once()
+        self.assertEqual(len(retried['netball_womens_nz_score_flow']), 1)
+
+    def test_network_errors_are_retried_next_poll(self):
+        rows = {'match': [], 'player': [], 'period': [], 'score_flow': score_flow_rows(1)}
+        self.poll(live_fixture(), 'p1', rows)
+
+        self.mock_fixture.return_value = live_fixture('complete')
+        self.mock_payload.return_value.fetch_data.side_effect = ConnectionError('Connection reset by peer')
+        self.poller.poll()
+        self.assertEqual(self.poller.live_matches, {(12438, 1)})  # Not finished without its final state
+
+        self.mock_fixture.return_value.fetch_data.side_effect = ConnectionError('Connection reset by peer')
+        self.assertEqual(self.poller.poll(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
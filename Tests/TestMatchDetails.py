@@ -2,8 +2,8 @@ import unittest
 from unittest.mock import patch, MagicMock
 from Core.MatchDetails import Match
 
-class TestMatchDetails(unittest.TestCase): #TODO FIX
-    @patch('Core.MatchDetails.requests.get')
+class TestMatchDetails(unittest.TestCase):
+    @patch('Core.MatchPayload.http_session.get')
     def test_fetch_data_netball_womens_nz(self, mock_get):
         # Updated mock response to include playerInfo
         mock_response = {
@@ -15,20 +15,20 @@ class TestMatchDetails(unittest.TestCase): #TODO FIX
                     ]
                 },
                 'teamInfo': {'team': [{'squadId': 71, 'squadName': 'Team One'}, {'squadId': 72, 'squadName': 'Team Two'}]},
-                'matchInfo': {'homeSquadId': 71, 'awaySquadId': 72, 'roundNumber': 1}
-            },
-            'playerInfo': {  # Added playerInfo here
-                'player': [
-                    {'playerId': 1, 'firstname': 'John', 'surname': 'Doe'},
-                    {'playerId': 2, 'firstname': 'Jane', 'surname': 'Doe'}
-                ]
+                'matchInfo': {'homeSquadId': 71, 'awaySquadId': 72, 'roundNumber': 1},
+                'playerInfo': {  # Added playerInfo here
+                    'player': [
+                        {'playerId': 1, 'firstname': 'John', 'surname': 'Doe'},
+                        {'playerId': 2, 'firstname': 'Jane', 'surname': 'Doe'}
+                    ]
+                }
             }
         }
         
         mock_get.return_value = MagicMock(status_code=200)
         mock_get.return_value.json.return_value = mock_response
         
-        match = Match(8005, 80121405, 801214, 8)  # Example League/Match/Fixture/Sport ID for Netball NZ Women's
+        match = Match(8005, 80121405, 801214, 8, '2024')  # Example League/Match/Fixture/Sport ID for Netball NZ Women's
         match.fetch_data()
 
         # Assert that the data was correctly processed
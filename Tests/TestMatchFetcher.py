@@ -0,0 +1,51 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from Core.MatchFetcher import MatchFetcher
+
+class TestMatchFetcher(unittest.TestCase):
+    @patch('Core.MatchPayload.http_session.get')
+    def test_fetch_league_respects_concurrency_limit(self, mock_get):
+        lock = threading.Lock()
+        in_flight = {'current': 0, 'peak': 0}
+
+        # Simulate a slow upstream and record the number of requests in flight
+        def slow_get(url, *args, **kwargs):
+            with lock:
+                in_flight['current'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['current'])
+            time.sleep(0.02)
+            with lock:
+                in_flight['current'] -= 1
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'matchStats': {'matchInfo': {'url': url}}}
+            return response
+
+        mock_get.side_effect = slow_get
+
+        fetcher = MatchFetcher(concurrency=3)
+        payloads = fetcher.fetch_league(8005, list(range(10)))
+
+        self.assertEqual(len(payloads), 10)
+        self.assertEqual(mock_get.call_count, 10)
+        self.assertLessEqual(in_flight['peak'], 3)
+        self.assertGreater(in_flight['peak'], 1)
+        self.assertTrue(payloads[4].match_info['url'].endswith('/8005/4.json'))
+
+    @patch('Core.MatchPayload.http_session.get')
+    def test_fetch_across_leagues_deduplicates_keys(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = {}
+
+        payloads = MatchFetcher(concurrency=2).fetch([(1, 10), (2, 10), (1, 10)])
+
+        self.assertEqual(set(payloads), {(1, 10), (2, 10)})
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            MatchFetcher(concurrency=0)
+
+if __name__ == '__main__':
+    unittest.main()
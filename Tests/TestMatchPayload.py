@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from Core.MatchPayload import MatchPayload
+from Core.MatchDetails import Match
+from Core.PeriodData import PeriodData
+from Core.ScoreFlowData import ScoreFlow
+
+class TestMatchPayload(unittest.TestCase):
+    @patch('Core.MatchPayload.http_session.get')
+    def test_payload_fetched_once_for_all_parsers(self, mock_get):
+        # Mock a single match payload containing player, period and score flow stats
+        mock_response = {
+            'matchStats': {
+                'playerStats': {
+                    'player': [
+                        {'playerId': 1, 'squadId': 71},
+                        {'playerId': 2, 'squadId': 72}
+                    ]
+                },
+                'playerPeriodStats': {
+                    'player': [
+                        {'playerId': 1, 'squadId': 71, 'period': 1},
+                        {'playerId': 2, 'squadId': 72, 'period': 1}
+                    ]
+                },
+                'scoreFlow': {
+                    'score': [
+                        {'playerId': 1, 'squadId': 71, 'period': 1, 'periodSeconds': 30}
+                    ]
+                },
+                'teamInfo': {'team': [{'squadId': 71, 'squadName': 'Team One'}, {'squadId': 72, 'squadName': 'Team Two'}]},
+                'matchInfo': {'homeSquadId': 71, 'awaySquadId': 72, 'roundNumber': 1},
+                'playerInfo': {
+                    'player': [
+                        {'playerId': 1, 'firstname': 'John', 'surname': 'Doe'},
+                        {'playerId': 2, 'firstname': 'Jane', 'surname': 'Doe'}
+                    ]
+                }
+            }
+        }
+
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = mock_response
+
+        payload = MatchPayload(8005, 80121405)
+        match = Match(8005, 80121405, 801214, 8, '2024', payload=payload)
+        period_data = PeriodData(8005, 80121405, payload=payload)
+        score_flow = ScoreFlow(8005, 80121405, payload=payload)
+        match.fetch_data()
+        period_data.fetch_data()
+        score_flow.fetch_data()
+
+        # The match JSON is downloaded and decoded exactly once
+        mock_get.assert_called_once()
+        mock_get.return_value.json.assert_called_once()
+
+        # Every parser received the shared player info
+        self.assertEqual(len(match.data), 2)
+        self.assertEqual(len(period_data.data), 2)
+        self.assertEqual(len(score_flow.data), 1)
+        self.assertEqual(period_data.data.iloc[1]['firstname'], 'Jane')
+        self.assertEqual(score_flow.data.iloc[0]['surname'], 'Doe')
+
+    @patch('Core.MatchPayload.http_session.get')
+    def test_failed_fetch_is_not_retried_by_each_parser(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=404)
+
+        payload = MatchPayload(8005, 80121405)
+        period_data = PeriodData(8005, 80121405, payload=payload)
+        score_flow = ScoreFlow(8005, 80121405, payload=payload)
+        period_data.fetch_data()
+        score_flow.fetch_data()
+
+        mock_get.assert_called_once()
+        self.assertTrue(period_data.data.empty)
+        self.assertTrue(score_flow.data.empty)
+
+    @patch('Core.MatchPayload.http_session.get')
+    def test_undecodable_body_is_a_failed_fetch(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, content=b'<html>')
+        mock_get.return_value.json.side_effect = ValueError('Expecting value')
+
+        payload = MatchPayload(8005, 80121405)
+        self.assertFalse(payload.fetch_data())
+        self.assertIsNone(payload.status_code)
+        self.assertIsNone(payload.fingerprint)
+
+        # The parsers see the failed fetch without downloading it again
+        period_data = PeriodData(8005, 80121405, payload=payload)
+        period_data.fetch_data()
+        mock_get.assert_called_once()
+        self.assertTrue(period_data.data.empty)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import math
+import unittest
+from unittest.mock import MagicMock
+from Core.MatchDetails import Match
+from Core.MatchPayload import MatchPayload
+from Core.MatchRecords import MatchRecordParser, record_type
+from Core.MatchTransform import MatchTransform
+from Core.PeriodData import PeriodData
+from Core.ScoreFlowData import ScoreFlow
+from Utils.JsonLoader import load_json_fields
+
+def match_payload():
+    players = [{'playerId': 1000 + index, 'squadId': 801 if index % 2 else 806, 'goals': index, 'squadCode': 'X'} for index in range(4)]
+    players[2].pop('goals')  # Stats missing for one player
+    players.append({'playerId': 0, 'squadId': 801, 'goals': 1})
+    players.append({'playerId': 0, 'squadId': 806, 'goals': 2})
+    return {'matchStats': {
+        'matchInfo': {'homeSquadId': 801, 'awaySquadId': 806, 'roundNumber': 3},
+        'teamInfo': {'team': [{'squadId': 801, 'squadName': ' Magic '}, {'squadId': 806, 'squadName': 'Pulse'}]},
+        'playerInfo': {'player': [{'playerId': 1000 + index, 'firstname': f' First{index}', 'surname': f'Last{index}', 'displayName': f'F.Last{index}'} for index in range(4)]
+                       + [{'playerId': 0, 'firstname': 'Grace', 'surname': 'Nweke'}, {'playerId': 0, 'firstname': 'Nobody', 'surname': 'Known'}]},
+        'playerStats': {'player': players},
+        'playerPeriodStats': {'player': [dict(player, period=period) for player in players for period in (1, 2)] + [{'playerId': 1009, 'squadId': 801, 'period': 1}]},
+        'scoreFlow': {'score': [{'playerId': 1003, 'squadId': 801, 'period': 1, 'periodSeconds': 12}, {'playerId': 1009, 'squadId': 801, 'period': 1},
+                                {'playerId': 1000, 'squadId': 806, 'period': 2, 'periodSeconds': 40}]},
+    }}
+
+# Stored value of a field, with NaN as NULL
+def stored(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+class TestMatchRecords(unittest.TestCase):
+    def setUp(self):
+        self.json_fields = load_json_fields()
+        self.specs = {'match': self.json_fields['match_fields'], 'player': self.json_fields['player_fields'],
+                      'period': self.json_fields['period_fields'], 'score_flow': self.json_fields['score_flow_fields']}
+        self.resolve_player_ids = lambda names: {name: 2000 for name in names if name[0] == 'Grace'}
+
+    def records(self):
+        payload = MatchPayload(12438, 124380101).load(match_payload())
+        parser = MatchRecordParser(12438, 124380101, 12438, 8, 2024, '8-12438', self.resolve_player_ids, self.specs, MagicMock(), payload=payload)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return parser.parse()
+
+    def dataframe_rows(self):
+        payload = MatchPayload(12438, 124380101).load(match_payload())
+        transform = MatchTransform(124380101, 12438, 8, '8-12438', self.resolve_player_ids, MagicMock())
+        with contextlib.redirect_stdout(io.StringIO()):
+            match = Match(12438, 124380101, 12438, 8, 2024, payload=payload)
+            match.fetch_data()
+            period = PeriodData(12438, 124380101, payload=payload)
+            period.fetch_data()
+            score_flow = ScoreFlow(12438, 124380101, payload=payload)
+            score_flow.fetch_data()
+        match_rows, player_rows = transform.match_records(match.data)
+        return {'match': match_rows, 'player': player_rows, 'period': transform.period_records(period.data),
+                'score_flow': transform.score_flow_records(score_flow.data)}
+
+    def test_same_stored_values_as_the_dataframe_path(self):
+        records, rows = self.records(), self.dataframe_rows()
+        for kind, spec in self.specs.items():
+            self.assertEqual(len(records[kind]), len(rows[kind]), kind)
+            for record, row in zip(records[kind], rows[kind]):
+                for field in spec['required_fields'] + spec['optional_fields']:
+                    self.assertEqual(stored(record.get(field)), stored(row.get(field)), f"{kind}.{field}")
+
+    def test_player_names_are_the_names_resolved_by_the_parse(self):
+        requested = []
+        resolve_player_ids = self.resolve_player_ids
+        self.resolve_player_ids = lambda names: requested.extend(names) or resolve_player_ids(names)
+        self.records()
+
+        payload = MatchPayload(12438, 124380101).load(match_payload())
+        parser = MatchRecordParser(12438, 124380101, 12438, 8, 2024, '8-12438', self.resolve_player_ids, self.specs, MagicMock(), payload=payload)
+        self.assertEqual(set(parser.player_names()), set(requested))
+        self.assertIn(('Grace', 'Nweke', 'Magic'), requested)
+
+    def test_records_are_insert_ready_tuples(self):
+        records = self.records()
+        match = records['match'][0]
+        self.assertIsInstance(match, tuple)
+        self.assertEqual(match._fields[:2], ('fixtureId', 'matchId'))
+        self.assertEqual(match['uniqueMatchId'], '124380101-1000')
+        self.assertEqual(dict(match)['uniqueSquadId'], '806-Pulse')
+        self.assertIsNone(match.get('tries'))
+        self.assertIsNone(match.get('notAField'))
+        # Both playerId 0 rows are joined with every playerId 0 player, as a left merge does; Grace resolves in each squad
+        self.assertEqual([record['playerId'] for record in records['match']], ['1000', '1001', '1002', '1003', '2000', '2000'])
+        self.assertEqual([record['scoreFlowId'] for record in records['score_flow']], ['124380101_flow_1', '124380101_flow_3'])
+        self.assertFalse(hasattr(match, '__dict__'))
+
+    def test_record_types_are_shared_and_deduplicated(self):
+        record = record_type('Row', ['a', 'b', 'a'])
+        self.assertIs(record, record_type('Row', ['a', 'b']))
+        self.assertEqual(record._fields, ('a', 'b'))
+        with self.assertRaises(KeyError):
+            record(1)['c']
+
+if __name__ == '__main__':
+    unittest.main()
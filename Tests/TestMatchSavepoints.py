@@ -0,0 +1,138 @@
+import contextlib
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+import mysql.connector
+from Core.MatchPayload import MatchPayload
+from Core.Scraper import Scraper, MATCH_SAVEPOINT
+from DatabaseUtils.database_helper import DatabaseHelper
+from DatabaseUtils.write_scheduler import WritePlan
+from Utils.table_batches import TableBatches
+
+COLUMNS = {'netball_match': ['uniqueMatchId'], 'netball_period': ['uniquePeriodId', 'matchId']}
+
+class TestMatchSavepoints(unittest.TestCase):
+    def setUp(self):
+        # Scraper without a database connection, writing with a real DatabaseHelper on a mocked cursor
+        self.connection = MagicMock()
+        self.cursor = MagicMock()
+        self.cursor.executemany.side_effect = lambda query, values: self.check(values)
+        self.prepared = MagicMock()
+        self.prepared.execute.side_effect = lambda query, values: self.check([values])
+        self.connection.cursor.side_effect = lambda **kwargs: self.prepared if kwargs.get('prepared') else self.cursor
+        self.bad_period = None
+
+        db_helper = DatabaseHelper(self.connection, MagicMock(), MagicMock())
+        db_helper.get_table_columns = MagicMock(side_effect=COLUMNS.get)
+        db_helper.get_primary_keys = MagicMock(side_effect=lambda table_name: COLUMNS[table_name][:1])
+        db_helper._max_allowed_packet = 10000
+
+        self.scraper = Scraper.__new__(Scraper)
+        self.scraper.connection = self.connection
+        self.scraper.db_helper = db_helper
+        self.scraper.error_logger = MagicMock()
+        self.scraper.bulk_loader = None
+        self.scraper.write_scheduler = None
+        self.scraper.commit_every = 0
+
+        self.match_ids = ['1', '2', '3']
+        matches = TableBatches('match', use_arrow=False)
+        periods = TableBatches('period', use_arrow=False)
+        for match_id in self.match_ids:
+            matches.append([{'uniqueMatchId': match_id}], match_id)
+            periods.append([{'uniquePeriodId': f"{match_id}-{period}", 'matchId': match_id} for period in (1, 2)], match_id)
+        self.match_tables = [('netball_match', matches, {'required_fields': COLUMNS['netball_match']}, 'uniqueMatchId'),
+                             ('netball_period', periods, {'required_fields': COLUMNS['netball_period']}, 'uniquePeriodId')]
+
+    # The server rejects the statements writing the bad period row
+    def check(self, values):
+        if any(self.bad_period in row for row in values):
+            raise mysql.connector.Error(msg='Cannot add or update a child row: a foreign key constraint fails')
+
+    def savepoint_statements(self):
+        return [call.args[0] for call in self.cursor.execute.call_args_list]
+
+    def test_match_with_a_failed_row_rolled_back_to_its_savepoint(self):
+        self.bad_period = '2-2'
+        failed = self.scraper.insert_match_rows(self.match_ids, self.match_tables)
+
+        self.assertEqual(failed, {'2'})
+        self.assertEqual(self.savepoint_statements(), [
+            f"SAVEPOINT {MATCH_SAVEPOINT}", f"RELEASE SAVEPOINT {MATCH_SAVEPOINT}",
+            f"SAVEPOINT {MATCH_SAVEPOINT}", f"ROLLBACK TO SAVEPOINT {MATCH_SAVEPOINT}",
+            f"SAVEPOINT {MATCH_SAVEPOINT}", f"RELEASE SAVEPOINT {MATCH_SAVEPOINT}",
+        ])
+        # The good period row of match 2 was retried on its own, then rolled back with the match row
+        self.assertEqual([call.args[1] for call in self.prepared.execute.call_args_list], [('2-1', '2'), ('2-2', '2')])
+        # Each match is written with one statement per table, the fixture is committed by the caller
+        self.assertEqual(self.cursor.executemany.call_count, 6)
+        self.connection.commit.assert_not_called()
+
+    def test_commit_every_few_matches(self):
+        self.scraper.commit_every = 2
+        self.assertEqual(self.scraper.insert_match_rows(self.match_ids, self.match_tables), set())
+        self.connection.commit.assert_called_once()
+
+    def test_lost_transaction_fails_the_fixture(self):
+        self.bad_period = '1-1'
+        self.cursor.execute.side_effect = lambda statement: self.lost(statement)
+        with self.assertRaises(mysql.connector.Error):
+            self.scraper.insert_match_rows(self.match_ids, self.match_tables)
+
+    @staticmethod
+    def lost(statement):
+        if statement.startswith('ROLLBACK TO'):
+            raise mysql.connector.Error(msg=f"SAVEPOINT {MATCH_SAVEPOINT} does not exist")
+
+class TestFailedMatchLedger(unittest.TestCase):
+    def test_matches_with_failed_rows_left_out_of_the_ledger(self):
+        scraper = Scraper.__new__(Scraper)
+        scraper.error_logger = MagicMock()
+        scraper.ledger = MagicMock()
+        scraper.pending_writes = WritePlan()
+        scraper.pending_writes.add('netball_period', [{'uniquePeriodId': '1-1', 'matchId': 1}, {'uniquePeriodId': '2-1', 'matchId': 2}],
+                                   {}, 'uniquePeriodId')
+        scraper.pending_fixture_ids = [12438]
+        scraper.pending_ledger_updates = [(12438, 1, 'complete', 'f1', 'p1'), (12438, 2, 'complete', 'f2', 'p2')]
+        scraper.write_scheduler = MagicMock()
+        scraper.write_scheduler.write.return_value = {'netball_period': [({'uniquePeriodId': '2-1', 'matchId': 2}, 'Data too long')]}
+
+        scraper.flush_pending_writes()
+
+        scraper.ledger.record.assert_called_once_with(12438, 1, 'complete', 'f1', 'p1')
+        scraper.ledger.save.assert_called_once()
+        self.assertEqual(Scraper.match_ids_of([({'matchId': 2}, 'err'), ({'playerId': 7}, 'err')]), {'2'})
+
+class TestLeaguePlayerNames(unittest.TestCase):
+    def test_names_of_every_match_resolved_in_one_batch(self):
+        scraper = Scraper.__new__(Scraper)
+        scraper.error_logger = MagicMock()
+        scraper.player_index = MagicMock()
+        scraper.match_fields = scraper.player_fields = scraper.period_fields = scraper.score_flow_fields = {}
+        payloads = {match_id: MatchPayload(12438, match_id).load({'matchStats': {
+            'teamInfo': {'team': [{'squadId': 801, 'squadName': 'Magic'}]},
+            'playerStats': {'player': [{'playerId': 0, 'squadId': 801, 'firstname': 'Grace', 'surname': 'Nweke'}]},
+            'scoreFlow': {'score': [{'playerId': match_id, 'squadId': 801, 'firstname': 'Kate', 'surname': 'Burley'}]},
+        }}) for match_id in (124380101, 124380102)}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.resolve_league_players(12438, 12438, 8, 2024, {'uniqueSportId': '8-12438'}, payloads)
+
+        scraper.player_index.resolve_many.assert_called_once()
+        self.assertEqual(set(scraper.player_index.resolve_many.call_args.args[0]), {('Grace', 'Nweke', 'Magic')})
+
+class TestWritersClosed(unittest.TestCase):
+    def test_writers_closed_when_a_league_fails(self):
+        scraper = Scraper.__new__(Scraper)
+        scraper.write_scheduler = MagicMock()
+        scraper.scrape_league = MagicMock(side_effect=mysql.connector.Error(msg='Lost connection'))
+        leagues = pd.DataFrame([{'id': 12438, 'league_season': 'ANZ Premiership (2024)'}])
+
+        with patch('Core.Scraper.League.fetch_leagues', return_value=(leagues, None)), self.assertRaises(mysql.connector.Error):
+            scraper.scrape_entire_database()
+
+        scraper.write_scheduler.close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
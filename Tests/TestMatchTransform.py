@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+from Core.MatchTransform import MatchTransform, str_column, clean_name_column
+
+class TestMatchTransform(unittest.TestCase):
+    def setUp(self):
+        self.resolve_player_ids = MagicMock(side_effect=lambda names: {name: 2000 for name in names})
+        self.transform = MatchTransform(124380101, 12438, 8, '8-12438', self.resolve_player_ids, MagicMock())
+
+    def match_frame(self):
+        return pd.DataFrame([
+            {'playerId': 1000, 'squadId': 801, 'squadName': ' Magic ', 'firstname': ' Ameliaranne ', 'surname': 'Ekenasio', 'displayName': 'A.Ekenasio'},
+            {'playerId': 0, 'squadId': 806, 'squadName': np.nan, 'firstname': 'Grace', 'surname': 'Nweke', 'displayName': 'G.Nweke'},
+            {'playerId': 0, 'squadId': 806, 'squadName': 'Pulse', 'firstname': np.nan, 'surname': 'Unknown', 'displayName': None},
+        ])
+
+    def test_column_helpers_match_per_value_conversion(self):
+        df = pd.DataFrame({'id': [1.0, np.nan], 'name': [' a ', 3]})
+        self.assertEqual(str_column(df, 'id').tolist(), ['1.0', 'nan'])
+        self.assertEqual(str_column(df, 'missing').tolist(), ['Unknown', 'Unknown'])
+        self.assertEqual(clean_name_column(df, 'name', 'Unknown Squad').tolist(), ['a', 'Unknown Squad'])
+        self.assertEqual(clean_name_column(df, 'missing', 'Unknown Squad').tolist(), ['', ''])
+
+    def test_match_records_build_ids_and_resolve_invalid_players(self):
+        match_rows, player_rows = self.transform.match_records(self.match_frame())
+
+        self.assertEqual(len(match_rows), 2)  # The row without a firstname cannot be resolved
+        self.resolve_player_ids.assert_called_once_with([('Grace', 'Nweke', 'Unknown Squad')])
+        self.assertEqual(match_rows[0]['uniqueMatchId'], '124380101-1000')
+        self.assertEqual(match_rows[0]['uniquePlayerId'], '1000-801')
+        self.assertEqual(match_rows[0]['uniqueSquadId'], '801-Magic')
+        self.assertEqual(match_rows[0]['uniqueFixtureId'], '12438-124380101')
+        self.assertEqual(match_rows[1]['playerId'], '2000')
+        self.assertEqual(match_rows[1]['uniqueSquadId'], '806-Unknown Squad')
+        self.assertEqual(player_rows[0]['firstname'], 'Ameliaranne')
+        self.assertEqual(player_rows[1]['sportId'], 8)
+        self.assertIsInstance(match_rows[0]['squadId'], str)
+
+    def test_period_and_score_flow_rows_need_a_match_row(self):
+        self.transform.match_records(self.match_frame())
+        period = pd.DataFrame([
+            {'playerId': 1000, 'squadId': 801, 'period': 1, 'firstname': 'A', 'surname': 'E'},
+            {'playerId': 1001, 'squadId': 801, 'period': 1, 'firstname': 'B', 'surname': 'F'},
+        ])
+        period_rows = self.transform.period_records(period)
+        self.assertEqual([row['uniquePeriodId'] for row in period_rows], ['124380101_1'])
+        self.assertEqual(period_rows[0]['matchId'], '124380101')
+
+        score_flow = pd.DataFrame([
+            {'playerId': 1001, 'squadId': 801, 'firstname': 'B', 'surname': 'F'},
+            {'playerId': 1000, 'squadId': 801, 'firstname': 'A', 'surname': 'E'},
+        ])
+        score_flow_rows = self.transform.score_flow_records(score_flow)
+        self.assertEqual([row['scoreFlowId'] for row in score_flow_rows], ['124380101_flow_2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import MagicMock
+from Utils.name_matcher import NameMatcher, fold_name, first_name_similarity, load_player_records, PLAYER_INFO_PATH
+
+class TestNameMatcher(unittest.TestCase):
+    def setUp(self):
+        self.logger = MagicMock()
+        self.matcher = NameMatcher(0.85, self.logger).add_records([
+            {'playerId': '1001', 'firstname': 'Ameliaranne', 'surname': 'Ekenasio', 'displayName': 'A.Ekenasio', 'squadName': 'Magic'},
+            {'playerId': '1002', 'firstname': 'Kate', 'surname': 'Burley', 'squadName': 'Pulse'},
+            {'playerId': '1003', 'firstname': 'Kate', 'surname': 'Burley', 'squadName': 'Magic'},
+            {'playerId': '1004', 'firstname': "Te Paea", 'surname': "Selby-Rickit", 'squadName': 'Stars'},
+            {'playerId': '0', 'firstname': 'Zero', 'surname': 'Player', 'squadName': 'Magic'},
+        ])
+
+    def test_fold_name(self):
+        self.assertEqual(fold_name(" Te-Paea O'Neill "), 'te paea o neill')
+        self.assertEqual(fold_name('Zoë'), 'zoe')
+        self.assertEqual(fold_name(None), '')
+
+    def test_first_name_similarity(self):
+        self.assertEqual(first_name_similarity('tepaea', 'te paea'), 1.0)
+        self.assertEqual(first_name_similarity('a', 'ameliaranne'), 0.8)
+        self.assertEqual(first_name_similarity('kat', 'katherine'), 0.9)
+        self.assertLess(first_name_similarity('grace', 'kate'), 0.5)
+
+    def test_typos_initials_and_punctuation_are_matched(self):
+        self.assertEqual(self.matcher.match('Ameliaranne', 'Ekenassio')[0], '1001')
+        self.assertEqual(self.matcher.match('A', 'Ekenasio')[0], '1001')
+        self.assertEqual(self.matcher.match('TePaea', 'Selby Rickit')[0], '1004')
+
+    def test_threshold_and_invalid_records(self):
+        player_id, score = self.matcher.match('Grace', 'Nweke')
+        self.assertIsNone(player_id)
+        self.assertEqual(score, 0.0)  # No candidate shares enough surname trigrams
+        self.assertIsNone(self.matcher.match('Zero', 'Player')[0])  # playerId 0 is never a candidate
+        self.assertIsNone(self.matcher.match('Bob', 'Burley')[0])
+
+    def test_squad_breaks_ties_and_ambiguous_names_are_rejected(self):
+        self.assertEqual(self.matcher.match('Kate', 'Burly', 'Magic')[0], '1003')
+        self.assertIsNone(self.matcher.match('Kate', 'Burly')[0])
+        self.logger.warning.assert_called_once()
+
+    def test_match_many_scores_each_name_once(self):
+        names = [('A', 'Ekenasio', None), ('A', 'Ekenasio', None), ('Grace', 'Nweke', None)]
+        self.assertEqual({name: match[0] for name, match in self.matcher.match_many(names).items()},
+                         {names[0]: '1001', names[2]: None})
+
+    def test_player_export_is_read_line_by_line(self):
+        records = load_player_records(PLAYER_INFO_PATH)
+        self.assertTrue(records)
+        self.assertTrue({'playerId', 'firstname', 'surname', 'squadName'} <= set(records[0]))
+        self.assertEqual(load_player_records('missing_player_info.json'), [])
+
+if __name__ == '__main__':
+    unittest.main()
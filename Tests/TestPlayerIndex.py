@@ -0,0 +1,63 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+from DatabaseUtils.player_index import PlayerIndex, normalize_name
+
+class TestPlayerIndex(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.cursor = self.connection.cursor.return_value
+        self.cursor.fetchall.return_value = [
+            (1001, 'Grace', 'Nweke', 'Mainland Tactix'),
+            (1002, 'Zoë', 'Davies', 'Northern Stars'),
+            (1003, 'Kate', 'Burley', 'Pulse'),
+            (1004, 'Kate', 'Burley', 'Magic'),
+        ]
+        self.error_logger = MagicMock()
+        self.info_logger = MagicMock()
+        self.index = PlayerIndex(self.connection, self.info_logger, self.error_logger, player_info_path=os.devnull)
+
+    def test_lookup_by_name_and_squad(self):
+        self.assertEqual(self.index.find(' grace ', 'NWEKE', 'mainland tactix'), 1001)
+        self.assertEqual(self.index.find('Kate', 'Burley', 'Magic'), 1004)
+        self.assertIsNone(self.index.find('Grace', 'Nweke', 'Pulse'))
+
+    def test_unknown_squad_matches_on_name_only(self):
+        self.assertEqual(self.index.find('Zoe', 'Davies', 'Unknown Squad'), 1002)  # Accents are ignored like the collation does
+        self.assertEqual(self.index.find('Kate', 'Burley'), 1003)
+        self.error_logger.warning.assert_called_once()  # Two players share the name, the first one is used
+
+    def test_table_loaded_once_and_misses_cached(self):
+        names = [('Grace', 'Nweke', 'Mainland Tactix'), ('Nobody', 'Here', 'Pulse'), ('Nobody', 'Here', 'Pulse')]
+        self.assertEqual(self.index.resolve_many(names), {names[0]: 1001, names[1]: None})
+        self.index.find('Nobody', 'Here', 'Pulse')
+
+        self.cursor.execute.assert_called_once()
+        self.assertEqual(self.error_logger.warning.call_count, 1)
+
+    def test_exact_misses_fall_back_to_fuzzy_matching(self):
+        names = [('Grace', 'Nweeke', 'Mainland Tactix'), ('Zoe', 'Davis', 'Unknown Squad'), ('Kate', 'Burly', 'Unknown Squad')]
+        self.assertEqual(self.index.resolve_many(names), {names[0]: 1001, names[1]: 1002, names[2]: None})
+        self.assertEqual(self.index.resolve_many(names[:1]), {names[0]: 1001})
+
+        fuzzy_logs = [call for call in self.info_logger.info.call_args_list if 'Fuzzy matched' in call.args[0]]
+        self.assertEqual(len(fuzzy_logs), 2)  # The second batch is served from the cache
+        self.assertEqual(self.error_logger.warning.call_count, 2)  # Burley is ambiguous without a squad, then a miss
+
+    def test_fuzzy_results_shared_by_names_without_a_squad(self):
+        self.assertEqual(self.index.resolve_many([('Zoe', 'Davis', 'Unknown Squad')]), {('Zoe', 'Davis', 'Unknown Squad'): 1002})
+        self.index.matcher.match_many = MagicMock()
+        self.assertEqual(self.index.resolve_many([('zoe', 'Davis', '')]), {('zoe', 'Davis', ''): 1002})
+        self.index.matcher.match_many.assert_not_called()
+
+    def test_fuzzy_matching_can_be_disabled(self):
+        index = PlayerIndex(self.connection, MagicMock(), self.error_logger, fuzzy_threshold=None)
+        self.assertEqual(index.resolve_many([('Grace', 'Nweeke', 'Mainland Tactix')]), {('Grace', 'Nweeke', 'Mainland Tactix'): None})
+        self.assertIsNone(index.matcher)
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  Zoë '), 'zoe')
+        self.assertEqual(normalize_name(None), '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+from Utils.rate_limiter import AdaptiveLimiter, TokenBucket
+
+class TestRateLimiter(unittest.TestCase):
+    def test_additive_increase_on_healthy_responses(self):
+        limiter = AdaptiveLimiter(rate=None, initial_limit=2, max_limit=4)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.1, 200)
+
+        self.assertEqual(limiter.current_limit, 4)
+        self.assertAlmostEqual(limiter.observed_latency, 0.1)
+
+    def test_multiplicative_decrease_on_throttling(self):
+        limiter = AdaptiveLimiter(rate=None, initial_limit=16, max_limit=32, decrease_cooldown=0)
+        limiter.acquire()
+        limiter.release(0.1, 429)
+        self.assertEqual(limiter.current_limit, 8)
+
+        limiter.acquire()
+        limiter.release(0.1, 503)
+        self.assertEqual(limiter.current_limit, 4)
+
+        limiter.acquire()
+        limiter.release(0.1, error=True)
+        self.assertEqual(limiter.current_limit, 2)
+        self.assertEqual(limiter.stats()['throttled'], 2)
+        self.assertEqual(limiter.stats()['errors'], 1)
+
+    def test_latency_spike_backs_off_once_per_cooldown(self):
+        limiter = AdaptiveLimiter(rate=None, initial_limit=16, max_limit=32, decrease_cooldown=60)
+        limiter.acquire()
+        limiter.release(0.1, 200)
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(5.0, 200)
+
+        self.assertEqual(limiter.current_limit, 8)
+        self.assertEqual(limiter.stats()['decreases'], 1)
+
+    def test_fast_requests_are_never_spikes(self):
+        limiter = AdaptiveLimiter(rate=None, initial_limit=4, max_limit=4, decrease_cooldown=0)
+        limiter.acquire()
+        limiter.release(0.001, 200)
+        limiter.acquire()
+        limiter.release(0.05, 200)
+
+        self.assertEqual(limiter.current_limit, 4)
+        self.assertEqual(limiter.stats()['decreases'], 0)
+
+    def test_in_flight_requests_never_exceed_limit(self):
+        limiter = AdaptiveLimiter(rate=None, initial_limit=2, max_limit=2)
+        lock = threading.Lock()
+        peak = {'value': 0}
+
+        def worker():
+            limiter.acquire()
+            with lock:
+                peak['value'] = max(peak['value'], limiter.in_flight)
+            time.sleep(0.01)
+            limiter.release(0.01, 200)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(peak['value'], 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_token_bucket_caps_rate(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from Utils import http_session
+from Utils.response_cache import ResponseCache, ttl_for, IMMUTABLE, FIXTURE_TTL, COMPETITIONS_TTL
+
+MATCH_URL = 'https://mc.championdata.com/data/8005/80121405.json'
+
+def make_response(body, status_code=200, headers=None):
+    response = MagicMock(status_code=status_code)
+    response.content = json.dumps(body).encode('utf-8')
+    response.headers = headers or {}
+    return response
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        http_session.disable_cache()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_ttl_rules(self):
+        self.assertEqual(ttl_for('http://mc.championdata.com/data/competitions.json', b'{}'), COMPETITIONS_TTL)
+        self.assertEqual(ttl_for('http://mc.championdata.com/data/8005/fixture.json?/', b'{}'), FIXTURE_TTL)
+        self.assertIs(ttl_for(MATCH_URL, b'{"matchInfo": {"matchStatus": "complete"}}'), IMMUTABLE)
+        self.assertEqual(ttl_for(MATCH_URL, b'{"matchInfo": {"matchStatus": "incomplete"}}'), 0)
+
+    def test_round_trip_is_compressed_and_immutable(self):
+        cache = ResponseCache(self.cache_dir)
+        body = {'matchStats': {'matchInfo': {'matchStatus': 'complete'}}}
+        cache.put(MATCH_URL, make_response(body, headers={'ETag': '"abc"'}))
+
+        cached = cache.get(MATCH_URL)
+        self.assertEqual(cached.json(), body)
+        self.assertEqual(cached.headers['ETag'], '"abc"')
+        self.assertTrue(cache.is_fresh(cache.get_meta(MATCH_URL), now=float('inf')))
+
+    def test_expired_entries_only_served_offline(self):
+        cache = ResponseCache(self.cache_dir)
+        cache.put('http://mc.championdata.com/data/8005/fixture.json?/', make_response({'fixture': {}}))
+        meta = cache.get_meta('http://mc.championdata.com/data/8005/fixture.json?/')
+        self.assertFalse(cache.is_fresh(meta, now=meta['stored_at'] + FIXTURE_TTL + 1))
+
+        with patch('Utils.response_cache.time.time', return_value=meta['stored_at'] + FIXTURE_TTL + 1):
+            self.assertIsNone(cache.get('http://mc.championdata.com/data/8005/fixture.json?/'))
+            cache.offline = True
+            self.assertEqual(cache.get('http://mc.championdata.com/data/8005/fixture.json?/').json(), {'fixture': {}})
+
+    @patch('Utils.http_session._get_with_retries')
+    def test_http_session_uses_cache(self, mock_get):
+        mock_get.return_value = make_response({'matchStats': {'matchInfo': {'matchStatus': 'complete'}}})
+        http_session.configure_cache(self.cache_dir)
+
+        first = http_session.get(MATCH_URL)
+        second = http_session.get(MATCH_URL)
+
+        mock_get.assert_called_once()
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.json(), {'matchStats': {'matchInfo': {'matchStatus': 'complete'}}})
+
+    @patch('Utils.http_session._get_with_retries')
+    def test_offline_mode_never_hits_network(self, mock_get):
+        http_session.configure_cache(self.cache_dir, offline=True)
+
+        response = http_session.get(MATCH_URL)
+
+        mock_get.assert_not_called()
+        self.assertEqual(response.status_code, 504)
+
+    @patch('Utils.http_session._get_with_retries')
+    def test_stale_entry_revalidated_with_conditional_get(self, mock_get):
+        fixture_url = 'http://mc.championdata.com/data/8005/fixture.json?/'
+        cache = http_session.configure_cache(self.cache_dir)
+        cache.put(fixture_url, make_response({'fixture': {}}, headers={'ETag': '"v1"', 'Last-Modified': 'Sat, 01 Jun 2024 00:00:00 GMT'}))
+        cache.save_parsed(fixture_url, 'fixture', ['parsed'])
+        stored_at = cache.get_meta(fixture_url)['stored_at']
+
+        mock_get.return_value = MagicMock(status_code=304, headers={})
+        with patch('Utils.response_cache.time.time', return_value=stored_at + FIXTURE_TTL + 1):
+            response = http_session.get(fixture_url)
+
+        sent_headers = mock_get.call_args.kwargs['headers']
+        self.assertEqual(sent_headers['If-None-Match'], '"v1"')
+        self.assertEqual(sent_headers['If-Modified-Since'], 'Sat, 01 Jun 2024 00:00:00 GMT')
+        self.assertTrue(response.not_modified)
+        self.assertEqual(response.json(), {'fixture': {}})
+        self.assertEqual(cache.load_parsed(fixture_url, 'fixture'), ['parsed'])
+        self.assertEqual(cache.get_meta(fixture_url)['stored_at'], stored_at + FIXTURE_TTL + 1)
+
+    def test_new_body_discards_parsed_artifacts(self):
+        fixture_url = 'http://mc.championdata.com/data/8005/fixture.json?/'
+        cache = ResponseCache(self.cache_dir)
+        cache.put(fixture_url, make_response({'fixture': {}}))
+        cache.save_parsed(fixture_url, 'fixture', ['parsed'])
+
+        cache.put(fixture_url, make_response({'fixture': {'match': []}}))
+
+        self.assertIsNone(cache.load_parsed(fixture_url, 'fixture'))
+
+    @patch('Utils.http_session._get_with_retries')
+    def test_expired_entry_regains_its_ttl_after_revalidation(self, mock_get):
+        fixture_url = 'http://mc.championdata.com/data/8005/fixture.json?/'
+        cache = http_session.configure_cache(self.cache_dir)
+        cache.put(fixture_url, make_response({'fixture': {}}, headers={'ETag': '"v1"'}))
+
+        http_session.expire(fixture_url)
+        self.assertIsNone(cache.get(fixture_url))
+
+        mock_get.return_value = MagicMock(status_code=304, headers={})
+        self.assertTrue(http_session.get(fixture_url).not_modified)
+        self.assertEqual(cache.get_meta(fixture_url)['ttl'], FIXTURE_TTL)
+        self.assertIsNotNone(cache.get(fixture_url))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from Core.Scheduler import MatchScheduler, match_start_timestamp
+
+START = datetime(2024, 4, 1, 9, 0, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def league_rows():
+    return pd.DataFrame([
+        {'id': 12438, 'season': 2024, 'regulationPeriods': 4},
+        {'id': 10393, 'season': 2017, 'regulationPeriods': 4},
+    ])
+
+
+def fixture_with_pending(*match_ids):
+    fixture = MagicMock()
+    fixture.pending = pd.DataFrame([
+        {'matchId': match_id, 'matchStatus': 'scheduled', 'utcStartTime': '2024-04-01 09:00:00',
+         'localStartTime': '2024-04-01 19:00:00'} for match_id in match_ids
+    ])
+    return fixture
+
+
+def payload_with_status(status):
+    payload = MagicMock()
+    payload.fetch_data.return_value = True
+    payload.match_info = {'matchStatus': status}
+    return payload
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(START)
+        self.scraper = MagicMock()
+        self.scheduler = MatchScheduler(self.scraper, min_season=2024, match_duration=7200, grace=600,
+                                        retry_base=300, retry_max=1200, max_attempts=3, clock=self.clock)
+
+    def test_start_time_prefers_utc(self):
+        row = {'utcStartTime': '2024-04-01 09:00:00', 'localStartTime': '2024-04-01 19:00:00'}
+        self.assertEqual(match_start_timestamp(row), START)
+        self.assertIsNone(match_start_timestamp({'utcStartTime': None, 'localStartTime': ''}))
+
+    @patch('Core.Scheduler.Fixture')
+    @patch('Core.Scheduler.League.fetch_leagues')
+    def test_refresh_queues_pending_matches_of_active_leagues(self, mock_fetch_leagues, mock_fixture):
+        mock_fetch_leagues.return_value = (league_rows(), [])
+        mock_fixture.return_value = fixture_with_pending(1, 2)
+
+        self.scheduler.refresh()
+        self.scheduler.refresh()  # Matches already queued are not queued twice
+
+        self.assertEqual(mock_fixture.call_args[0][0], 12438)
+        self.assertEqual(len(self.scheduler.queue), 2)
+        self.assertEqual(self.scheduler.next_due_in(), 7200 + 600)
+        self.assertEqual(self.scraper.db_helper.invalidate_schema.call_count, 2)  # Tables may be rebuilt while it runs
+
+    @patch('Core.Scheduler.http_session.expire')
+    @patch('Core.Scheduler.MatchPayload')
+    @patch('Core.Scheduler.Fixture')
+    @patch('Core.Scheduler.League.fetch_leagues')
+    def test_complete_matches_are_scraped_together(self, mock_fetch_leagues, mock_fixture, mock_payload, mock_expire):
+        mock_fetch_leagues.return_value = (league_rows(), [])
+        mock_fixture.return_value = fixture_with_pending(1, 2)
+        mock_payload.return_value = payload_with_status('complete')
+        self.scraper.scrape_league.return_value = {1, 2}
+        self.scheduler.refresh()
+
+        self.scheduler.run_pending()
+        self.scraper.scrape_league.assert_not_called()  # Not due yet
+
+        self.clock.now += 7200 + 600
+        self.scheduler.run_pending()
+
+        self.scraper.scrape_league.assert_called_once()
+        self.assertEqual(self.scraper.scrape_league.call_args[1]['match_ids'], [1, 2])
+        self.assertIn('/12438/fixture.json', mock_expire.call_args[0][0])
+        self.assertEqual(self.scheduler.queue, [])
+        self.assertEqual(self.scheduler.queued, set())
+
+    @patch('Core.Scheduler.MatchPayload')
+    def test_incomplete_matches_back_off_then_give_up(self, mock_payload):
+        mock_payload.return_value = payload_with_status('incomplete')
+        self.scheduler.leagues[12438] = league_rows().iloc[0]
+        self.scheduler.schedule(12438, 1, START)
+
+        delays = []
+        while self.scheduler.queue:
+            self.scheduler.run_pending()
+            if self.scheduler.queue:
+                delays.append(self.scheduler.next_due_in())
+                self.clock.now += self.scheduler.next_due_in()
+
+        self.assertEqual(delays, [300, 600])
+        self.assertEqual(mock_payload.call_count, 3)
+        self.scraper.scrape_league.assert_not_called()
+        self.assertEqual(self.scheduler.queued, set())
+
+    @patch('Core.Scheduler.http_session.expire')
+    @patch('Core.Scheduler.MatchPayload')
+    def test_complete_match_not_stored_is_retried(self, mock_payload, mock_expire):
+        mock_payload.return_value = payload_with_status('complete')
+        self.scraper.scrape_league.return_value = {1}  # The fixture still lists match 2 as pending
+        self.scheduler.leagues[12438] = league_rows().iloc[0]
+        self.scheduler.schedule(12438, 1, START)
+        self.scheduler.schedule(12438, 2, START)
+
+        self.scheduler.run_pending()
+
+        self.assertEqual(self.scheduler.queued, {(12438, 2)})
+        self.assertEqual(self.scheduler.next_due_in(), 300)
+
+    @patch('Core.Scheduler.MatchPayload')
+    def test_network_error_keeps_the_matches_queued(self, mock_payload):
+        mock_payload.return_value.fetch_data.side_effect = ConnectionError('Connection reset by peer')
+        self.scheduler.leagues[12438] = league_rows().iloc[0]
+        self.scheduler.schedule(12438, 1, START)
+        self.scheduler.schedule(12438, 2, START)
+
+        self.scheduler.run_pending()
+
+        self.assertEqual(self.scheduler.queued, {(12438, 1), (12438, 2)})
+        self.assertEqual([entry[4] for entry in self.scheduler.queue], [1, 1])
+        self.assertEqual(self.scheduler.next_due_in(), 300)
+
+    @patch('Core.Scheduler.Fixture')
+    @patch('Core.Scheduler.League.fetch_leagues')
+    def test_refresh_skips_a_league_whose_fixture_fails(self, mock_fetch_leagues, mock_fixture):
+        mock_fetch_leagues.return_value = (league_rows(), [])
+        mock_fixture.return_value.fetch_data.side_effect = ConnectionError('Connection reset by peer')
+        self.assertTrue(self.scheduler.refresh())
+        self.assertEqual(self.scheduler.queue, [])
+
+        mock_fetch_leagues.side_effect = ConnectionError('Connection reset by peer')
+        self.assertFalse(self.scheduler.refresh())
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual([self.scheduler.retry_delay(attempt) for attempt in range(1, 5)], [300, 600, 1200, 1200])
+
+if __name__ == '__main__':
+    unittest.main()
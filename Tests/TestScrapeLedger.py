@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from Utils.scrape_ledger import ScrapeLedger, fingerprint_row, fingerprint_bytes
+
+class TestScrapeLedger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ledger.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_new_and_changed_matches_need_fetch(self):
+        ledger = ScrapeLedger(self.path)
+        row = {'matchId': 1, 'matchStatus': 'complete', 'homeSquadScore': 60}
+        fingerprint = fingerprint_row(row)
+        self.assertTrue(ledger.needs_fetch(8005, 1, 'complete', fingerprint))
+
+        ledger.record(8005, 1, 'complete', fingerprint, fingerprint_bytes(b'{}'))
+        self.assertFalse(ledger.needs_fetch(8005, 1, 'complete', fingerprint))
+
+        changed = fingerprint_row(dict(row, homeSquadScore=61))
+        self.assertTrue(ledger.needs_fetch(8005, 1, 'complete', changed))
+
+    def test_payload_fingerprint(self):
+        ledger = ScrapeLedger(self.path)
+        ledger.record(8005, 1, 'complete', 'row', fingerprint_bytes(b'{"a": 1}'))
+
+        self.assertFalse(ledger.payload_changed(8005, 1, fingerprint_bytes(b'{"a": 1}')))
+        self.assertTrue(ledger.payload_changed(8005, 1, fingerprint_bytes(b'{"a": 2}')))
+        self.assertTrue(ledger.payload_changed(8005, 2, fingerprint_bytes(b'{"a": 1}')))
+
+    def test_saved_ledger_is_reloaded(self):
+        ledger = ScrapeLedger(self.path)
+        ledger.record(8005, 1, 'complete', 'a', 'b')
+        ledger.record(8005, 2, 'complete', 'c', 'd')
+        ledger.save()
+
+        reloaded = ScrapeLedger(self.path)
+        self.assertEqual(reloaded.get(8005, 2)['payloadFingerprint'], 'd')
+        self.assertEqual(reloaded.get(8005, 1)['matchStatus'], 'complete')
+        self.assertIsNone(reloaded.get(9999, 1))
+
+    def test_row_fingerprint_ignores_key_order(self):
+        self.assertEqual(fingerprint_row({'a': 1, 'b': 2}), fingerprint_row({'b': 2, 'a': 1}))
+
+if __name__ == '__main__':
+    unittest.main()
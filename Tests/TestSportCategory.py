@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+from Utils import sport_category
+from Utils.sport_category import PrefixTrie, SPORT_IDS, classify_league, determine_sport_category, sport_id_for
+
+class TestSportCategory(unittest.TestCase):
+    def test_prefix_trie_uses_rule_priority(self):
+        trie = PrefixTrie([(('94',), 'first'), (('9', '949'), 'second')])
+        self.assertEqual(trie.match(949123), 'first')
+        self.assertEqual(trie.match('91'), 'second')
+        self.assertIsNone(trie.match('8'))
+        self.assertEqual(trie.first_match([801, 9]), 'second')
+
+    def test_rules(self):
+        self.assertEqual(determine_sport_category(4, [9815, 1], 'AFL Premiership (2024)', 1), ('AFL Mens', 1))
+        self.assertEqual(determine_sport_category(4, [7301], 'AFLW (2024)', 1), ('AFL Womens', 2))
+        self.assertEqual(determine_sport_category(4, [880], 'FAST5 Series (2018)', 1), ('FAST5 Womens', 6))
+        self.assertEqual(determine_sport_category(4, [801, 806], 'Super Netball (2024)', 1), ('Netball Womens Australia', 9))
+        self.assertEqual(determine_sport_category(4, [9490], 'Unlisted Cup', 1), ('Netball Mens', 7))
+        self.assertEqual(determine_sport_category(2, [55], 'Unlisted Cup', 1), ('NRL Unknown', 12))
+        self.assertEqual(determine_sport_category(3, [55], 'Unlisted Cup', 1), ('Unknown Sport', None))
+
+    def test_sport_ids_are_frozen_and_normalized(self):
+        with self.assertRaises(TypeError):
+            SPORT_IDS['new sport'] = 13
+        self.assertEqual(sport_id_for(' Netball  Womens NZ '), 8)
+        self.assertIsNone(sport_id_for('Unknown Sport'))
+
+    def test_league_is_classified_once(self):
+        with patch.object(sport_category, 'determine_sport_category', wraps=determine_sport_category) as determine:
+            first = classify_league(-1, 4, [7101, 7201], 'Test League (2024)')
+            second = classify_league(-1, 4, [7101, 7201], 'Test League (2024)')
+        self.assertEqual(first, ('Netball Womens NZ', 8))
+        self.assertIs(first, second)
+        determine.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
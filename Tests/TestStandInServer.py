@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from Utils import http_session
+from Utils.standin_server import StandInServer, recording_path, export_cache
+from Core.LeaguesList import League
+from Core.FixtureDetails import Fixture
+from Utils.sport_category import classify_league
+
+COMPETITIONS = {
+    'competitionDetails': {
+        'competition': [
+            {'id': 12438, 'name': 'ANZ Premiership 2024', 'season': 2024, 'regulationPeriods': 4}
+        ]
+    }
+}
+
+class TestStandInServer(unittest.TestCase):
+    def setUp(self):
+        self.recordings_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.recordings_dir, 'competitions.json'), 'w') as file:
+            json.dump(COMPETITIONS, file)
+
+    def tearDown(self):
+        http_session.set_base_url(None)
+        http_session.disable_cache()
+        http_session.close_sessions()
+        shutil.rmtree(self.recordings_dir, ignore_errors=True)
+
+    def test_recording_path(self):
+        self.assertEqual(recording_path('rec', '/data/12438/fixture.json?/'), os.path.join('rec', '12438', 'fixture.json'))
+        self.assertEqual(recording_path('rec', 'https://mc.championdata.com/data/12438/124380101.json'), os.path.join('rec', '12438', '124380101.json'))
+        self.assertEqual(recording_path('rec', '/data/../../etc/passwd'), os.path.join('rec', 'etc', 'passwd'))
+
+    def test_core_fetchers_use_standin(self):
+        with StandInServer(self.recordings_dir) as server:
+            http_session.set_base_url(server.base_url)
+            leagues_df, _ = League.fetch_leagues()
+
+            self.assertEqual(server.requests_served, 1)
+            self.assertEqual(League.league_info[12438], 'ANZ Premiership (2024)')
+            self.assertEqual(len(leagues_df), 1)
+
+    def test_parsed_fixture_rebuilt_when_the_classification_inputs_change(self):
+        os.makedirs(os.path.join(self.recordings_dir, '12438'))
+        with open(os.path.join(self.recordings_dir, '12438', 'fixture.json'), 'w') as file:
+            json.dump({'fixture': {'match': [{'matchId': 124380101, 'matchStatus': 'complete', 'homeSquadId': 801,
+                                              'homeSquadName': 'Magic', 'awaySquadId': 806, 'awaySquadName': 'Pulse'}]}}, file)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+
+        def fetch_fixture():
+            fixture = Fixture(12438, 12438, 4, MagicMock(), MagicMock())
+            fixture.fetch_data()
+            return fixture
+
+        with StandInServer(self.recordings_dir) as server, \
+                patch('Core.FixtureDetails.classify_league', wraps=classify_league) as classify:
+            http_session.set_base_url(server.base_url)
+            http_session.configure_cache(cache_dir)
+            League.fetch_leagues()
+            self.assertEqual(len(fetch_fixture().data), 1)
+            self.assertEqual(len(fetch_fixture().data), 1)
+            self.assertEqual(classify.call_count, 1)  # The cached parse is reused
+
+            with patch('Core.FixtureDetails.LEAGUE_FILTERS_FINGERPRINT', 'edited'):
+                fetch_fixture()
+                fetch_fixture()
+            self.assertEqual(classify.call_count, 2)  # Classified again from the edited rules, then reused
+
+    def test_missing_recording_and_injected_errors(self):
+        with StandInServer(self.recordings_dir, error_rate=1.0) as server:
+            http_session.set_base_url(server.base_url)
+            response = http_session.get('http://mc.championdata.com/data/competitions.json', max_retries=0)
+            self.assertEqual(response.status_code, 503)
+
+        with StandInServer(self.recordings_dir) as server:
+            http_session.set_base_url(server.base_url)
+            response = http_session.get('http://mc.championdata.com/data/1/fixture.json?/', max_retries=0)
+            self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get_against_standin(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        with StandInServer(self.recordings_dir) as server:
+            http_session.set_base_url(server.base_url)
+            cache = http_session.configure_cache(cache_dir)
+            url = 'http://mc.championdata.com/data/competitions.json'
+            http_session.get(url)
+
+            # Expire the entry so the next request revalidates it
+            meta_url = http_session.resolve_url(url)
+            _, meta_path = cache._paths(meta_url)
+            meta = cache.get_meta(meta_url)
+            meta['stored_at'] = 0
+            with open(meta_path, 'w') as file:
+                json.dump(meta, file)
+
+            response = http_session.get(url)
+            self.assertTrue(response.not_modified)
+            self.assertEqual(response.json(), COMPETITIONS)
+            self.assertEqual(server.requests_served, 2)
+
+            # The cached responses can be exported as recordings
+            export_dir = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, export_dir, True)
+            self.assertEqual(export_cache(cache_dir, export_dir), 1)
+            with open(os.path.join(export_dir, 'competitions.json')) as file:
+                self.assertEqual(json.load(file), COMPETITIONS)
+
+if __name__ == '__main__':
+    unittest.main()
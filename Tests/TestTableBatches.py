@@ -0,0 +1,51 @@
+import math
+import unittest
+from Core.MatchRecords import record_type
+from Utils.table_batches import TableBatches, HAS_ARROW
+
+class TestTableBatches(unittest.TestCase):
+    def rows(self):
+        return [{'matchId': '1', 'goals': 2, 'height': math.nan}, {'matchId': '1', 'goals': 3, 'debut': 'yes'}]
+
+    def test_lists_without_arrow(self):
+        batches = TableBatches('match', use_arrow=False).append(self.rows()).append([]).append([{'matchId': '2'}])
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(len(batches.batches), 2)
+        self.assertEqual(list(batches)[2], {'matchId': '2'})
+        with self.assertRaises(RuntimeError):
+            batches.table()
+
+    def test_lists_by_default(self):
+        self.assertFalse(TableBatches('match').use_arrow)
+
+    def test_rows_of_a_key_without_arrow(self):
+        batches = TableBatches('period', use_arrow=False).append(self.rows(), '1').append([{'matchId': '2'}], '2')
+        batches.append([{'matchId': '1', 'period': 2}], '1')
+        self.assertEqual(batches.rows_of('1'), self.rows() + [{'matchId': '1', 'period': 2}])
+        self.assertEqual(batches.rows_of('3'), [])
+
+    @unittest.skipUnless(HAS_ARROW, "pyarrow is not installed")
+    def test_rows_of_a_key(self):
+        batches = TableBatches('period', use_arrow=True).append([{'matchId': '1', 'goals': 2}], '1').append([{'matchId': '2'}], '2')
+        self.assertEqual(batches.rows_of('2'), [{'matchId': '2'}])
+        self.assertEqual(len(batches), 2)
+
+    @unittest.skipUnless(HAS_ARROW, "pyarrow is not installed")
+    def test_rows_round_trip_one_batch_per_append(self):
+        batches = TableBatches('match', use_arrow=True).append(self.rows()).append([{'matchId': '2', 'goals': 'DNP'}])
+        self.assertEqual(len(batches.batches), 2)
+        rows = list(batches)
+        self.assertEqual(rows[0], {'matchId': '1', 'goals': 2, 'height': None, 'debut': None})  # NaN is stored as NULL
+        self.assertEqual(rows[2], {'matchId': '2', 'goals': 'DNP'})
+
+    @unittest.skipUnless(HAS_ARROW, "pyarrow is not installed")
+    def test_table_concatenates_batches_with_different_columns(self):
+        record = record_type('Row', ['matchId', 'goals'])
+        batches = TableBatches('match', use_arrow=True).append(self.rows()).append([record('2', 'DNP'), record('3', None)])
+        table = batches.table()
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('goals').to_pylist(), ['2', '3', 'DNP', None])  # int in one match, text in the other
+        self.assertEqual(table.column('debut').to_pylist(), [None, 'yes', None, None])
+
+if __name__ == '__main__':
+    unittest.main()
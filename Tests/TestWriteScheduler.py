@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import mysql.connector
+from DatabaseUtils.write_scheduler import WritePlan, WriteScheduler, dependency_levels
+
+# Foreign keys of the create scripts
+REFERENCES = {
+    'player_info': {'squad_info'},
+    'netball_fixture': {'squad_info', 'sport_info'},
+    'netball_match': {'netball_fixture', 'player_info', 'squad_info', 'sport_info'},
+    'netball_period': {'netball_match', 'player_info'},
+    'netball_score_flow': {'netball_match', 'player_info'},
+}
+TABLES = ['squad_info', 'sport_info', 'player_info', 'netball_fixture', 'netball_match', 'netball_period', 'netball_score_flow']
+LEVELS = [['squad_info', 'sport_info'], ['player_info', 'netball_fixture'], ['netball_match'], ['netball_period', 'netball_score_flow']]
+
+class TestDependencyLevels(unittest.TestCase):
+    def test_levels_follow_the_foreign_keys(self):
+        self.assertEqual(dependency_levels(TABLES, REFERENCES), LEVELS)
+        self.assertEqual(dependency_levels(['netball_match', 'afl_match', 'player_info'], REFERENCES),
+                         [['afl_match', 'player_info'], ['netball_match']])  # Only the tables being written count
+
+    def test_table_kinds_used_without_foreign_keys_or_with_a_cycle(self):
+        self.assertEqual(dependency_levels(TABLES), LEVELS)
+        self.assertEqual(dependency_levels(TABLES, {'squad_info': {'player_info'}, 'player_info': {'squad_info'}}), LEVELS)
+
+class TestWritePlan(unittest.TestCase):
+    def test_rows_of_several_leagues_and_discard(self):
+        plan = WritePlan()
+        plan.add('squad_info', [{'squadId': 801}], {}, 'squadId')
+        mark = plan.mark()
+        plan.add('squad_info', [{'squadId': 806}], {}, 'squadId')
+        plan.add('player_info', [{'playerId': 1}], {}, 'playerId')
+        self.assertEqual(list(plan.rows('squad_info')), [{'squadId': 801}, {'squadId': 806}])
+        plan.discard_since(mark)
+        self.assertEqual(list(plan.tables), ['squad_info'])
+        self.assertEqual(plan.row_count('squad_info'), 1)
+
+class TestWriteScheduler(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.pool = MagicMock()
+        self.pool.get_connection.side_effect = lambda: MagicMock()
+        db_helper = MagicMock()
+        db_helper.get_references.return_value = REFERENCES
+        self.plan = WritePlan()
+        for table_name in reversed(TABLES):
+            self.plan.add(table_name, [{'id': table_name}], {'required_fields': ['id']}, 'id')
+        patcher = patch('DatabaseUtils.write_scheduler.DatabaseHelper', side_effect=self.helper)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = WriteScheduler(self.pool, db_helper, writers=4)
+        self.addCleanup(self.scheduler.close)
+
+    def helper(self, connection, info_logger, error_logger):
+        helper = MagicMock(connection=connection)
+        helper.insert_rows_batch.side_effect = lambda table_name, rows, json_fields: self.insert(connection, table_name, rows)
+        return helper
+
+    def insert(self, connection, table_name, rows):
+        with self.lock:
+            self.events.append(('start', table_name, connection))
+        time.sleep(0.02)
+        list(rows)
+        with self.lock:
+            self.events.append(('end', table_name, connection))
+        if table_name == 'netball_fixture' and getattr(self, 'fail_fixture', False):
+            raise mysql.connector.Error(msg='Lock wait timeout')
+        return []
+
+    def test_levels_written_in_order_and_concurrently(self):
+        self.assertEqual(self.scheduler.write(self.plan), {table_name: [] for table_name in TABLES})
+
+        order = [(kind, table_name) for kind, table_name, _ in self.events]
+        for earlier, later in zip(LEVELS, LEVELS[1:]):
+            last_end = max(order.index(('end', table_name)) for table_name in earlier)
+            first_start = min(order.index(('start', table_name)) for table_name in later)
+            self.assertLess(last_end, first_start)
+        # The two tables of the first level overlap, on two connections
+        self.assertEqual([kind for kind, _ in order[:2]], ['start', 'start'])
+        self.assertNotEqual(self.events[0][2], self.events[1][2])
+        for _, _, connection in self.events:
+            self.assertTrue(connection.commit.called)
+        self.assertLessEqual(self.pool.get_connection.call_count, 4)
+
+    def test_failed_level_stops_the_later_levels(self):
+        self.fail_fixture = True
+        with self.assertRaises(mysql.connector.Error):
+            self.scheduler.write(self.plan)
+
+        written = {table_name for kind, table_name, _ in self.events if kind == 'start'}
+        self.assertEqual(written, set(LEVELS[0] + LEVELS[1]))
+        fixture_connection = next(connection for _, table_name, connection in self.events if table_name == 'netball_fixture')
+        fixture_connection.rollback.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
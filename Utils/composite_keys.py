@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Key used when one of the parts of a composite key is missing
+MISSING_KEY = 'Unknown'
+
+
+# Values of an array as an object array of strings, with the same text as str(value)
+def _str_values(values):
+    if values.dtype.kind in 'biuf':
+        return values.astype(str).astype(object)  # numpy formats floats like repr(), as str() does
+    return np.array([str(value) for value in values], dtype=object)
+
+
+# Values of a column as strings, with the same text as str(value) (NaN gives 'nan', None gives 'None')
+def as_str(column):
+    return pd.Series(_str_values(column.to_numpy()), index=column.index, dtype=object)
+
+
+# Column of a DataFrame as strings, or a constant column if it is missing
+def str_column(df, name, default=MISSING_KEY):
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return as_str(df[name])
+
+
+# Build a composite key column from Series and scalars, e.g. composite_key(df['playerId'], df['squadId'])
+def composite_key(*parts, separator='-', missing=MISSING_KEY, index=None):
+    """
+    Joins the parts with the separator, row by row, on whole arrays instead of one Python call per row.
+    Rows where any part is null (or a part is a None scalar, e.g. a missing column) get `missing`.
+    """
+    if index is None:
+        index = next(part.index for part in parts if isinstance(part, pd.Series))
+    valid = np.ones(len(index), dtype=bool)
+    key = None
+    for part in parts:
+        if isinstance(part, pd.Series):
+            values = part.to_numpy()
+            valid &= ~pd.isna(values)
+            text = _str_values(values)
+        else:
+            if part is None or (np.isscalar(part) and pd.isnull(part)):
+                valid[:] = False
+            text = str(part)
+        key = text if key is None else key + separator + text
+    if not isinstance(key, np.ndarray):
+        key = np.full(len(index), key, dtype=object)
+    return pd.Series(np.where(valid, key, missing), index=index, dtype=object)
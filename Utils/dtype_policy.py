@@ -0,0 +1,69 @@
+import pandas as pd
+from functools import lru_cache
+from Utils.JsonLoader import load_json_fields
+
+# A text column is stored as a categorical when it has at most this share of distinct values
+CATEGORY_MAX_RATIO = 0.5
+
+
+class DtypePolicy:
+    """
+    Compact dtypes for the parsed DataFrames, derived from the table field specs.
+    Required fields are IDs and keys and keep their dtype (they are joined, compared and assigned to).
+    Optional fields are values: repeated strings (squad, position and status names) become categoricals,
+    integer stats are downcast to the smallest integer type and float stats to float32 when no value changes.
+    Columns that are in no spec are not stored, so they are left as they are.
+    """
+    def __init__(self, json_fields):
+        self.key_fields = set()
+        self.value_fields = set()
+        for fields in json_fields.values():
+            self.key_fields.update(fields.get('required_fields', []))
+            self.value_fields.update(fields.get('optional_fields', []))
+        self.value_fields -= self.key_fields
+
+    # Converted column, or None if its dtype is kept
+    @staticmethod
+    def convert(column):
+        dtype = column.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            return None
+        if pd.api.types.is_integer_dtype(dtype):
+            converted = pd.to_numeric(column, downcast='integer')
+            return converted if converted.dtype != dtype else None
+        if pd.api.types.is_float_dtype(dtype):
+            if dtype == 'float32':
+                return None
+            converted = column.astype('float32')
+            return converted if (converted.astype(dtype) == column)[column.notna()].all() else None
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            values = column.dropna()
+            if values.empty:
+                return None
+            if values.map(type).eq(str).all():
+                if values.nunique() <= CATEGORY_MAX_RATIO * len(column):
+                    return column.astype('category')
+            elif values.map(type).eq(int).all() and len(values) == len(column):
+                return pd.to_numeric(column, downcast='integer')  # Whole numbers that arrived as objects
+        return None
+
+    # DataFrame with the value columns converted (the input is not modified)
+    def apply(self, df):
+        converted = {}
+        for name in df.columns.unique():
+            if name in self.value_fields and isinstance(df[name], pd.Series):
+                column = self.convert(df[name])
+                if column is not None:
+                    converted[name] = column
+        return df.assign(**converted) if converted else df
+
+
+# Policy of the table field specs, loaded once
+@lru_cache(maxsize=None)
+def default_policy():
+    return DtypePolicy(load_json_fields())
+
+
+# Apply the default policy to a parsed DataFrame
+def apply_dtype_policy(df):
+    return default_policy().apply(df) if not df.empty else df
@@ -0,0 +1,267 @@
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from Utils.response_cache import ResponseCache, CACHE_DIR
+from Utils.rate_limiter import AdaptiveLimiter
+
+# Connect and read timeouts (seconds) applied to every request
+DEFAULT_TIMEOUT = (5, 30)
+
+# Retry settings for transient failures
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# Maximum number of keep-alive connections kept open per host
+POOL_MAXSIZE = 32
+
+# Only advertise brotli when a decoder is installed, otherwise responses could not be decoded
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Adaptive rate limiter per host, and the options new limiters are created with
+_limiters = {}
+_limiter_options = {'max_limit': POOL_MAXSIZE}
+
+# Response cache shared by every fetcher (disabled until configure_cache is called)
+_cache = None
+
+# Scheme and host that replace the Champion Data host, e.g. a local stand-in server
+_base_url = None
+
+
+# Point every request at another host (None restores the real Champion Data host)
+def set_base_url(base_url):
+    global _base_url
+    _base_url = base_url.rstrip('/') if base_url else None
+    if _base_url:
+        logging.info(f"Redirecting Champion Data requests to {_base_url}")
+
+
+# Rewrite a Champion Data URL onto the configured base URL, keeping its path and query
+def resolve_url(url):
+    if not _base_url:
+        return url
+    base = urlsplit(_base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path + parts.path, parts.query, parts.fragment))
+
+
+# Enable the on-disk response cache, optionally in offline replay mode
+def configure_cache(cache_dir=CACHE_DIR, offline=False):
+    global _cache
+    _cache = ResponseCache(cache_dir, offline=offline)
+    logging.info(f"Response cache enabled at {cache_dir} (offline={offline})")
+    return _cache
+
+
+# Disable the response cache
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+# Get the active response cache, or None if caching is disabled
+def get_cache():
+    return _cache
+
+
+# Force the next request for a URL to revalidate its cached response
+def expire(url):
+    if _cache is not None:
+        _cache.expire(resolve_url(url))
+
+
+# Load an object parsed from the cached body of a URL (None if caching is disabled or nothing is stored)
+def load_parsed(url, name):
+    if _cache is None:
+        return None
+    return _cache.load_parsed(resolve_url(url), name)
+
+
+# Store an object parsed from the cached body of a URL
+def save_parsed(url, name, obj):
+    if _cache is not None:
+        _cache.save_parsed(resolve_url(url), name, obj)
+
+
+# Scheme and host part of a URL, used to key sessions and limiters
+def _host_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# Set the options of the per-host rate limiters (existing limiters are replaced)
+def configure_rate_limiter(**options):
+    global _limiter_options
+    with _sessions_lock:
+        _limiter_options = {'max_limit': POOL_MAXSIZE, **options}
+        _limiters.clear()
+
+
+# Get (or create) the adaptive rate limiter for the host of the given URL
+def get_limiter(url):
+    host = _host_key(url)
+    with _sessions_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveLimiter(**_limiter_options)
+            _limiters[host] = limiter
+    return limiter
+
+
+# Current limit, observed latency and counters of every host's limiter
+def limiter_stats():
+    with _sessions_lock:
+        limiters = dict(_limiters)
+    return {host: limiter.stats() for host, limiter in limiters.items()}
+
+
+# Get (or create) the pooled session for the host of the given URL
+def get_session(url):
+    parts = urlsplit(url)
+    host = _host_key(url)
+
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount(f"{parts.scheme}://", adapter)
+            session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, 'Connection': 'keep-alive'})
+            _sessions[host] = session
+            logging.info(f"Created pooled HTTP session for {host}")
+    return session
+
+
+# Close every pooled session
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# Exponential backoff with full jitter for the given (zero-based) attempt
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+# GET a URL, serving it from the response cache when possible
+def get(url, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, use_cache=True, **kwargs):
+    """
+    Send a GET request through the shared session of the URL's host.
+    Fresh cached responses are returned without touching the network, and in offline mode
+    a URL that was never cached comes back as a 504 response.
+    Stale cached responses are revalidated with If-None-Match / If-Modified-Since; on a 304
+    the cached body is returned with `not_modified` set.
+    """
+    url = resolve_url(url)
+    cache = _cache if use_cache else None
+    meta = None
+    if cache is not None:
+        meta = cache.get_meta(url)
+        if meta is not None and (cache.offline or cache.is_fresh(meta)):
+            cached = cache.load(url, meta)
+            if cached is not None:
+                logging.debug(f"Serving {url} from the response cache")
+                return cached
+            meta = None
+        if cache.offline:
+            return cache.miss(url)
+
+        validators = cache.validator_headers(meta)
+        if validators:
+            kwargs['headers'] = {**validators, **kwargs.get('headers', {})}
+
+    response = _get_with_retries(url, timeout, max_retries, **kwargs)
+
+    if cache is not None and response.status_code == 304 and meta is not None:
+        cached = cache.revalidate(url, meta, response)
+        if cached is not None:
+            logging.debug(f"{url} not modified, serving the cached body")
+            return cached
+        # The cached body disappeared under us, download it again without validators
+        kwargs.pop('headers', None)
+        response = _get_with_retries(url, timeout, max_retries, **kwargs)
+
+    response.from_cache = False
+    response.not_modified = False
+
+    if cache is not None and response.status_code == 200:
+        try:
+            cache.put(url, response)
+        except OSError as e:
+            logging.warning(f"Could not cache response for {url}: {e}")
+    return response
+
+
+# Seconds requested by a numeric Retry-After header, or None
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+# Send one request while holding a slot of the host's rate limiter
+def _limited_get(session, limiter, url, timeout, **kwargs):
+    limiter.acquire()
+    status_code, error = None, True
+    start = time.monotonic()
+    try:
+        response = session.get(url, timeout=timeout, **kwargs)
+        status_code, error = response.status_code, False
+        return response
+    finally:
+        limiter.release(time.monotonic() - start, status_code, error)
+
+
+# GET a URL through the pooled session, retrying 429/5xx responses and dropped connections
+def _get_with_retries(url, timeout, max_retries, **kwargs):
+    """
+    429/5xx responses and connection errors are retried with jittered exponential backoff
+    (or the server's Retry-After, if longer), and reported to the host's adaptive limiter.
+    The last response is returned (or the last exception raised) once the retries are used up.
+    """
+    session = get_session(url)
+    limiter = get_limiter(url)
+
+    for attempt in range(max_retries + 1):
+        delay = backoff_delay(attempt)
+        try:
+            response = _limited_get(session, limiter, url, timeout, **kwargs)
+        except RETRY_EXCEPTIONS as e:
+            if attempt == max_retries:
+                logging.error(f"Giving up on {url} after {attempt + 1} attempts: {e}")
+                raise
+            logging.warning(f"Request to {url} failed ({e}), retrying (attempt {attempt + 1} of {max_retries}).")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                return response
+            logging.warning(f"Request to {url} returned {response.status_code}, retrying (attempt {attempt + 1} of {max_retries}).")
+            delay = max(delay, min(BACKOFF_MAX, _retry_after(response) or 0))
+            response.close()
+
+        time.sleep(delay)
@@ -0,0 +1,162 @@
+import json
+import logging
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+
+# NDJSON export of the player table, one player and squad per line
+PLAYER_INFO_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Assets", "jsons", "player_info.json")
+
+# Minimum score for a fuzzy match to be accepted
+DEFAULT_THRESHOLD = 0.85
+# A match is rejected as ambiguous when another player scores within this margin
+AMBIGUITY_MARGIN = 0.05
+# Weight of the surname in the score (the first name is the one with nicknames and initials)
+SURNAME_WEIGHT = 0.7
+# Bonus when the candidate played for the same squad
+SQUAD_BONUS = 0.05
+# Fraction of the surname trigrams a candidate must share to be scored at all
+MIN_TRIGRAM_OVERLAP = 0.4
+
+
+# Lowercase, accent-free form of a name with hyphens, apostrophes and dots turned into spaces
+def fold_name(name):
+    if not isinstance(name, str):
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name)
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return ' '.join(re.sub(r"[^\w\s]", ' ', folded).split())
+
+
+# Set of character trigrams of a folded name, padded so word boundaries count
+def trigrams(name):
+    padded = f"  {name} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+# Similarity of two folded names in [0, 1], tolerant of single letter typos (e.g. 'davis' and 'davies')
+def similarity(first, second):
+    if not first or not second:
+        return 0.0
+    if first == second:
+        return 1.0
+    return SequenceMatcher(None, first, second).ratio()
+
+
+# Similarity of two folded first names, allowing initials and short forms (e.g. 'kate' and 'katherine')
+def first_name_similarity(first, second):
+    if not first or not second:
+        return 0.0
+    if first == second:
+        return 1.0
+    first_compact, second_compact = first.replace(' ', ''), second.replace(' ', '')
+    if first_compact == second_compact:
+        return 1.0
+    shorter, longer = sorted((first_compact, second_compact), key=len)
+    if len(shorter) == 1 and longer.startswith(shorter):
+        return 0.8  # Initial only
+    if len(shorter) >= 3 and longer.startswith(shorter):
+        return 0.9  # Short form
+    return similarity(first_compact, second_compact)
+
+
+# Read the player records of the NDJSON player export
+def load_player_records(path=PLAYER_INFO_PATH):
+    records = []
+    if not os.path.exists(path):
+        logging.warning(f"Player export {path} not found, fuzzy matching only uses static_player_info.")
+        return records
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping malformed line in {path}: {line[:80]}")
+    return records
+
+
+class NameMatcher:
+    """
+    Trigram index over player names for resolving players whose name has no exact match.
+    Candidates are found through the surname trigram index (only players sharing enough trigrams are scored),
+    then scored on surname and first name similarity, with a bonus for the same squad.
+    playerIds are compared as strings, as the table and the player export type them differently.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, logger=None):
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger(__name__)
+        self.candidates = []  # (playerId, folded firstname, folded surname, folded squadName)
+        self.surname_index = {}
+        self._seen = set()
+
+    # Add player records (dicts with playerId, firstname, surname and optionally displayName and squadName)
+    def add_records(self, records):
+        for record in records:
+            player_id = str(record.get('playerId'))
+            surname = fold_name(record.get('surname'))
+            if not player_id.isdigit() or player_id == '0' or not surname:
+                continue
+            squad = fold_name(record.get('squadName'))
+            first_names = {fold_name(record.get('firstname'))}
+            # displayName is usually 'F.Surname', which gives the initial as another first name
+            display_name = record.get('displayName')
+            if isinstance(display_name, str) and '.' in display_name:
+                first_names.add(fold_name(display_name.split('.', 1)[0]))
+            for firstname in first_names:
+                key = (player_id, firstname, surname, squad)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                position = len(self.candidates)
+                self.candidates.append(key)
+                for trigram in trigrams(surname):
+                    self.surname_index.setdefault(trigram, []).append(position)
+        return self
+
+    # Best matching playerId and score for one name, or (None, best score) below the threshold or when ambiguous
+    def match(self, firstname, surname, squad_name=None):
+        first = fold_name(firstname)
+        last = fold_name(surname)
+        squad = fold_name(squad_name)
+        if not last:
+            return None, 0.0
+
+        query_trigrams = trigrams(last)
+        overlaps = Counter()
+        for trigram in query_trigrams:
+            overlaps.update(self.surname_index.get(trigram, ()))
+        min_overlap = max(1, math.ceil(MIN_TRIGRAM_OVERLAP * len(query_trigrams)))
+
+        best_by_player = {}
+        for position, overlap in overlaps.items():
+            if overlap < min_overlap:
+                continue
+            player_id, candidate_first, candidate_last, candidate_squad = self.candidates[position]
+            surname_score = similarity(last, candidate_last)
+            score = SURNAME_WEIGHT * surname_score + (1 - SURNAME_WEIGHT) * first_name_similarity(first, candidate_first)
+            if squad and candidate_squad == squad:
+                score = min(1.0, score + SQUAD_BONUS)
+            if score > best_by_player.get(player_id, 0.0):
+                best_by_player[player_id] = score
+
+        if not best_by_player:
+            return None, 0.0
+        ranked = sorted(best_by_player.items(), key=lambda item: item[1], reverse=True)
+        best_player_id, best_score = ranked[0]
+        if best_score < self.threshold:
+            return None, best_score
+        if len(ranked) > 1 and best_score - ranked[1][1] < AMBIGUITY_MARGIN:
+            self.logger.warning(f"Ambiguous fuzzy match for {firstname} {surname} ({squad_name}): "
+                            f"{best_player_id} scores {best_score:.2f}, {ranked[1][0]} scores {ranked[1][1]:.2f}.")
+            return None, best_score
+        return best_player_id, best_score
+
+    # Match a batch of (firstname, surname, squad_name) tuples; returns {name: (playerId or None, score)}
+    def match_many(self, names):
+        return {name: self.match(*name) for name in set(names)}
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+# Default request rate (requests per second) and burst allowed by the token bucket
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 20
+
+# Default bounds of the adaptive concurrency limit
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+
+# Multiplicative decrease applied on throttling, errors or latency spikes
+DECREASE_FACTOR = 0.5
+# A request slower than this multiple of the observed latency counts as a spike
+LATENCY_SPIKE_FACTOR = 3.0
+# Requests faster than this (seconds) never count as a spike, whatever the observed latency
+MIN_SPIKE_LATENCY = 0.5
+# Minimum time (seconds) between two decreases, so one burst of failures only halves the limit once
+DECREASE_COOLDOWN = 1.0
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.2
+
+
+class TokenBucket:
+    """Token bucket capping the request rate; `acquire` blocks until a token is available."""
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Take one token, sleeping until the bucket has refilled enough
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    Token-bucket rate limit plus an AIMD (additive-increase/multiplicative-decrease) concurrency limit.
+    Every healthy response grows the limit by 1/limit, so roughly +1 per full window of requests.
+    A 429, a 5xx, a connection error or a latency spike multiplies it by DECREASE_FACTOR.
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, initial_limit=DEFAULT_INITIAL_LIMIT,
+                 min_limit=DEFAULT_MIN_LIMIT, max_limit=DEFAULT_MAX_LIMIT, decrease_factor=DECREASE_FACTOR,
+                 latency_spike_factor=LATENCY_SPIKE_FACTOR, min_spike_latency=MIN_SPIKE_LATENCY,
+                 decrease_cooldown=DECREASE_COOLDOWN):
+        if min_limit < 1 or min_limit > max_limit:
+            raise ValueError(f"limits must satisfy 1 <= min_limit <= max_limit, got {min_limit} and {max_limit}")
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.min_spike_latency = min_spike_latency
+        self.decrease_cooldown = decrease_cooldown
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._latency = None
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+        # Counters exposed through stats()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.decreases = 0
+
+    @property
+    def current_limit(self):
+        return int(self._limit)
+
+    @property
+    def observed_latency(self):
+        return self._latency
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    # Wait for a token and a free concurrency slot
+    def acquire(self):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    # Free the slot and feed the outcome of the request back into the limit
+    def release(self, latency, status_code=None, error=False):
+        with self._condition:
+            self._in_flight -= 1
+            self.requests += 1
+
+            throttled = status_code == 429 or (status_code is not None and status_code >= 500)
+            spike = (self._latency is not None and latency > self.min_spike_latency
+                     and latency > self.latency_spike_factor * self._latency)
+            if error:
+                self.errors += 1
+            if throttled:
+                self.throttled += 1
+
+            if error or throttled or spike:
+                self._decrease(latency, status_code, error)
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            # Failed requests say nothing about the upstream's normal latency
+            if not error and not throttled:
+                if self._latency is None:
+                    self._latency = latency
+                else:
+                    self._latency += LATENCY_SMOOTHING * (latency - self._latency)
+
+            self._condition.notify_all()
+
+    # Multiplicative decrease, at most once per cooldown window
+    def _decrease(self, latency, status_code, error):
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        previous = self.current_limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self.decreases += 1
+        reason = 'connection error' if error else (f"status {status_code}" if status_code and status_code >= 400 else f"latency spike {latency:.2f}s")
+        logging.warning(f"Backing off after {reason}: concurrency limit {previous} -> {self.current_limit}")
+
+    # Snapshot of the limiter state, showing the throughput ceiling the upstream allows
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': self.current_limit,
+                'in_flight': self._in_flight,
+                'observed_latency': self._latency,
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'errors': self.errors,
+                'decreases': self.decreases,
+            }
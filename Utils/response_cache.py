@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import time
+
+# Default location of the on-disk response cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Cache", "responses")
+
+# Time-to-live rules (seconds) for each kind of Champion Data feed
+COMPETITIONS_TTL = 6 * 60 * 60
+FIXTURE_TTL = 60 * 60
+MATCH_TTL = 0  # Matches that are not complete yet must be downloaded again
+IMMUTABLE = None  # Completed matches never change
+
+COMPLETE_MATCH_PATTERN = re.compile(rb'"matchStatus"\s*:\s*"complete"')
+
+
+# Work out how long a response for the given URL stays fresh
+def ttl_for(url, content):
+    """Return the TTL in seconds for a response, or IMMUTABLE if it never expires."""
+    if url.rstrip('/?').endswith('competitions.json'):
+        return COMPETITIONS_TTL
+    if 'fixture.json' in url:
+        return FIXTURE_TTL
+    if COMPLETE_MATCH_PATTERN.search(content):
+        return IMMUTABLE
+    return MATCH_TTL
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response served from the cache."""
+    def __init__(self, url, status_code, content=b'', headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = True
+        self.not_modified = False
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    """
+    Compressed on-disk cache of raw Champion Data responses, keyed by a hash of the URL.
+    In offline mode every stored response is served regardless of its age.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # Key of a URL in the cache directory
+    def _key_dir(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return key, os.path.join(self.cache_dir, key[:2])
+
+    # Paths of the body and metadata files for a URL
+    def _paths(self, url):
+        key, directory = self._key_dir(url)
+        return os.path.join(directory, f"{key}.body.gz"), os.path.join(directory, f"{key}.meta.json")
+
+    # Path of a parsed artifact derived from the body of a URL
+    def _parsed_path(self, url, name):
+        key, directory = self._key_dir(url)
+        return os.path.join(directory, f"{key}.{name}.parsed.pkl")
+
+    # Write a file atomically so an interrupted run never leaves a torn entry
+    @staticmethod
+    def _write_atomic(path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    # Read the metadata of a cached URL, or None if it is not cached
+    def get_meta(self, url):
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    # Check whether a cache entry is still fresh
+    @staticmethod
+    def is_fresh(meta, now=None):
+        if meta.get('ttl') is IMMUTABLE:
+            return True
+        now = time.time() if now is None else now
+        return now - meta['stored_at'] < meta['ttl']
+
+    # Load a cached response, ignoring freshness
+    def load(self, url, meta=None):
+        meta = meta or self.get_meta(url)
+        if meta is None:
+            return None
+        body_path, _ = self._paths(url)
+        try:
+            with gzip.open(body_path, 'rb') as file:
+                content = file.read()
+        except (FileNotFoundError, OSError, EOFError) as e:
+            logging.warning(f"Discarding unreadable cache entry for {url}: {e}")
+            return None
+        return CachedResponse(url, meta.get('status_code', 200), content, meta.get('headers'))
+
+    # Return the cached response for a URL if it can be served
+    def get(self, url):
+        meta = self.get_meta(url)
+        if meta is None:
+            return None
+        if not self.offline and not self.is_fresh(meta):
+            return None
+        return self.load(url, meta)
+
+    # Store a successful response
+    def put(self, url, response):
+        content = response.content
+        ttl = ttl_for(url, content)
+        body_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'status_code': response.status_code,
+            'stored_at': time.time(),
+            'ttl': ttl,
+            'headers': {name: response.headers[name] for name in ('ETag', 'Last-Modified', 'Content-Type') if name in response.headers},
+        }
+        self._discard_parsed(url)
+        self._write_atomic(body_path, gzip.compress(content))
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        logging.debug(f"Cached response for {url} (ttl={'immutable' if ttl is IMMUTABLE else ttl})")
+
+    # Mark a cached response as stale so the next request revalidates it
+    def expire(self, url):
+        meta = self.get_meta(url)
+        if meta is None:
+            return
+        meta['stored_at'] = 0
+        meta['ttl'] = 0
+        _, meta_path = self._paths(url)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    # Conditional request headers built from the validators of a cached response
+    @staticmethod
+    def validator_headers(meta):
+        headers = {}
+        if meta is None:
+            return headers
+        if 'ETag' in meta['headers']:
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if 'Last-Modified' in meta['headers']:
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    # Mark a cached response as fresh again after a 304 Not Modified
+    def revalidate(self, url, meta, response):
+        cached = self.load(url, meta)
+        if cached is None:
+            return None
+        cached.not_modified = True
+
+        meta = dict(meta, stored_at=time.time(), ttl=ttl_for(url, cached.content))
+        meta['headers'] = dict(meta['headers'])
+        for name in ('ETag', 'Last-Modified'):
+            if name in response.headers:
+                meta['headers'][name] = response.headers[name]
+        _, meta_path = self._paths(url)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        return cached
+
+    # Store an object parsed from a cached body so unchanged responses skip the parse
+    def save_parsed(self, url, name, obj):
+        try:
+            self._write_atomic(self._parsed_path(url, name), pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        except (OSError, pickle.PicklingError) as e:
+            logging.warning(f"Could not cache parsed {name} for {url}: {e}")
+
+    # Load an object parsed from the currently cached body, or None
+    def load_parsed(self, url, name):
+        try:
+            with open(self._parsed_path(url, name), 'rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable parsed {name} for {url}: {e}")
+            return None
+
+    # Remove every parsed artifact of a URL once its body changes
+    def _discard_parsed(self, url):
+        key, directory = self._key_dir(url)
+        if not os.path.isdir(directory):
+            return
+        for file_name in os.listdir(directory):
+            if file_name.startswith(f"{key}.") and file_name.endswith('.parsed.pkl'):
+                os.remove(os.path.join(directory, file_name))
+
+    # Response returned in offline mode when a URL was never cached
+    @staticmethod
+    def miss(url):
+        logging.error(f"Offline mode: no cached response for {url}")
+        return CachedResponse(url, 504)
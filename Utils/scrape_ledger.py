@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+# Default location of the ledger of persisted matches
+LEDGER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Cache", "scrape_ledger.json")
+
+
+# Stable fingerprint of a fixture row (scores, status and times change whenever the match does)
+def fingerprint_row(row):
+    row_json = json.dumps({str(key): value for key, value in dict(row).items()}, sort_keys=True, default=str)
+    return hashlib.sha1(row_json.encode('utf-8')).hexdigest()
+
+
+# Fingerprint of a raw response body
+def fingerprint_bytes(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+class ScrapeLedger:
+    """
+    Local ledger of the matches already persisted for each league.
+    Every match keeps its matchStatus, a fingerprint of its fixture row and a fingerprint of its payload.
+    """
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        self.leagues = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as file:
+                try:
+                    self.leagues = json.load(file)
+                except json.JSONDecodeError:
+                    logging.error(f"Scrape ledger {self.path} is corrupt, starting a new one.")
+                    self.leagues = {}
+
+    # Ledger entry of a match, or None if it was never persisted
+    def get(self, league_id, match_id):
+        return self.leagues.get(str(league_id), {}).get('matches', {}).get(str(match_id))
+
+    # Check whether a match has to be fetched again
+    def needs_fetch(self, league_id, match_id, match_status, fixture_fingerprint):
+        entry = self.get(league_id, match_id)
+        if entry is None:
+            return True
+        return entry['matchStatus'] != match_status or entry['fixtureFingerprint'] != fixture_fingerprint
+
+    # Check whether a fetched payload differs from the one persisted
+    def payload_changed(self, league_id, match_id, payload_fingerprint):
+        entry = self.get(league_id, match_id)
+        return entry is None or payload_fingerprint is None or entry.get('payloadFingerprint') != payload_fingerprint
+
+    # Record a persisted match
+    def record(self, league_id, match_id, match_status, fixture_fingerprint, payload_fingerprint):
+        league = self.leagues.setdefault(str(league_id), {'matches': {}})
+        league['matches'][str(match_id)] = {
+            'matchStatus': match_status,
+            'fixtureFingerprint': fixture_fingerprint,
+            'payloadFingerprint': payload_fingerprint,
+        }
+
+    # Write the ledger atomically
+    def save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(self.leagues, file)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
@@ -1,6 +1,9 @@
 import re
+import hashlib
 import json
 import os
+from collections import namedtuple
+from types import MappingProxyType
 
 # Get the directory path for the Assets folder
 assets_folder = os.path.join(os.path.dirname(__file__), '..', 'Assets/jsons')
@@ -11,86 +14,148 @@ json_file_path = os.path.join(assets_folder, 'leagues_filter.json')
 with open(json_file_path, 'r') as file:
     league_filters = json.load(file)
 
+# Sport IDs of the normalized (lowercase) sport categories, the one map used by every stage
+SPORT_IDS = MappingProxyType({
+    'afl mens': 1,
+    'afl womens': 2,
+    'nrl mens': 3,
+    'nrl womens': 4,
+    'fast5 mens': 5,
+    'fast5 womens': 6,
+    'netball mens': 7,
+    'netball womens nz': 8,
+    'netball womens australia': 9,
+    'netball womens international': 10,
+    'netball unknown': 11,
+    'nrl unknown': 12,
+})
+
+# Sport category of a league and its sport ID (None if the category has no ID)
+SportClassification = namedtuple('SportClassification', ['category', 'sport_id'])
+
+
+# Sport ID of a sport category, ignoring case and repeated spaces
+def sport_id_for(sport_category):
+    return SPORT_IDS.get(re.sub(r'\s+', ' ', sport_category.strip()).lower())
+
+
+# Define a class to match squad IDs against prefix rules
+class PrefixTrie:
+    """
+    Trie of squad ID prefixes compiled from (prefixes, result) rules in priority order.
+    A lookup walks the digits of a squad ID once instead of trying every prefix with startswith,
+    and returns the result of the highest priority rule with a matching prefix.
+    """
+    __slots__ = ('root',)
+
+    def __init__(self, rules):
+        self.root = {}
+        for priority, (prefixes, result) in enumerate(rules):
+            for prefix in prefixes:
+                node = self.root
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, (priority, result))  # The None key holds the rule ending at this node
+
+    # Result of the best rule matching one squad ID, or None
+    def match(self, squad_id):
+        node = self.root
+        best = None
+        for char in str(squad_id):
+            node = node.get(char)
+            if node is None:
+                break
+            rule = node.get(None)
+            if rule is not None and (best is None or rule[0] < best[0]):
+                best = rule
+        return best[1] if best is not None else None
+
+    # Result for the first squad ID matching any rule, or None
+    def first_match(self, squad_ids):
+        for squad_id in squad_ids:
+            result = self.match(squad_id)
+            if result is not None:
+                return result
+        return None
+
+
+# Squad ID rules, compiled once
+AFL_SQUADS = PrefixTrie([
+    (('1', '9815', '9835'), SportClassification("AFL Mens", 1)),
+    (('73', '78'), SportClassification("AFL Womens", 2)),
+])
+FAST5_SQUADS = PrefixTrie([
+    (('95', '97'), SportClassification("FAST5 Mens", 5)),  # FAST5 Men's SquadIDs
+    (('88',), SportClassification("FAST5 Womens", 6)),  # FAST5 Women's SquadIDs
+])
+NRL_SQUADS = PrefixTrie([
+    (('3', '81', '74'), SportClassification('NRL Mens', 3)),
+    (('92', '96', '97'), SportClassification('NRL Womens', 4)),
+])
+NETBALL_SQUADS = PrefixTrie([
+    (('949',), SportClassification('Netball Mens', 7)),  # International & NZ Netball Mens
+    (('71', '72', '73', '75', '77', '79'), SportClassification('Netball Womens NZ', 8)),
+    (('78', '80', '81', '91'), SportClassification('Netball Womens Australia', 9)),
+    (('76', '83', '87', '95', '97'), SportClassification('Netball Womens International', 10)),
+])
+
+# Sport category of the leagues listed in leagues_filter.json, the first list naming a league wins
+LEAGUE_SPORTS = {}
+for list_name, classification in (
+        ("international_leagues", SportClassification("Netball Womens International", 10)),
+        ("australian_leagues", SportClassification("Netball Womens Australia", 9)),
+        ("nz_leagues", SportClassification("Netball Womens NZ", 8)),
+        ("afl_mens_leagues", SportClassification("AFL Mens", 1)),
+        ("afl_womens_leagues", SportClassification("AFL Womens", 2))):
+    for listed_league in league_filters[list_name]:
+        LEAGUE_SPORTS.setdefault(listed_league, classification)
+LEAGUE_SPORTS = MappingProxyType(LEAGUE_SPORTS)
+
+# Fingerprint of the filtering rules, so results cached from them are rebuilt when leagues_filter.json changes
+LEAGUE_FILTERS_FINGERPRINT = hashlib.sha1(json.dumps(league_filters, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+# Classifications already made, keyed by league and the inputs they were made from
+_league_memo = {}
+
+
 # Function to determine the sport category based on squad ID patterns, league name, and league ID
 def determine_sport_category(regulation_periods, squad_ids, league_name, league_id):
     """
     Determine the sport category and corresponding sport ID based on squad ID patterns, league name, and league ID.
     Ensures New Zealand leagues are in NZ folders and AFL is only split into AFL Mens/Womens.
     """
-
-    # Initialize sport category and sport_id as None
-    sport_category = 'Unknown Sport'
-    sport_id = None
-
     # Strip the year from the league name to prevent interference with filtering
     league_name_cleaned = re.sub(r"\(\d{4}\)", "", league_name).strip()  # Remove years in parentheses, e.g., "(2009)"
+    league_name_upper = league_name_cleaned.upper()
 
-    # AFL Check
-    if "AFL" in league_name_cleaned.upper():
-        # Check the squad ID to determine AFL Men's or Women's
-        for squad_id in squad_ids:
-            str_squad_id = str(squad_id)
-            if str_squad_id.startswith('1') or str_squad_id.startswith('9815') or str_squad_id.startswith('9835'):
-                return "AFL Mens", 1
-            elif str_squad_id.startswith('73') or str_squad_id.startswith('78'):
-                return "AFL Womens", 2
-
-    # FAST5 Check (prioritize filtering for FAST5 by checking for "FAST")
-    if "FAST" in league_name_cleaned.upper():
-        # If the league name contains FAST, further filter by SquadID
-        for squad_id in squad_ids:
-            str_squad_id = str(squad_id)
-            if str_squad_id.startswith(('95', '97')):  # FAST5 Men's SquadIDs
-                return "FAST5 Mens", 5
-            elif str_squad_id.startswith('88'):  # FAST5 Women's SquadIDs 
-                return "FAST5 Womens", 6
-
-    # Load league filters from the JSON file
-    international_leagues = league_filters["international_leagues"]
-    australian_leagues = league_filters["australian_leagues"]
-    nz_leagues = league_filters["nz_leagues"]
-    afl_mens_leagues = league_filters["afl_mens_leagues"]
-    afl_womens_leagues = league_filters["afl_womens_leagues"]
-
-    # Check for league name in pre-determined lists (now using cleaned league name)
-    if league_name_cleaned in international_leagues:
-        return "Netball Womens International", 10  # International folder
-    elif league_name_cleaned in australian_leagues:
-        return "Netball Womens Australia", 9  # Australian folder
-    elif league_name_cleaned in nz_leagues:
-        return "Netball Womens NZ", 8  # NZ folder
-    elif league_name_cleaned in afl_mens_leagues:
-        return "AFL Mens", 1  # AFL Mens folder
-    elif league_name_cleaned in afl_womens_leagues:
-        return "AFL Womens", 2  # AFL Womens folder
+    # AFL and FAST5 leagues are split by squad ID
+    if "AFL" in league_name_upper:
+        classification = AFL_SQUADS.first_match(squad_ids)
+        if classification is not None:
+            return classification
+    if "FAST" in league_name_upper:
+        classification = FAST5_SQUADS.first_match(squad_ids)
+        if classification is not None:
+            return classification
+
+    # Check for league name in pre-determined lists
+    if league_name_cleaned in LEAGUE_SPORTS:
+        return LEAGUE_SPORTS[league_name_cleaned]
 
     # Squad ID filtering (fallback if not captured by league filtering)
-    for squad_id in squad_ids:
-        str_squad_id = str(squad_id)  # Convert squad_id to string for pattern matching
-
-        # Specific rules for NRL
-        if regulation_periods == 2:
-            if str_squad_id.startswith(('3', '81', '74')):
-                return 'NRL Mens', 3  # NRL Men's
-            elif str_squad_id.startswith(('92', '96', '97')):
-                return 'NRL Womens', 4  # NRL Women's
-
-        # Specific rules for Netball
-        elif regulation_periods == 4:
-            if str_squad_id.startswith('949'):
-                return 'Netball Mens', 7  # International & NZ Netball Mens
-            elif str_squad_id.startswith(('71', '72', '73', '75', '77', '79')):
-                return 'Netball Womens NZ', 8  # NZ Women's Netball
-            elif str_squad_id.startswith(('78', '80', '81', '91')):
-                return 'Netball Womens Australia', 9  # Australian Women's Netball
-            elif str_squad_id.startswith(('76', '83', '87', '95', '97')):
-                return 'Netball Womens International', 10  # International Women's Netball  
-
-    # Fallback if nothing matches
+    if regulation_periods == 2:
+        return NRL_SQUADS.first_match(squad_ids) or SportClassification('NRL Unknown', 12)
     if regulation_periods == 4:
-        return 'Netball Unknown', 11  # General fallback for Netball
-    elif regulation_periods == 2:
-        return 'NRL Unknown', 12  # General fallback for NRL
+        return NETBALL_SQUADS.first_match(squad_ids) or SportClassification('Netball Unknown', 11)
+    return SportClassification('Unknown Sport', None)
+
 
-    # Return the category and ID if all else fails
-    return sport_category, sport_id  
+# Classification of a league, computed once per league and set of squads
+def classify_league(league_id, regulation_periods, squad_ids, league_name):
+    key = (league_id, regulation_periods, league_name, tuple(squad_ids))
+    classification = _league_memo.get(key)
+    if classification is None:
+        category, sport_id = determine_sport_category(regulation_periods, squad_ids, league_name, league_id)
+        category = re.sub(r'\s+', ' ', category.strip())
+        classification = _league_memo[key] = SportClassification(category, sport_id_for(category))
+    return classification
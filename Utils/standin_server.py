@@ -0,0 +1,202 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from Utils.response_cache import CACHE_DIR
+
+# Default directory holding the recorded Champion Data payloads
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Cache", "recordings")
+
+# Chunk size (bytes) used when a bandwidth cap is enforced
+CHUNK_SIZE = 16 * 1024
+
+
+# Map a Champion Data URL path onto a file of the recordings directory
+def recording_path(recordings_dir, url_path):
+    """
+    '/data/competitions.json'       -> <recordings_dir>/competitions.json
+    '/data/8005/fixture.json'       -> <recordings_dir>/8005/fixture.json
+    '/data/8005/80121405.json'      -> <recordings_dir>/8005/80121405.json
+    """
+    path = urlsplit(url_path).path
+    if path.startswith('/data/'):
+        path = path[len('/data/'):]
+    parts = [part for part in path.split('/') if part and part not in ('.', '..')]
+    if not parts:
+        return None
+    return os.path.join(recordings_dir, *parts)
+
+
+# Export the responses stored in the response cache as a recordings directory
+def export_cache(cache_dir=CACHE_DIR, recordings_dir=RECORDINGS_DIR):
+    exported = 0
+    for directory, _, file_names in os.walk(cache_dir):
+        for file_name in file_names:
+            if not file_name.endswith('.meta.json'):
+                continue
+            with open(os.path.join(directory, file_name), 'r') as file:
+                meta = json.load(file)
+            body_path = os.path.join(directory, file_name.replace('.meta.json', '.body.gz'))
+            target = recording_path(recordings_dir, meta['url'])
+            if target is None or not os.path.exists(body_path):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with gzip.open(body_path, 'rb') as source, open(target, 'wb') as destination:
+                destination.write(source.read())
+            exported += 1
+    logging.info(f"Exported {exported} cached responses to {recordings_dir}")
+    return exported
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serve recorded payloads with the latency, errors and bandwidth configured on the server."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.record_request()
+
+        # Simulated round-trip latency
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        # Injected failures
+        if server.reset_rate and random.random() < server.reset_rate:
+            self.close_connection = True
+            self.connection.close()
+            return
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_bytes(server.error_status, b'{"error": "injected failure"}')
+            return
+
+        path = recording_path(server.recordings_dir, self.path)
+        if path is None or not os.path.isfile(path):
+            self._send_bytes(404, b'{"error": "not recorded"}')
+            return
+
+        with open(path, 'rb') as file:
+            body = file.read()
+
+        # Conditional GET support so revalidation can be benchmarked too
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send_bytes(304, b'', {'ETag': etag})
+            return
+
+        headers = {'ETag': etag, 'Content-Type': 'application/json'}
+        if server.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        self._send_bytes(200, body, headers)
+
+    # Send a response body, throttled to the server's bandwidth cap
+    def _send_bytes(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not body:
+            return
+
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start:start + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Stand-in server: {format % args}")
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for mc.championdata.com serving recorded competitions, fixture and match payloads.
+    Latency (seconds), error injection (probabilities) and a bandwidth cap (bytes per second) are configurable.
+    """
+    daemon_threads = True
+
+    def __init__(self, recordings_dir=RECORDINGS_DIR, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, reset_rate=0.0, bandwidth=None, compress=True):
+        super().__init__((host, port), StandInHandler)
+        self.recordings_dir = recordings_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reset_rate = reset_rate
+        self.bandwidth = bandwidth
+        self.compress = compress
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self):
+        with self._counter_lock:
+            self.requests_served += 1
+
+    # Serve requests on a background thread
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Stand-in server listening on {self.base_url}, serving {self.recordings_dir}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Champion Data payloads locally.")
+    parser.add_argument('--recordings', default=RECORDINGS_DIR, help="Directory of recorded payloads.")
+    parser.add_argument('--export-cache', metavar='CACHE_DIR', nargs='?', const=CACHE_DIR,
+                        help="Export the response cache into the recordings directory first.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Added latency per request, in seconds.")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra latency up to this many seconds.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probability of answering with --error-status.")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--reset-rate', type=float, default=0.0, help="Probability of dropping the connection.")
+    parser.add_argument('--bandwidth', type=float, default=None, help="Bandwidth cap in bytes per second.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.export_cache:
+        export_cache(args.export_cache, args.recordings)
+
+    server = StandInServer(args.recordings, args.host, args.port, args.latency, args.jitter,
+                           args.error_rate, args.error_status, args.reset_rate, args.bandwidth)
+    print(f"Serving {args.recordings} on {server.base_url} (run main.py --base-url {server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
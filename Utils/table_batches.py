@@ -0,0 +1,115 @@
+import logging
+
+# pyarrow is optional, rows are kept as Python lists without it
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+HAS_ARROW = pa is not None
+
+
+# Arrow array of a column, as text if its values mix types Arrow cannot hold in one column (e.g. str and int)
+def column_array(values):
+    try:
+        return pa.array(values, from_pandas=True)  # NaN becomes null, stored as NULL
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+# Arrow record batch of a list of rows (dicts, or records of Core.MatchRecords)
+def record_batch(rows):
+    first = rows[0]
+    if isinstance(first, tuple) and hasattr(first, '_fields') and all(type(row) is type(first) for row in rows):
+        names = list(first._fields)
+        columns = [list(column) for column in zip(*rows)]
+    else:
+        names = list(dict.fromkeys(field for row in rows for field in row.keys()))
+        columns = [[row.get(name) for row in rows] for name in names]
+    return pa.RecordBatch.from_arrays([column_array(column) for column in columns], names=names)
+
+
+# Names of the columns whose types cannot be promoted to one numeric type across tables
+def mixed_columns(tables):
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    return {name for name, column_types in types.items()
+            if len(column_types) > 1 and not all(pa.types.is_integer(type_) or pa.types.is_floating(type_) for type_ in column_types)}
+
+
+# Table with the given columns cast to text
+def as_text_columns(table, names):
+    for index, field in enumerate(table.schema):
+        if field.name in names and not pa.types.is_string(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    return table
+
+
+class TableBatches:
+    """
+    Rows of one table between the parse and insert stages, one batch per append (i.e. per match).
+    By default the appended rows are kept as they are. With use_arrow (opt-in, for consumers reading the batches
+    with table()) each batch is an Arrow record batch instead; the row sinks read dicts, so iterating converts
+    them back, and Arrow type inference stores the values of mixed-type columns as text.
+    """
+    def __init__(self, name, use_arrow=False):
+        self.name = name
+        self.use_arrow = bool(use_arrow) and HAS_ARROW
+        if use_arrow and not HAS_ARROW:
+            logging.warning(f"pyarrow is not installed, rows of {name} are kept as Python lists.")
+        self.batches = []
+        self.keys = []  # Key of each batch (e.g. its matchId), for rows_of
+        self.num_rows = 0
+
+    # Add the rows of one parse step as a batch, optionally named by a key
+    def append(self, rows, key=None):
+        if not rows:
+            return self
+        self.batches.append(record_batch(rows) if self.use_arrow else list(rows))
+        self.keys.append(key)
+        self.num_rows += len(rows)
+        return self
+
+    def __len__(self):
+        return self.num_rows
+
+    def __bool__(self):
+        return self.num_rows > 0
+
+    # Rows as dicts, materialized one batch at a time
+    def __iter__(self):
+        for batch in self.batches:
+            if self.use_arrow:
+                yield from batch.to_pylist()
+            else:
+                yield from batch
+
+    # Rows of the batches appended with a key, as dicts
+    def rows_of(self, key):
+        rows = []
+        for batch_key, batch in zip(self.keys, self.batches):
+            if batch_key == key:
+                rows.extend(batch.to_pylist() if self.use_arrow else batch)
+        return rows
+
+    # Arrow table of every batch (zero-copy, batches with other columns are aligned with null columns)
+    def table(self):
+        if not self.use_arrow:
+            raise RuntimeError(f"Rows of {self.name} are not held as Arrow batches.")
+        if not self.batches:
+            return pa.table({})
+        tables = [pa.Table.from_batches([batch]) for batch in self.batches]
+        try:
+            return pa.concat_tables(tables, promote_options='permissive')
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # A column is e.g. int in one match and text in another; only those columns are copied, as text
+            text_columns = mixed_columns(tables)
+            tables = [as_text_columns(table, text_columns) for table in tables]
+            return pa.concat_tables(tables, promote_options='permissive')
+
+    # Bytes held by the Arrow batches
+    def nbytes(self):
+        return sum(batch.nbytes for batch in self.batches) if self.use_arrow else None
@@ -1,8 +1,116 @@
+import argparse
 from Core.Scraper import Scraper
+from Core.LeaguesList import League
+from Core.LivePoller import LivePoller, LIVE_POLL_INTERVAL
+from Core.Scheduler import MatchScheduler, REFRESH_INTERVAL, active_leagues
+from Core.MatchFetcher import DEFAULT_CONCURRENCY
+from Core.MatchRecords import PIPELINES
+from Utils import http_session
+from Utils.response_cache import CACHE_DIR
+from Utils.rate_limiter import DEFAULT_RATE
+from Utils.scrape_ledger import LEDGER_PATH
+from Utils.name_matcher import DEFAULT_THRESHOLD
+
+
+# Parse the command line arguments
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape Champion Data competitions into the database.")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of match payloads downloaded in parallel.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch and process matches that are new or changed since the last run.")
+    parser.add_argument('--ledger', default=LEDGER_PATH,
+                        help="Path of the ledger of stored matches used by --incremental.")
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_RATE,
+                        help="Maximum requests per second sent to the Champion Data host (0 disables the cap).")
+    parser.add_argument('--base-url', default=None,
+                        help="Send requests to this host instead of mc.championdata.com, e.g. a local stand-in server.")
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help="Directory of the on-disk response cache.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always download responses instead of using the on-disk cache.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Replay responses from the on-disk cache only, without any network access.")
+    parser.add_argument('--schedule', action='store_true',
+                        help="Run as a daemon that scrapes each match shortly after its scheduled finish.")
+    parser.add_argument('--live', action='store_true',
+                        help="Poll the in-progress matches and upsert only the rows that changed since the last poll.")
+    parser.add_argument('--poll-interval', type=float, default=LIVE_POLL_INTERVAL,
+                        help="Seconds between two polls in --live mode.")
+    parser.add_argument('--leagues', type=int, nargs='+', default=None,
+                        help="League IDs watched by --schedule and --live (default: every league of the current season).")
+    parser.add_argument('--refresh-interval', type=float, default=REFRESH_INTERVAL,
+                        help="Seconds between two reads of the fixture calendar in --schedule mode.")
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum score (0-1) for matching a player without a playerId to a similar name; 0 disables fuzzy matching.")
+    parser.add_argument('--pipeline', choices=PIPELINES, default='pandas',
+                        help="Parse match payloads with DataFrames or straight into insert records (faster, less memory).")
+    parser.add_argument('--arrow', action='store_true',
+                        help="Hold parsed rows as Arrow record batches between the parse and insert stages (needs pyarrow; the inserts still read them as dicts).")
+    parser.add_argument('--bulk-load', action='store_true',
+                        help="Spool the rows to TSV files and load them with LOAD DATA LOCAL INFILE once every league is scraped (full-history backfills into empty or rebuilt tables only: rows already stored are kept, not updated).")
+    parser.add_argument('--staging-merge', action='store_true',
+                        help="Write each league's rows to temporary staging tables and merge them into the live tables with one statement per table.")
+    parser.add_argument('--writers', type=int, default=0,
+                        help="Write the rows of a few leagues at a time with this many parallel writers on pooled connections, in foreign key order (0 writes on the single connection).")
+    parser.add_argument('--commit-every', type=int, default=0,
+                        help="Also commit after this many matches of a fixture (0 commits once per fixture); each match has its own savepoint either way.")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="With --bulk-load, drop the secondary indexes of each table during its load and rebuild them after it.")
+    args = parser.parse_args()
+    if (args.schedule or args.live) and args.offline:
+        parser.error("--schedule and --live poll for new results, they cannot be combined with --offline.")
+    if args.schedule and args.live:
+        parser.error("--schedule and --live are separate modes, run them as two processes.")
+    if not 0 <= args.fuzzy_threshold <= 1:
+        parser.error("--fuzzy-threshold must be between 0 and 1.")
+    if args.bulk_load and (args.schedule or args.live):
+        parser.error("--bulk-load is for full scrapes, it cannot be combined with --schedule or --live.")
+    if args.bulk_load and args.incremental:
+        parser.error("--bulk-load is for empty or rebuilt tables, it cannot be combined with --incremental (changed matches would keep their stored rows).")
+    if args.staging_merge and args.incremental:
+        parser.error("--staging-merge cannot be combined with --incremental (rows dropped by the merge are only warnings, their matches would be recorded as stored).")
+    if args.bulk_load and args.staging_merge:
+        parser.error("--bulk-load and --staging-merge are separate write strategies, use one of them.")
+    if args.writers and (args.schedule or args.live):
+        parser.error("--writers is for full scrapes, it cannot be combined with --schedule or --live.")
+    if args.writers and (args.bulk_load or args.staging_merge):
+        parser.error("--writers cannot be combined with --bulk-load or --staging-merge.")
+    if not 0 <= args.writers <= 32:
+        parser.error("--writers must be between 0 and 32 (the size limit of a connection pool).")
+    if args.commit_every < 0:
+        parser.error("--commit-every must be 0 or more.")
+    if args.defer_indexes and not args.bulk_load:
+        parser.error("--defer-indexes only applies to --bulk-load.")
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the response cache, it cannot be combined with --no-cache.")
+    return args
 
 
 # Main function
 if __name__ == "__main__":
-    scraper = Scraper()
-    scraper.scrape_entire_database()
-                                                         
\ No newline at end of file
+    args = parse_args()
+    http_session.set_base_url(args.base_url)
+    http_session.configure_rate_limiter(rate=args.max_rate, max_limit=max(args.concurrency, 1))
+    if not args.no_cache:
+        http_session.configure_cache(args.cache_dir, offline=args.offline)
+    scraper = Scraper(concurrency=args.concurrency, incremental=args.incremental, ledger_path=args.ledger,
+                      fuzzy_threshold=args.fuzzy_threshold or None, pipeline=args.pipeline,
+                      use_arrow=args.arrow, bulk_load=args.bulk_load,
+                      defer_indexes=args.defer_indexes, staging_merge=args.staging_merge, writers=args.writers,
+                      commit_every=args.commit_every)
+    if args.schedule:
+        scheduler = MatchScheduler(scraper, league_ids=args.leagues, refresh_interval=args.refresh_interval)
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+    elif args.live:
+        leagues_df, _ = League.fetch_leagues()
+        poller = LivePoller(scraper, active_leagues(leagues_df, args.leagues), poll_interval=args.poll_interval)
+        try:
+            poller.run()
+        except KeyboardInterrupt:
+            poller.stop()
+    else:
+        scraper.scrape_entire_database()